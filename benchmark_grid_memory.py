@@ -0,0 +1,82 @@
+"""Benchmark the memory used to parse the largest ABAQUS grid file.
+
+Parses the largest mesh_stnXX.abq file of the Sandia and biplane blades in a
+new Python process, and prints:
+  * the peak resident set size (RSS) of the process, before and after parsing
+  * the number of gr.Node objects that were created, including the
+    placeholders for absent nodes (node_num=0)
+  * the size of each node and element object (including its __dict__, if it
+    has one)
+
+A new process is used, so the memory used by IPython (and by anything run
+before) is not counted. The resource module is used to measure the peak RSS,
+so this script runs on Linux and Mac OS X, but not on Windows.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run benchmark_grid_memory.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import sys
+import glob
+import subprocess
+
+
+# code that is run in the new process
+child_code = r"""
+import gc
+import sys
+import resource
+import lib.abaqus_utils2 as au
+import lib.grid as gr
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux, and in bytes on Mac OS X
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss /= 1024
+    return rss/1024.0
+
+def size(obj):
+    s = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        s += sys.getsizeof(obj.__dict__)
+    return s
+
+rss0 = peak_rss()
+g = au.AbaqusGrid(sys.argv[1])
+rss1 = peak_rss()
+del g._abq_file
+gc.collect()
+nodes = [obj for obj in gc.get_objects() if isinstance(obj, gr.Node)]
+absent = set([id(el.node9) for el in g.list_of_elements])
+print '{0} nodes, {1} elements'.format(g.number_of_nodes, g.number_of_elements)
+print 'peak RSS before parsing: {0:8.1f} MB'.format(rss0)
+print 'peak RSS after parsing:  {0:8.1f} MB  (+{1:.1f} MB)'.format(rss1,
+    rss1-rss0)
+print 'Node objects:            {0:8d}  ({1} absent-node placeholders)'.format(
+    len(nodes), len(absent))
+print 'bytes per node:          {0:8d}'.format(size(g.list_of_nodes[0]))
+print 'bytes per element:       {0:8d}'.format(size(g.list_of_elements[0]))
+"""
+
+# find the largest ABAQUS file
+abq_files = (glob.glob(os.path.join('sandia_blade', 'stn*', '*.abq')) +
+    glob.glob(os.path.join('biplane_blade', 'stn*', '*.abq')))
+abq_filename = max(abq_files, key=os.path.getsize)
+
+print ''
+print 'ABAQUS file: {0} ({1:.1f} MB)'.format(abq_filename,
+    os.path.getsize(abq_filename)/1024.0**2)
+print subprocess.check_output([sys.executable, '-c', child_code,
+    abq_filename])
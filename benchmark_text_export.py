@@ -0,0 +1,177 @@
+"""Benchmark the text exporters on the largest station of the Sandia blade.
+
+Compares the old way of writing numbers (one str.format() call and one write
+per line) with lib.text_utils (one formatting call and one write per block),
+for:
+  * the layer polygon coords of the station (TrueGrid curves and polygon files)
+  * the airfoil coords of the station (exported by <blade>.plot_all_airfoils())
+  * the nodes, element connectivity, and element layers of its VABS input file
+Each new block of text is checked to be byte-identical to the old one.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run benchmark_text_export.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import timeit
+import tempfile
+import numpy as np
+import lib.blade as bl
+import lib.abaqus_utils2 as au
+import lib.text_utils as tu
+
+
+# SET THESE PARAMETERS -----------------
+station_num = 22  # the station with the most mesh nodes
+num_repeats = 5
+# --------------------------------------
+
+stn_str = 'stn{0:02d}'.format(station_num)
+(fd, tmp_filename) = tempfile.mkstemp(suffix='.txt')
+os.close(fd)
+
+
+def best_time(func):
+    """Returns the best time (in seconds) of several calls to func()."""
+    return min(timeit.repeat(func, number=1, repeat=num_repeats))
+
+def compare(label, old_func, new_func):
+    """Check that old_func() and new_func() write the same file, and time them.
+
+    old_func() formats and writes one line at a time, like the exporters used
+    to. new_func() formats the whole block with lib.text_utils, and writes it
+    once.
+
+    """
+    old_func()
+    old_text = open(tmp_filename, 'rb').read()
+    new_func()
+    new_text = open(tmp_filename, 'rb').read()
+    if old_text != new_text:
+        raise ValueError("The new text for '{0}' is not byte-identical!".format(label))
+    num_lines = old_text.count('\n')
+    t_old = best_time(old_func)
+    t_new = best_time(new_func)
+    print '{0:<22s} {1:>8d} {2:>12.0f} {3:>12.0f} {4:>8.1f}x'.format(label,
+        num_lines, num_lines/t_old, num_lines/t_new, t_old/t_new)
+
+
+# layer polygon coords -----------------
+m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+station = m.list_of_stations[station_num-1]
+station.airfoil.create_polygon()
+station.structure.create_all_layers()
+list_of_coords = [layer.polygon.exterior.coords
+    for layer in station.structure._list_of_layers]
+
+def old_coords():
+    f = open(tmp_filename, 'w')
+    for coords in list_of_coords:
+        for cd_pair in coords:
+            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
+    f.close()
+
+def new_coords():
+    f = open(tmp_filename, 'w')
+    f.write(''.join([tu.format_block(coords, tu.coords_fmt)
+        for coords in list_of_coords]))
+    f.close()
+
+# airfoil coords -----------------------
+station.airfoil.read_coords()
+y = station.airfoil.coords['x']
+z = station.airfoil.coords['y']
+x = np.ones((len(y),))*station.coords.x1
+
+def old_airfoil():
+    f = open(tmp_filename, 'w')
+    for i in range(len(y)):
+        f.write('{0:12.9f}\t{1:12.9f}\t{2:12.9f}\n'.format(x[i],y[i],z[i]))
+    f.close()
+
+def new_airfoil():
+    f = open(tmp_filename, 'w')
+    f.write(tu.format_block(np.column_stack((x,y,z)), tu.xyz_fmt))
+    f.close()
+
+# VABS input file blocks ---------------
+g = au.AbaqusGrid('sandia_blade/{0}/mesh_{0}.abq'.format(stn_str))
+for element in g.list_of_elements:
+    if element.theta1 is None:
+        element.theta1 = 0.0
+    if element.layer_num is None:
+        element.layer_num = 1
+n = str(len(str(g.number_of_nodes)))
+e = str(len(str(g.number_of_elements)))
+
+def old_nodes():
+    fmt = '{0:>'+n+'d}' + 5*' ' + '{1:> 10.8f}' + 2*' ' + '{2:> 10.8f}\n'
+    f = open(tmp_filename, 'w')
+    for node in g.list_of_nodes:
+        f.write(fmt.format(node.node_num, node.x2, node.x3))
+    f.close()
+
+def new_nodes():
+    fmt = '{:>'+n+'d}' + 5*' ' + '{:> 10.8f}' + 2*' ' + '{:> 10.8f}'
+    rows = [(node.node_num, node.x2, node.x3) for node in g.list_of_nodes]
+    f = open(tmp_filename, 'w')
+    f.write(tu.format_table(rows, fmt))
+    f.close()
+
+def old_connectivity():
+    fmt = ('{0:>'+e+'d}     ' +
+        ' '.join(['{'+str(i)+':>'+n+'d}' for i in range(1,10)]) + '\n')
+    f = open(tmp_filename, 'w')
+    for el in g.list_of_elements:
+        f.write(fmt.format(el.elem_num, el.node1.node_num, el.node2.node_num,
+            el.node3.node_num, el.node4.node_num, el.node5.node_num,
+            el.node6.node_num, el.node7.node_num, el.node8.node_num,
+            el.node9.node_num))
+    f.close()
+
+def new_connectivity():
+    fmt = '{:>'+e+'d}     ' + ' '.join(9*['{:>'+n+'d}'])
+    rows = [(el.elem_num, el.node1.node_num, el.node2.node_num,
+        el.node3.node_num, el.node4.node_num, el.node5.node_num,
+        el.node6.node_num, el.node7.node_num, el.node8.node_num,
+        el.node9.node_num) for el in g.list_of_elements]
+    f = open(tmp_filename, 'w')
+    f.write(tu.format_table(rows, fmt))
+    f.close()
+
+def old_element_layers():
+    fmt = '{0:>'+e+'d}' + 5*' ' + '{1:d} {2:>7.2f}\n'
+    f = open(tmp_filename, 'w')
+    for el in g.list_of_elements:
+        f.write(fmt.format(el.elem_num, el.layer_num, el.theta1))
+    f.close()
+
+def new_element_layers():
+    fmt = '{:>'+e+'d}' + 5*' ' + '{:d} {:>7.2f}'
+    rows = [(el.elem_num, el.layer_num, el.theta1)
+        for el in g.list_of_elements]
+    f = open(tmp_filename, 'w')
+    f.write(tu.format_table(rows, fmt))
+    f.close()
+
+# print the results --------------------
+print ''
+print 'Station #{0}: best of {1} runs'.format(station_num, num_repeats)
+print '{0:<22s} {1:>8s} {2:>12s} {3:>12s} {4:>9s}'.format('block', 'lines',
+    'old lines/s', 'new lines/s', 'speedup')
+print '-'*67
+compare('layer polygon coords', old_coords, new_coords)
+compare('airfoil coords', old_airfoil, new_airfoil)
+compare('VABS nodes', old_nodes, new_nodes)
+compare('VABS connectivity', old_connectivity, new_connectivity)
+compare('VABS element layers', old_element_layers, new_element_layers)
+os.remove(tmp_filename)
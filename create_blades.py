@@ -44,9 +44,9 @@ if biplane_flap_sym_no_stagger_flag:
     b1.copy_all_airfoil_coords()
 
     # pre-process the airfoil coordinates
+    # (unchanged stations are loaded from the cache in the blade path)
+    b1.create_all_layers(cache_flag=True)
     for station in b1.list_of_stations:
-        station.airfoil.create_polygon()
-        station.structure.create_all_layers()
         station.structure.write_all_part_polygons()
 
     # make a 3D visualization of the entire blade with Mayavi's mlab
@@ -59,9 +59,9 @@ if sandia_flag:
     m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
 
     # pre-process the airfoil coordinates
+    # (unchanged stations are loaded from the cache in the blade path)
+    m.create_all_layers(cache_flag=True)
     for station in m.list_of_stations:
-        station.airfoil.create_polygon()
-        station.structure.create_all_layers()
         station.structure.write_all_part_polygons()
 
     # create some airfoil plots in Matplotlib
@@ -102,6 +102,14 @@ class AbaqusGrid:
         elem_num: An integer that represents a unique element.
     number_of_nodes - An integer for the number of nodes in the grid.
     number_of_elements - An integer for the number of elements in the grid.
+    node_element_incidence - A scipy.sparse.csr_matrix, shape (N,E), 1 if the
+        node list_of_nodes[n] is in the element list_of_elements[e]. None
+        until build_topology() is run.
+    element_adjacency - A scipy.sparse.csr_matrix, shape (E,E), 1 if two
+        elements share a side. None until build_topology() is run.
+    boundary_edges - An array of ints, shape (B,3), the node indices (two
+        corners, then the mid-side node) of each side on the boundary of the
+        grid. None until build_topology() is run.
 
     """
     def __init__(self, filename, debug_flag=False, soft_warning=False,
@@ -127,6 +135,10 @@ class AbaqusGrid:
         # attributes for self._parse_elements()
         self.number_of_elements = None
         self.list_of_elements = []
+        # attributes for self.build_topology()
+        self.node_element_incidence = None
+        self.element_adjacency = None
+        self.boundary_edges = None
         if auto_parse:
             # parse the ABAQUS output file into grid objects
             self._parse_abaqus(debug_flag=debug_flag,
@@ -168,7 +180,7 @@ class AbaqusGrid:
         self._abq_file - A list of strings.
 
         """
-        f = open(self.filename, 'r')
+        f = open(self.filename, 'rU')
         self._abq_file = f.readlines()
         f.close()
 
@@ -411,3 +423,18 @@ class AbaqusGrid:
                         else:
                             print "The element set '{0}' may be assigned to the wrong element (#{1}), instead of to the correct element (#{2}). In <grid>._parse_abaqus(), run:\n-->  <grid>.list_of_elements.sort(key=attrgetter('elem_num'))\nbefore calling:\n-->  <grid>._parse_elementsets(debug_flag=debug_flag)".format(elementset_name, self.list_of_elements[int(elem_num)-1].elem_num, int(elem_num))
                     self.list_of_elements[int(elem_num)-1].element_set = elementset_name
+
+    def build_topology(self):
+        """Builds the sparse connectivity and adjacency structures of the grid.
+
+        Saves self.node_element_incidence, self.element_adjacency, and
+        self.boundary_edges (see grid.build_topology()).
+
+        Usage:
+        g = au.AbaqusGrid('cs_abq.txt')
+        g.build_topology()
+        g.node_element_incidence[0].indices   # elements that share node #1
+        g.element_adjacency[0].indices        # neighbors of element #1
+
+        """
+        gr.build_topology(self)
@@ -24,6 +24,53 @@ class _Airfoil:
         self.pitch_axis = pitch_axis  # units [-]  (chord fraction)
         self.twist = twist            # units [deg]
 
+    def _resample(self, coords, num_points, name):
+        """Resample a unit airfoil curve to num_points with cosine spacing.
+
+        Returns a new numpy array of airfoil coordinates.
+
+        The curve is split at the leading edge, and each surface is resampled
+        along its arc length, so the points cluster at the leading and
+        trailing edges. The trailing edge points (the first and last points)
+        and the leading edge point (y==0) are copied exactly, so
+        <Airfoil>.split_at_LE_and_TE() still finds the leading edge.
+
+        Parameters
+        ----------
+        coords : numpy array, the unscaled airfoil coordinates
+        num_points : int, the total number of points in the resampled curve
+        name : str, the airfoil name (for error messages)
+
+        """
+        if num_points < 5:
+            raise ValueError("keyword 'num_points' must be at least 5.")
+        # find the leading edge, just like split_at_LE_and_TE()
+        temp_list = np.nonzero(coords['y']==0.0)[0]
+        temp_list = temp_list[np.nonzero(temp_list)[0]]
+        try:
+            LE_index = temp_list[0]
+        except IndexError:
+            raise IndexError("Leading edge index was not found for {0}!\n  Resampling requires a leading edge point with y=0.0.".format(name))
+        # split the points between the pressure and suction surfaces
+        # (the LE point is shared by both surfaces)
+        n_pressure = (num_points+1)//2
+        n_suction = num_points + 1 - n_pressure
+        new_coords = np.zeros(num_points, dtype=[('x', 'f8'), ('y', 'f8')])
+        for (surface, n, start) in [(coords[:LE_index+1], n_pressure, 0),
+                                    (coords[LE_index:], n_suction, n_pressure-1)]:
+            # cumulative arc length along this surface
+            ds = np.hypot(np.diff(surface['x']), np.diff(surface['y']))
+            s = np.append(0.0, np.cumsum(ds))
+            # cosine spacing: clustered at both ends of the surface
+            beta = np.linspace(0.0, np.pi, n)
+            s_new = 0.5*s[-1]*(1.0-np.cos(beta))
+            new_coords['x'][start:start+n] = np.interp(s_new, s, surface['x'])
+            new_coords['y'][start:start+n] = np.interp(s_new, s, surface['y'])
+            # copy the endpoints exactly (TE and LE points)
+            new_coords[start] = surface[0]
+            new_coords[start+n-1] = surface[-1]
+        return new_coords
+
 
 class MonoplaneAirfoil(_Airfoil):
     """Define a monoplane airfoil (external dimensions)."""
@@ -55,12 +102,19 @@ Pitch axis:  {3:6.4f} (chord fraction)
 Twist:       {4:6.4f} (degrees)""".format(self.name, self.filename,
             self.chord, self.pitch_axis, self.twist)
 
-    def read_coords(self, comment_char='#'):
+    def read_coords(self, comment_char='#', num_points=None):
         """Read the airfoil coordinates into memory from a file in station_path.
 
         Creates a new attribute for this airfoil: <Airfoil>.coords,
         which is a numpy array of airfoil coordinates.
 
+        Parameters
+        ----------
+        comment_char : str, lines that start with this character are ignored
+        num_points : int, if not None, resample the airfoil coordinates to
+            this many points with cosine spacing (default: None, use the
+            points in the airfoil file)
+
         Note
         ----
         If the trailing edge of the airfoil is a thin feature, it must have a
@@ -76,6 +130,30 @@ Twist:       {4:6.4f} (degrees)""".format(self.name, self.filename,
                 comments=comment_char)
         except IOError:
             raise IOError("Airfoil file does not exist yet!\n  Run <Blade>.copy_all_airfoil_coords() first.")
+        if num_points is not None:
+            self.resample_coords(num_points)
+
+    def resample_coords(self, num_points):
+        """Resample the airfoil coordinates to num_points with cosine spacing.
+
+        Must run <Airfoil>.read_coords() first, and must be run before
+        <Airfoil>.scale_and_translate_coords().
+
+        Parameters
+        ----------
+        num_points : int, the total number of points in the resampled airfoil
+
+        Usage
+        -----
+        # use 100 points for each airfoil in blade 'm'
+        for station in m.list_of_stations:
+            station.airfoil.read_coords()
+            station.airfoil.resample_coords(num_points=100)
+
+        """
+        if self.coords is None:
+            raise AttributeError("{0} coordinates for station #{1} haven't been read!\n  You need to first read in the coordinates with <Station>.airfoil.read_coords().".format(self.name, self.parent_station.station_num))
+        self.coords = self._resample(self.coords, num_points, self.name)
 
     def scale_coords(self, scale_factor):
         """Scale the airfoil coordinates by a scale factor.
@@ -309,12 +387,19 @@ Twist:                   {14:6.4f} (degrees)""".format(self.name,
             self.stagger_to_chord_ratio, self.stagger, self.total_chord, 
             self.pitch_axis, self.twist)
 
-    def read_coords(self, comment_char='#'):
+    def read_coords(self, comment_char='#', num_points=None):
         """Read the airfoil coordinates into memory from a file in station_path.
 
         Creates a new attribute for this station: <Station>.airfoil.coords,
         which is a numpy array of airfoil coordinates.
 
+        Parameters
+        ----------
+        comment_char : str, lines that start with this character are ignored
+        num_points : int, if not None, resample the lower and upper airfoil
+            coordinates to this many points each with cosine spacing
+            (default: None, use the points in the airfoil files)
+
         Note
         ----
         If the trailing edge of the airfoil is a thin feature, it must have a
@@ -337,6 +422,26 @@ Twist:                   {14:6.4f} (degrees)""".format(self.name,
                 dtype=[('x', 'f8'), ('y', 'f8')], comments=comment_char)
         except IOError:
             raise IOError("Upper airfoil file does not exist yet!\n  Run <Blade>.copy_all_airfoil_coords() first.")
+        if num_points is not None:
+            self.resample_coords(num_points)
+
+    def resample_coords(self, num_points):
+        """Resample both biplane airfoils to num_points with cosine spacing.
+
+        Must run <Airfoil>.read_coords() first, and must be run before
+        <Airfoil>.scale_and_translate_coords().
+
+        Parameters
+        ----------
+        num_points : int, the total number of points in each resampled airfoil
+
+        """
+        if self.lower_coords is None or self.upper_coords is None:
+            raise AttributeError("{0} coordinates for station #{1} haven't been read!\n  You need to first read in the coordinates with <Station>.airfoil.read_coords().".format(self.name, self.parent_station.station_num))
+        self.lower_coords = self._resample(self.lower_coords, num_points,
+            self.lower_name)
+        self.upper_coords = self._resample(self.upper_coords, num_points,
+            self.upper_name)
 
     def scale_coords(self, upper_factor, lower_factor):
         """Scale the biplane airfoil coordinates by scale factors.
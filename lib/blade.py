@@ -17,11 +17,16 @@ Last updated: April 14, 2014
 import os
 import shutil
 import datetime
+import hashlib
+import cPickle
+import inspect
 import numpy as np
 import scipy.integrate as ig
 import pandas as pd
 import station as stn
 reload(stn)
+import structure as struc
+import layer as l
 import transformation as tf
 reload(tf)
 import material as mt
@@ -30,9 +35,85 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 import vabs_utils as vu
 reload(vu)
+import text_utils as tu
+reload(tu)
+from shapely import wkb
 from mayavi import mlab
 
 
+# the version of the station cache files; change it when the contents of the
+#   cache files change (see <blade>.save_station_cache())
+cache_format_version = 1
+
+
+def _layer_code_hash():
+    """Returns a hash string of the source code that builds station layers.
+
+    The cached layers of a station are only reused if this code has not
+    changed since they were saved (see <blade>.station_hash()).
+
+    """
+    h = hashlib.md5()
+    for module in [stn.airf, stn, struc, l, mt]:
+        f = open(inspect.getsourcefile(module), 'rb')
+        h.update(f.read())
+        f.close()
+    return h.hexdigest()
+
+
+def cumulative_integral(x, y, method='trapz'):
+    """Returns the cumulative integral of y(x), starting from zero at x[0].
+
+    All columns of y are integrated in one vectorized call.
+
+    Parameters
+    ----------
+    x : numpy array, shape (n,), strictly increasing coordinates
+    y : numpy array, shape (n,) or (n,m), the integrand at each coordinate
+    method : str, 'trapz' (piecewise-linear integrand, same as
+        scipy.integrate.trapz) or 'simpson' (piecewise-quadratic integrand:
+        each interval is integrated with the parabola through its two ends
+        and the next station, or the previous station for the last interval)
+
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    dx = np.diff(x)
+    if np.any(dx <= 0):
+        raise ValueError("Coordinates must be strictly increasing.")
+    if method == 'trapz' or len(x) < 3:
+        w0 = dx/2.0
+        w1 = dx/2.0
+        w2 = np.zeros_like(dx)
+        i0 = np.arange(len(dx))
+        i1 = i0 + 1
+        i2 = i0 + 1
+    elif method == 'simpson':
+        # nodes of the parabola for each interval
+        i0 = np.arange(len(dx))
+        i0[-1] -= 1
+        i1 = i0 + 1
+        i2 = i0 + 2
+        # integrate the Lagrange basis polynomials over each interval
+        a = x[:-1]
+        h = dx
+        (t0, t1, t2) = (x[i0]-a, x[i1]-a, x[i2]-a)
+        def basis_integral(tj, tm, tn):
+            return ((h**3/3.0 - (tm+tn)*h**2/2.0 + tm*tn*h) /
+                ((tj-tm)*(tj-tn)))
+        w0 = basis_integral(t0, t1, t2)
+        w1 = basis_integral(t1, t0, t2)
+        w2 = basis_integral(t2, t0, t1)
+    else:
+        raise ValueError("Keyword `method` must be 'trapz' or 'simpson'.")
+    if y.ndim == 2:
+        (w0, w1, w2) = (w0[:,np.newaxis], w1[:,np.newaxis], w2[:,np.newaxis])
+    intervals = w0*y[i0] + w1*y[i1] + w2*y[i2]
+    c = np.zeros_like(y)
+    c[1:] = np.cumsum(intervals, axis=0)
+    return c
+
+
 class _Blade:
     """Define a wind turbine blade.
 
@@ -50,7 +131,8 @@ class _Blade:
     """
     logfile_name = 'blade.log'
     def __init__(self, name, blade_path, defn_filename='blade_definition.csv',
-        airfoils_path='airfoils', matl_filename='materials.csv'):
+        airfoils_path='airfoils', matl_filename='materials.csv',
+        num_airfoil_points=None):
         """Create a new wind turbine blade.
 
         Parameters
@@ -60,6 +142,9 @@ class _Blade:
 
         defn_filename : str (for CSV file), the blade definition filename
         airfoils_path : str, local directory that contains airfoil coordinates
+        num_airfoil_points : int, if not None, resample each airfoil to this
+            many points with cosine spacing (fewer points make faster, coarser
+            layer polygons)
 
         Attributes
         ----------
@@ -68,6 +153,8 @@ class _Blade:
         .defn_filename : str, (for CSV file), the blade definition filename
         .list_of_stations : list, contains all the Stations of this blade
         .name : str, the name of this blade
+        .num_airfoil_points : int or None, number of points in each resampled
+            airfoil (None if the airfoil files are used as-is)
         .number_of_stations : int, the total number of stations in this blade
         .logfile_name : 'blade.log', the log file for this blade
 
@@ -77,13 +164,21 @@ class _Blade:
             airfoils_path into this station_path
         .copy_all_airfoil_coords() : copy all airfoil coordinates from
             airfoils_path into each station_path
+        .create_all_layers() : create the layers in each station (optionally
+            loading unchanged stations from the cache)
         .create_all_stations() : create all stations for this blade
         .create_plot() : create a plot for this blade
+        .calculate_mass_distribution() : DataFrame, cumulative spanwise mass
+            and mass moments of this blade
         .create_station(station_num) : create a new station for this blade
         .get_LE_coords() : list, returns (x,y,z) coords for the blade LE
         .get_SW_cross_section_coords(sw_num) : list, returns (x,y,z) coords for
             shear web 1, 2, or 3
         .get_TE_coords() : list, returns (x,y,z) coords for the blade TE
+        .get_all_percent_areas() : DataFrame, percent areas of each station
+        .get_all_percent_masses() : DataFrame, percent masses of each station
+        .get_layer_table() : DataFrame, area and mass of every layer
+        .estimate_root_loads() : dict, gravity and centrifugal root loads
         .import_blade_definition() : import the blade defn from a CSV file
         .plot_LE(lw) : plots the leading edge from root to tip
         .plot_TE(lw) : plots the trailing edge from root to tip
@@ -95,6 +190,8 @@ class _Blade:
         .plot_pitch_axis(lw) : plots the pitch axis from root to tip
         .plot_twist_schedule() : plot the twist vs. span
         .show_plot() : pick a nice view and show the plot
+        .writecsv_estimated_mass_and_stiffness_props() : write mass and
+            stiffness props estimated from the layer polygons to a CSV file
 
         Usage
         -----
@@ -104,6 +201,7 @@ class _Blade:
 
         """
         self.name = name
+        self.num_airfoil_points = num_airfoil_points
         self.logf = open(_Blade.logfile_name, "a")
         self.logf.write("[{0}] Created blade: {1}\n".format(datetime.datetime.now(), self.name))
         if not os.path.exists(blade_path):
@@ -123,7 +221,8 @@ class _Blade:
                 self.copy_all_airfoil_coords()
                 # pre-process the airfoil coordinates and laminate schedule
                 for station in self.list_of_stations:
-                    station.airfoil.read_coords()
+                    station.airfoil.read_coords(
+                        num_points=self.num_airfoil_points)
                     station.airfoil.scale_and_translate_coords()
                     station.airfoil.split_at_LE_and_TE()
                     station.find_part_edges()
@@ -389,6 +488,181 @@ class _Blade:
             fname = os.path.join(self.blade_path, 'selected_cross-sections.png')
             fig.savefig(fname)
 
+    def station_hash(self, station):
+        """Returns a hash string of all the inputs used to build this station.
+
+        The hash covers the station's row in the blade definition file, the
+        contents of its airfoil file(s), the contents of the material
+        properties file, the number of resampled airfoil points, the cache
+        format version, and the source code of the modules that build the
+        layers (airfoil.py, station.py, structure.py, layer.py, and
+        material.py), so layers saved by older code are never loaded.
+
+        """
+        h = hashlib.md5()
+        h.update(repr(cache_format_version))
+        h.update(_layer_code_hash())
+        h.update(repr(list(self._df.ix[station.station_num].iteritems())))
+        h.update(repr(self.num_airfoil_points))
+        if station.type == 'monoplane':
+            airfoil_paths = [station.airfoil.path]
+        else:
+            airfoil_paths = [station.airfoil.lower_path,
+                             station.airfoil.upper_path]
+        for path in airfoil_paths + [self.matl_filename]:
+            f = open(path, 'rb')
+            h.update(f.read())
+            f.close()
+        return h.hexdigest()
+
+    def save_station_cache(self, station, station_hash, cache_path='cache'):
+        """Save the layer polygons and part edges of this station to disk.
+
+        Writes the file 'stnXX_<station_hash>.pkl' to the cache path inside
+        the blade path. The hash in the filename lets several variants of a
+        blade share one cache path (see sweep.py).
+        Must run <station>.structure.create_all_layers() first.
+
+        """
+        st = station.structure
+        cache_dir = os.path.join(self.blade_path, cache_path)
+        if not os.path.exists(cache_dir):
+            os.mkdir(cache_dir)
+        # find the attribute name of each part and each material
+        part_names = {}
+        edges = {}
+        for (name, obj) in st.__dict__.items():
+            if isinstance(obj, struc.Part):
+                part_names[id(obj)] = name
+                edges[name] = (obj.left, obj.right)
+        material_names = {}
+        for (name, m) in self.dict_of_materials.items():
+            material_names[id(m)] = name
+        layers = []
+        for list_name in ['_list_of_layers', '_list_of_lower_layers',
+                          '_list_of_upper_layers']:
+            for layer in getattr(st, list_name, []):
+                layers.append((list_name, part_names[id(layer.parent_part)],
+                    layer.name, layer.polygon.wkb,
+                    material_names[id(layer.material)], layer.face_color,
+                    layer.edge_color))
+        d = {'hash': station_hash,
+             'layers': layers,
+             'edges': edges,
+             'area': st.calculate_area(),
+             'mass': st.calculate_mass()}
+        fname = os.path.join(cache_dir, 'stn{0:02d}_{1}.pkl'.format(
+            station.station_num, station_hash))
+        # write to a temporary file first, so other processes sharing this
+        # cache path never load a partially written file
+        tmp_fname = '{0}.{1}.tmp'.format(fname, os.getpid())
+        f = open(tmp_fname, 'wb')
+        cPickle.dump(d, f, protocol=2)
+        f.close()
+        try:
+            os.rename(tmp_fname, fname)
+        except OSError:
+            # another process already saved this file (Windows won't rename
+            # over an existing file)
+            os.remove(tmp_fname)
+
+    def load_station_cache(self, station, station_hash, cache_path='cache'):
+        """Load the layer polygons and part edges of this station from disk.
+
+        Returns True if the cache file exists and matches station_hash,
+        False otherwise (nothing is loaded). A cache file that can't be read
+        (e.g. a partly written file, or a file saved by older code) is treated
+        the same as a missing file.
+
+        """
+        st = station.structure
+        fname = os.path.join(self.blade_path, cache_path,
+            'stn{0:02d}_{1}.pkl'.format(station.station_num, station_hash))
+        if not os.path.exists(fname):
+            return False
+        f = open(fname, 'rb')
+        try:
+            d = cPickle.load(f)
+            if d['hash'] != station_hash:
+                return False
+            # find every part and material before changing the structure, so
+            #   nothing is loaded from a cache file that doesn't match it
+            edges = [(getattr(st, name), left, right)
+                for (name, (left, right)) in d['edges'].items()]
+            layers = [(getattr(st, part_name), list_name, layer_name,
+                wkb.loads(polygon), self.dict_of_materials[material_name],
+                face_color, edge_color)
+                for (list_name, part_name, layer_name, polygon, material_name,
+                    face_color, edge_color) in d['layers']]
+            lists = dict([(layer[1], getattr(st, layer[1]))
+                for layer in layers])
+            (area, mass) = (d['area'], d['mass'])
+        except (cPickle.UnpicklingError, EOFError, AttributeError, KeyError,
+            ImportError, TypeError, ValueError):
+            return False
+        finally:
+            f.close()
+        for (part, left, right) in edges:
+            (part.left, part.right) = (left, right)
+        for (part, list_name, layer_name, polygon, material, face_color,
+            edge_color) in layers:
+            part.layer[layer_name] = l.Layer(polygon, material,
+                parent_part=part, name=layer_name, face_color=face_color,
+                edge_color=edge_color)
+            lists[list_name].append(part.layer[layer_name])
+        st.area = area
+        st.mass = mass
+        # let <structure>.update_all_layers() detect later changes
+        for graph_name in ['_graph', '_lower_graph', '_upper_graph']:
+            if hasattr(st, graph_name):
+                getattr(st, graph_name).record_inputs()
+        return True
+
+    def create_all_layers(self, cache_flag=False, cache_path='cache'):
+        """Create the airfoil polygons and all layers in each station.
+
+        If cache_flag is True, the layers of each station are loaded from the
+        cache path (inside the blade path) when the station's inputs (and the
+        code that builds the layers) have not changed since they were saved.
+        Otherwise, the layers are created from scratch and saved to the cache
+        path. By default, the cache is not used.
+
+        Parameters
+        ----------
+        cache_flag : bool, do/don't load and save layers in the cache path
+            (default=False)
+        cache_path : str, local directory inside the blade path for storing
+            the cached layers of each station
+
+        Usage
+        -----
+        m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+        m.create_all_layers(cache_flag=True)
+        # ... edit one row of 'sandia_blade/blade_definition.csv' ...
+        m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+        m.create_all_layers(cache_flag=True)  # only the edited station is
+                                              #   rebuilt
+
+        """
+        num_loaded = 0
+        for station in self.list_of_stations:
+            station.airfoil.create_polygon()
+            if cache_flag:
+                h = self.station_hash(station)
+                if self.load_station_cache(station, h, cache_path):
+                    num_loaded += 1
+                    continue
+            station.structure.create_all_layers()
+            if cache_flag:
+                self.save_station_cache(station, h, cache_path)
+        if cache_flag:
+            print " Loaded {0} of {1} stations from the cache.".format(
+                num_loaded, len(self.list_of_stations))
+            self.logf = open(_Blade.logfile_name, "a")
+            self.logf.write("[{0}] Loaded {1} of {2} stations from the cache\n".format(datetime.datetime.now(), num_loaded, len(self.list_of_stations)))
+            self.logf.flush()
+            self.logf.close()
+
     def calculate_all_areas(self):
         """Calculate the areas of all structural parts in each station of this blade."""
         for station in self.list_of_stations:
@@ -424,161 +698,344 @@ class _Blade:
                 self.name, int(round(self.mass)))
         return m
 
-    def get_all_percent_areas(self, save_csv=True):
-        """Returns a pandas.DataFrame of percent areas for each part and station.
+    def calculate_mass_distribution(self, method='trapz', airfoil=None,
+        save_csv=True, distribution_filename='mass_distribution.csv'):
+        """Integrate the spanwise mass distribution of this blade.
+
+        The mass per unit length and the mass center of each station are
+        estimated from the layer polygons (see <station>.structure.
+        estimate_mass_and_stiffness()). Then, the mass and the first and
+        second mass moments about the root are integrated from the root to
+        each station.
+
+        Returns a pandas.DataFrame, with one row per station:
+            'x1' : spanwise coord of the station
+            'mass per unit length' : sectional mass
+            'mass center, x2' : chordwise coord of the sectional mass center
+            'mass center, x3' : flapwise coord of the sectional mass center
+            'cumulative mass' : mass between the root and this station
+            'cumulative first mass moment' : int(mu*(x1-x1_root) dx1) between
+                the root and this station
+            'cumulative second mass moment' : int(mu*(x1-x1_root)^2 dx1)
+                between the root and this station
+            'center of gravity, x1' : spanwise coord of the center of gravity
+                of the mass between the root and this station
 
         Parameters
         ----------
-        save_csv : bool (default: True), save the DataFrame as a CSV file
+        method : str, 'trapz' or 'simpson' (see blade.cumulative_integral())
+        airfoil : str, 'lower' or 'upper' to integrate only one element of a
+            biplane blade, over its biplane stations; the root is the first
+            biplane station (default=None, integrate the whole blade)
+        save_csv : bool, save the table to a CSV file in the blade path
+        distribution_filename : str, the CSV file name; for a single biplane
+            element, the airfoil is added, e.g. 'mass_distribution_lower.csv'
+
+        """
+        if airfoil is None:
+            stations = self.list_of_stations
+        else:
+            stations = [s for s in self.list_of_stations if s.type == 'biplane']
+            if len(stations) == 0:
+                raise ValueError("Keyword `airfoil` can only be used with biplane stations.")
+        mu = np.zeros(len(stations))
+        cm = np.zeros((len(stations),2))
+        for (i, station) in enumerate(stations):
+            if airfoil is None:
+                d = station.structure.estimate_mass_and_stiffness()
+            else:
+                d = station.structure.estimate_mass_and_stiffness(
+                    airfoil=airfoil)
+            mu[i] = d['M_11, mu_mass']
+            cm[i] = (d['mass center, x2'], d['mass center, x3'])
+        station_nums = [station.station_num for station in stations]
+        x1 = np.array([self._df['x1'][n] for n in station_nums])
+        r = x1 - x1[0]
+        integrand = mu[:,np.newaxis] * r[:,np.newaxis]**np.arange(3)
+        c = cumulative_integral(x1, integrand, method=method)
+        cg = np.ones_like(x1)*x1[0]
+        cg[1:] += c[1:,1]/c[1:,0]
+        md = pd.DataFrame({'x1': x1,
+                           'mass per unit length': mu,
+                           'mass center, x2': cm[:,0],
+                           'mass center, x3': cm[:,1],
+                           'cumulative mass': c[:,0],
+                           'cumulative first mass moment': c[:,1],
+                           'cumulative second mass moment': c[:,2],
+                           'center of gravity, x1': cg},
+                          index=station_nums)
+        cols = ['x1',
+                'mass per unit length',
+                'mass center, x2',
+                'mass center, x3',
+                'cumulative mass',
+                'cumulative first mass moment',
+                'cumulative second mass moment',
+                'center of gravity, x1']
+        md = md[cols]
+        if airfoil is None:
+            self.mass_distribution = md
+        if save_csv:
+            if airfoil is not None:
+                (base, ext) = os.path.splitext(distribution_filename)
+                distribution_filename = '{0}_{1}{2}'.format(base, airfoil, ext)
+            md.to_csv(os.path.join(self.blade_path, distribution_filename),
+                index_label='blade station')
+        return md
+
+    def estimate_root_loads(self, rotor_speed=0.0, hub_radius=0.0,
+        gravity=9.81, method='trapz', airfoil=None):
+        """Estimate the root loads from the mass distribution of this blade.
+
+        This is a quick check of the gravity and centrifugal loads, without
+        running DYMORE. The blade is horizontal (so gravity acts in the
+        edgewise or flapwise direction, depending on the pitch), and the
+        rotor spins at a constant speed.
+
+        Returns a dictionary:
+            'mass' : mass of the blade, in kg
+            'center of gravity, x1' : spanwise coord of the center of
+                gravity, in m
+            'root shear force, gravity' : in N
+            'root bending moment, gravity' : in N*m
+            'root axial force, centrifugal' : in N
+            'mass moment of inertia, rotor axis' : in kg*m^2
+
+        Parameters
+        ----------
+        rotor_speed : float, rotor speed, in rad/s
+        hub_radius : float, distance from the rotor axis to the blade root
+            (x1 = 0), in m
+        gravity : float, acceleration due to gravity, in m/s^2
+        method : str, 'trapz' or 'simpson' (see blade.cumulative_integral())
+        airfoil : str, 'lower' or 'upper' to estimate the loads at the inboard
+            end of one element of a biplane blade (default=None, whole blade)
+
+        """
+        md = self.calculate_mass_distribution(method=method, airfoil=airfoil,
+            save_csv=False)
+        m = md['cumulative mass'].values[-1]
+        S = md['cumulative first mass moment'].values[-1]
+        I = md['cumulative second mass moment'].values[-1]
+        # distance from the rotor axis to the inboard end
+        a = hub_radius + md['x1'].values[0]
+        return {'mass' : m,
+                'center of gravity, x1' : md['center of gravity, x1'].values[-1],
+                'root shear force, gravity' : gravity*m,
+                'root bending moment, gravity' : gravity*S,
+                'root axial force, centrifugal' : rotor_speed**2*(a*m + S),
+                'mass moment of inertia, rotor axis' : I + 2*a*S + a**2*m}
+
+    def estimate_torsional_stiffness(self, station):
+        """Returns a dict of the thin-walled K_44 and shear center of a station.
+
+        Creates the airfoil polygon(s) of the station first, if needed.
+
+        """
+        af = station.airfoil
+        if getattr(af, 'polygon', None) is None and getattr(af,
+            'lower_polygon', None) is None:
+            af.create_polygon()
+        return station.structure.estimate_torsional_stiffness()
+
+    def _thin_wall_props(self, station):
+        """Returns the thin-walled K_44 and shear center of a station, or NaN.
+
+        If the station can't be idealized as thin walls (e.g. a shear web
+        doesn't meet the skin twice), K_44 is NaN and the error is logged, so
+        one station doesn't stop a CSV file of all the stations from being
+        written.
+
+        """
+        try:
+            return self.estimate_torsional_stiffness(station)
+        except ValueError as e:
+            print " Station #{0}: no thin-walled estimate ({1})".format(
+                station.station_num, e)
+            self.logf = open(_Blade.logfile_name, "a")
+            self.logf.write("[{0}] Station #{1}: no thin-walled estimate ({2})\n".format(datetime.datetime.now(), station.station_num, e))
+            self.logf.flush()
+            self.logf.close()
+            return {'K_44, GJ_twist' : np.nan}
+
+    def shear_center_cols(self):
+        """Returns a list of the shear center column names for CSV files."""
+        return ['shear center, x2',
+                'shear center, x3',
+                'shear center, x2 (lower)',
+                'shear center, x3 (lower)',
+                'shear center, x2 (upper)',
+                'shear center, x3 (upper)']
+
+    def writecsv_estimated_mass_and_stiffness_props(self,
+        props_filename='blade_props_estimated.csv'):
+        """Write estimated mass and stiffness properties of all stations to CSV.
+
+        The properties are integrated directly from the layer polygons (see
+        <station>.structure.estimate_mass_and_stiffness()), and K_44 and the
+        shear center come from thin-walled theory (see
+        <station>.structure.estimate_torsional_stiffness()), so no meshing or
+        VABS runs are needed. The columns match 'blade_props_from_VABS.csv'.
+        K_44 is NaN for stations that can't be idealized as thin walls. See
+        thin_wall.py for the accuracy of K_44.
+
+        Returns a pandas.DataFrame of the estimated properties.
 
         """
-        self.calculate_all_areas()
         list_of_dicts = []
         for station in self.list_of_stations:
-            d = station.structure.calculate_all_percent_areas()
+            span_coord = self._df['x1'][station.station_num]
+            span_frac = span_coord/self._df['x1'][self.number_of_stations]
+            d = station.structure.estimate_mass_and_stiffness()
+            d.update(self._thin_wall_props(station))
+            d['Blade Spanwise Coordinate'] = span_coord
+            d['Blade Span Fraction'] = span_frac
             list_of_dicts.append(d)
-        pa = pd.DataFrame(list_of_dicts, index=range(1,self.number_of_stations+1))
-        pa = pa.fillna(0)  # set all NaNs to zeros
-        # condense the number of columns down
-        # -- spar caps --
-        pa['spar caps'] = pa['spar cap (lower)'] + pa['spar cap (upper)']
-        pa.pop('spar cap (lower)')
-        pa.pop('spar cap (upper)')
-        # -- aft panels --
-        pa['aft panels'] = (pa['aft panel 1 (lower)'] + pa['aft panel 1 (upper)'] +
-                            pa['aft panel 2 (lower)'] + pa['aft panel 2 (upper)'])
-        pa.pop('aft panel 1 (lower)')
-        pa.pop('aft panel 1 (upper)')
-        pa.pop('aft panel 2 (lower)')
-        pa.pop('aft panel 2 (upper)')
-        # -- shear webs (biax) --
-        pa['shear webs (biax)'] = (
-            pa['shear web 1 (left biax)'] + pa['shear web 1 (right biax)'] + 
-            pa['shear web 2 (left biax)'] + pa['shear web 2 (right biax)'] + 
-            pa['shear web 3 (left biax)'] + pa['shear web 3 (right biax)'])
-        pa.pop('shear web 1 (left biax)')
-        pa.pop('shear web 1 (right biax)')
-        pa.pop('shear web 2 (left biax)')
-        pa.pop('shear web 2 (right biax)')
-        pa.pop('shear web 3 (left biax)')
-        pa.pop('shear web 3 (right biax)')
-        # -- shear webs (foam) --
-        pa['shear webs (foam)'] = (pa['shear web 1 (foam)'] + 
-            pa['shear web 2 (foam)'] + pa['shear web 3 (foam)'])
-        pa.pop('shear web 1 (foam)')
-        pa.pop('shear web 2 (foam)')
-        pa.pop('shear web 3 (foam)')
-        # -- internal surface (triax) --
-        pa['internal surfaces (triax)'] = (pa['internal surface 1 (triax)'] + 
-            pa['internal surface 2 (triax)'] + pa['internal surface 3 (triax)'] +
-            pa['internal surface 4 (triax)'])
-        pa.pop('internal surface 1 (triax)')
-        pa.pop('internal surface 2 (triax)')
-        pa.pop('internal surface 3 (triax)')
-        pa.pop('internal surface 4 (triax)')
-        # -- internal surface (resin) --
-        pa['internal surfaces (resin)'] = (pa['internal surface 1 (resin)'] + 
-            pa['internal surface 2 (resin)'] + pa['internal surface 3 (resin)'] +
-            pa['internal surface 4 (resin)'])
-        pa.pop('internal surface 1 (resin)')
-        pa.pop('internal surface 2 (resin)')
-        pa.pop('internal surface 3 (resin)')
-        pa.pop('internal surface 4 (resin)')
+        self.mk_est = pd.DataFrame(list_of_dicts,
+            index=range(1,len(list_of_dicts)+1))
+        csvpath = os.path.join(self.blade_path, props_filename)
+        cols = ['Blade Span Fraction',
+                'Blade Spanwise Coordinate',
+                'K_55, EI_flap',
+                'K_66, EI_edge',
+                'K_44, GJ_twist',
+                'K_11, EA_axial',
+                'M_11, mu_mass',
+                'M_55, i22_flap',
+                'M_66, i33_edge'] + self.shear_center_cols()
+        self.mk_est.to_csv(csvpath, index_label='Blade Station Number',
+            cols=[c for c in cols if c in self.mk_est.columns])
+        return self.mk_est
+
+    def get_layer_table(self, save_csv=True):
+        """Returns a long-format pandas.DataFrame of every layer in the blade.
+
+        Each row is one layer, with the columns 'blade station', 'airfoil',
+        'part', 'sub-part', 'material', 'area', and 'mass' (per unit length).
+        See <station>.structure.layer_table().
+
+        Parameters
+        ----------
+        save_csv : bool (default: True), save the DataFrame as a CSV file
+
+        """
+        tables = []
+        for station in self.list_of_stations:
+            t = station.structure.layer_table()
+            t.insert(0, 'blade station', station.station_num)
+            tables.append(t)
+        lt = pd.concat(tables, ignore_index=True)
+        if save_csv:
+            lt_path = os.path.join(self.blade_path, 'layer_table.csv')
+            lt.to_csv(lt_path, index=False)
+        return lt
+
+    def percent_view(self, lt, value, split_airfoils=False):
+        """Returns a pandas.DataFrame of percent areas or masses.
+
+        Each row is a blade station, and each column is a group of similar
+        parts (e.g. 'spar caps', 'shear webs (biax)').
+
+        Parameters
+        ----------
+        lt : pandas.DataFrame, the layer table from get_layer_table()
+        value : str, 'area' or 'mass'
+        split_airfoils : bool (default: False), report the lower and upper
+            airfoils of biplane stations in separate columns, e.g.
+            'spar caps (lower airfoil)' and 'shear webs (foam, upper airfoil)'
+
+        """
+        groups = {}
+        for (part, sub_part) in set(zip(lt['part'], lt['sub-part'])):
+            if part in ['root buildup', 'LE panel']:
+                group = part
+            elif part == 'spar cap':
+                group = 'spar caps'
+            elif part.startswith('aft panel'):
+                group = 'aft panels'
+            elif part.startswith('shear web'):
+                group = 'shear webs ({0})'.format(sub_part.split(',')[0])
+            elif part.startswith('internal surface'):
+                group = 'internal surfaces ({0})'.format(sub_part)
+            else:
+                group = '{0} ({1})'.format(part, sub_part)
+            groups[(part, sub_part)] = group
+        def split_label(g, airfoil):
+            """Add the airfoil to a group label, e.g. 'spar caps (lower airfoil)'."""
+            if g.endswith(')'):
+                return '{0}, {1} airfoil)'.format(g[:-1], airfoil)
+            else:
+                return '{0} ({1} airfoil)'.format(g, airfoil)
+        group = [groups[k] for k in zip(lt['part'], lt['sub-part'])]
+        if split_airfoils:
+            group = [g if a == 'monoplane' else split_label(g, a)
+                for (g, a) in zip(group, lt['airfoil'])]
+        lt = lt.copy()
+        lt['group'] = group
+        totals = lt.groupby('blade station')[value].sum()
+        pv = lt.groupby(['blade station', 'group'])[value].sum().unstack()
+        pv = pv.div(totals, axis=0)
+        # put the columns in order, and fill in groups that don't exist
+        cols = []
+        for g in ['external surface (gelcoat)',
+                  'external surface (triax)',
+                  'root buildup',  # (triax)
+                  'spar caps',  # (uniax)
+                  'aft panels',  # (foam)
+                  'LE panel',  # (foam)
+                  'shear webs (biax)',
+                  'shear webs (foam)',
+                  'TE reinforcement (uniax)',
+                  'TE reinforcement (foam)',
+                  'internal surfaces (triax)',
+                  'internal surfaces (resin)']:
+            if split_airfoils:
+                cols += [g, split_label(g, 'lower'), split_label(g, 'upper')]
+            else:
+                cols.append(g)
+        if not split_airfoils:
+            pv = pv.reindex(columns=cols)
+        else:
+            pv = pv.reindex(columns=[c for c in cols if c in pv.columns])
+        pv = pv.reindex(range(1,self.number_of_stations+1))
+        pv = pv.fillna(0)  # set all NaNs to zeros
+        return pv
+
+    def get_all_percent_areas(self, save_csv=True, split_airfoils=False):
+        """Returns a pandas.DataFrame of percent areas for each part and station.
+
+        Parameters
+        ----------
+        save_csv : bool (default: True), save the DataFrame as a CSV file
+        split_airfoils : bool (default: False), report the lower and upper
+            airfoils of biplane stations in separate columns
+
+        """
+        pa = self.percent_view(self.get_layer_table(save_csv=False), 'area',
+            split_airfoils)
         if save_csv:
             # save the data to a CSV file
             pa_path = os.path.join(self.blade_path, 'percent_areas.csv')
-            pa.to_csv(pa_path, index_label='blade station', cols=[
-                'external surface (gelcoat)',
-                'external surface (triax)',
-                'root buildup',  # (triax)
-                'spar caps',  # (uniax)
-                'aft panels',  # (foam)
-                'LE panel',  # (foam)
-                'shear webs (biax)',
-                'shear webs (foam)',
-                'TE reinforcement (uniax)',
-                'TE reinforcement (foam)',
-                'internal surfaces (triax)',
-                'internal surfaces (resin)'])
+            pa.to_csv(pa_path, index_label='blade station')
         return pa
 
-    def get_all_percent_masses(self, save_csv=True):
+    def get_all_percent_masses(self, save_csv=True, split_airfoils=False):
         """Returns a pandas.DataFrame of percent masses for each part and station.
 
         Parameters
         ----------
         save_csv : bool (default: True), save the DataFrame as a CSV file
+        split_airfoils : bool (default: False), report the lower and upper
+            airfoils of biplane stations in separate columns
 
         """
-        self.calculate_all_masses()
-        list_of_dicts = []
-        for station in self.list_of_stations:
-            d = station.structure.calculate_all_percent_masses()
-            list_of_dicts.append(d)
-        pa = pd.DataFrame(list_of_dicts, index=range(1,self.number_of_stations+1))
-        pa = pa.fillna(0)  # set all NaNs to zeros
-        # condense the number of columns down
-        # -- spar caps --
-        pa['spar caps'] = pa['spar cap (lower)'] + pa['spar cap (upper)']
-        pa.pop('spar cap (lower)')
-        pa.pop('spar cap (upper)')
-        # -- aft panels --
-        pa['aft panels'] = (pa['aft panel 1 (lower)'] + pa['aft panel 1 (upper)'] +
-                            pa['aft panel 2 (lower)'] + pa['aft panel 2 (upper)'])
-        pa.pop('aft panel 1 (lower)')
-        pa.pop('aft panel 1 (upper)')
-        pa.pop('aft panel 2 (lower)')
-        pa.pop('aft panel 2 (upper)')
-        # -- shear webs (biax) --
-        pa['shear webs (biax)'] = (
-            pa['shear web 1 (left biax)'] + pa['shear web 1 (right biax)'] + 
-            pa['shear web 2 (left biax)'] + pa['shear web 2 (right biax)'] + 
-            pa['shear web 3 (left biax)'] + pa['shear web 3 (right biax)'])
-        pa.pop('shear web 1 (left biax)')
-        pa.pop('shear web 1 (right biax)')
-        pa.pop('shear web 2 (left biax)')
-        pa.pop('shear web 2 (right biax)')
-        pa.pop('shear web 3 (left biax)')
-        pa.pop('shear web 3 (right biax)')
-        # -- shear webs (foam) --
-        pa['shear webs (foam)'] = (pa['shear web 1 (foam)'] + 
-            pa['shear web 2 (foam)'] + pa['shear web 3 (foam)'])
-        pa.pop('shear web 1 (foam)')
-        pa.pop('shear web 2 (foam)')
-        pa.pop('shear web 3 (foam)')
-        # -- internal surface (triax) --
-        pa['internal surfaces (triax)'] = (pa['internal surface 1 (triax)'] + 
-            pa['internal surface 2 (triax)'] + pa['internal surface 3 (triax)'] +
-            pa['internal surface 4 (triax)'])
-        pa.pop('internal surface 1 (triax)')
-        pa.pop('internal surface 2 (triax)')
-        pa.pop('internal surface 3 (triax)')
-        pa.pop('internal surface 4 (triax)')
-        # -- internal surface (resin) --
-        pa['internal surfaces (resin)'] = (pa['internal surface 1 (resin)'] + 
-            pa['internal surface 2 (resin)'] + pa['internal surface 3 (resin)'] +
-            pa['internal surface 4 (resin)'])
-        pa.pop('internal surface 1 (resin)')
-        pa.pop('internal surface 2 (resin)')
-        pa.pop('internal surface 3 (resin)')
-        pa.pop('internal surface 4 (resin)')
+        pm = self.percent_view(self.get_layer_table(save_csv=False), 'mass',
+            split_airfoils)
         if save_csv:
             # save the data to a CSV file
-            pa_path = os.path.join(self.blade_path, 'percent_masses.csv')
-            pa.to_csv(pa_path, index_label='blade station', cols=[
-                'external surface (gelcoat)',
-                'external surface (triax)',
-                'root buildup',  # (triax)
-                'spar caps',  # (uniax)
-                'aft panels',  # (foam)
-                'LE panel',  # (foam)
-                'shear webs (biax)',
-                'shear webs (foam)',
-                'TE reinforcement (uniax)',
-                'TE reinforcement (foam)',
-                'internal surfaces (triax)',
-                'internal surfaces (resin)'])
-        return pa
+            pm_path = os.path.join(self.blade_path, 'percent_masses.csv')
+            pm.to_csv(pm_path, index_label='blade station')
+        return pm
 
     def plot_percent_areas(self):
         """Plot the percent areas as a 100% stacked bar plot.
@@ -843,8 +1300,7 @@ class MonoplaneBlade(_Blade):
                 filename = os.path.join(station.station_path,
                     'stn{0:02d}_coords.txt'.format(station.station_num))
                 f = open(filename, 'w')
-                for i in range(l):
-                    f.write('{0:12.9f}\t{1:12.9f}\t{2:12.9f}\n'.format(x[i],y[i],z[i]))
+                f.write(tu.format_block(np.column_stack((x,y,z)), tu.xyz_fmt))
                 f.close()
                 print ' Wrote airfoil coordinates to {0}'.format(filename)
                 self.logf = open(_Blade.logfile_name, "a")
@@ -1154,8 +1610,17 @@ class MonoplaneBlade(_Blade):
 
     def writecsv_mass_and_stiffness_props(self, base_filename='mesh_stn',
         ext='.vabs.K', props_filename='blade_props_from_VABS.csv',
-        debug_flag=False):
-        """Write mass and stiffness properties of all stations to CSV file."""
+        debug_flag=False, thin_wall_flag=False):
+        """Write mass and stiffness properties of all stations to CSV file.
+
+        If thin_wall_flag is True, the thin-walled K_44 and shear center of
+        each station (see <station>.structure.estimate_torsional_stiffness()
+        and thin_wall.py for its accuracy) are written next to the VABS
+        results, as 'K_44, GJ_twist (thin-walled)' and the shear center
+        columns. K_44 is NaN for stations that can't be idealized as thin
+        walls.
+
+        """
         list_of_dicts = []
         for station in self.list_of_stations:
             sn = '{0:02d}'.format(station.station_num)
@@ -1184,28 +1649,36 @@ class MonoplaneBlade(_Blade):
                 d = {'Blade Spanwise Coordinate' : span_coord,
                      'Blade Span Fraction' : span_frac
                     }
+            if thin_wall_flag:
+                # report the thin-walled estimates next to the VABS results
+                est = self._thin_wall_props(station)
+                d['K_44, GJ_twist (thin-walled)'] = est.pop('K_44, GJ_twist')
+                d.update(est)
             list_of_dicts.append(d)
         self.mk = pd.DataFrame(list_of_dicts, index=range(1,len(list_of_dicts)+1))
         csvpath = os.path.join(self.blade_path, props_filename)
-        self.mk.to_csv(csvpath, index_label='Blade Station Number', cols=[
-            'Blade Span Fraction',
-            'Blade Spanwise Coordinate',
-            'K_55, EI_flap',
-            'K_66, EI_edge',
-            'K_44, GJ_twist',
-            'K_11, EA_axial',
-            'M_11, mu_mass',
-            'M_55, i22_flap',
-            'M_66, i33_edge'])
+        cols = ['Blade Span Fraction',
+                'Blade Spanwise Coordinate',
+                'K_55, EI_flap',
+                'K_66, EI_edge',
+                'K_44, GJ_twist',
+                'K_44, GJ_twist (thin-walled)',
+                'K_11, EA_axial',
+                'M_11, mu_mass',
+                'M_55, i22_flap',
+                'M_66, i33_edge'] + self.shear_center_cols()
+        self.mk.to_csv(csvpath, index_label='Blade Station Number',
+            cols=[c for c in cols if c in self.mk.columns])
 
 
 class BiplaneBlade(_Blade):
     """Define a biplane wind turbine blade."""
     def __init__(self, name, blade_path, defn_filename='blade_definition.csv',
-        airfoils_path='airfoils', matl_filename='materials.csv'):
+        airfoils_path='airfoils', matl_filename='materials.csv',
+        num_airfoil_points=None):
         """Create a new biplane wind turbine blade."""
         _Blade.__init__(self, name, blade_path, defn_filename, airfoils_path,
-            matl_filename)
+            matl_filename, num_airfoil_points)
         (self.root_joint_station,
             self.midblade_joint_station) = self.assign_joint_stations()
         print " Root joint found at station #{0}".format(
@@ -1347,8 +1820,7 @@ class BiplaneBlade(_Blade):
                     filename = os.path.join(station.station_path,
                         'stn{0:02d}_coords.txt'.format(station.station_num))
                     f = open(filename, 'w')
-                    for i in range(l):
-                        f.write('{0:12.9f}\t{1:12.9f}\t{2:12.9f}\n'.format(x[i],y[i],z[i]))
+                    f.write(tu.format_block(np.column_stack((x,y,z)), tu.xyz_fmt))
                     f.close()
                     print ' Wrote airfoil coordinates to {0}'.format(filename)
                     self.logf = open(_Blade.logfile_name, "a")
@@ -1372,8 +1844,7 @@ class BiplaneBlade(_Blade):
                     filename = os.path.join(station.station_path,
                         'stn{0:02d}_lower_coords.txt'.format(station.station_num))
                     f = open(filename, 'w')
-                    for i in range(l):
-                        f.write('{0:12.9f}\t{1:12.9f}\t{2:12.9f}\n'.format(x[i],y[i],z[i]))
+                    f.write(tu.format_block(np.column_stack((x,y,z)), tu.xyz_fmt))
                     f.close()
                     print ' Wrote lower airfoil coordinates to {0}'.format(filename)
                     self.logf = open(_Blade.logfile_name, "a")
@@ -1394,8 +1865,7 @@ class BiplaneBlade(_Blade):
                     filename = os.path.join(station.station_path,
                         'stn{0:02d}_upper_coords.txt'.format(station.station_num))
                     f = open(filename, 'w')
-                    for i in range(l):
-                        f.write('{0:12.9f}\t{1:12.9f}\t{2:12.9f}\n'.format(x[i],y[i],z[i]))
+                    f.write(tu.format_block(np.column_stack((x,y,z)), tu.xyz_fmt))
                     f.close()
                     print ' Wrote upper airfoil coordinates to {0}'.format(filename)
                     self.logf = open(_Blade.logfile_name, "a")
@@ -1911,8 +2381,17 @@ class BiplaneBlade(_Blade):
     
     def writecsv_mass_and_stiffness_props(self, base_filename='mesh_stn',
         ext='.vabs.K', props_filename='blade_props_from_VABS.csv',
-        debug_flag=False):
-        """Write mass and stiffness properties of all stations to CSV file."""
+        debug_flag=False, thin_wall_flag=False):
+        """Write mass and stiffness properties of all stations to CSV file.
+
+        If thin_wall_flag is True, the thin-walled K_44 and shear center of
+        each station (see <station>.structure.estimate_torsional_stiffness()
+        and thin_wall.py for its accuracy) are written next to the VABS
+        results, as 'K_44, GJ_twist (thin-walled)' and the shear center
+        columns. K_44 is NaN for stations that can't be idealized as thin
+        walls.
+
+        """
         list_of_dicts = []
         for station in self.list_of_stations:
             sn = '{0:02d}'.format(station.station_num)
@@ -1941,16 +2420,23 @@ class BiplaneBlade(_Blade):
                 d = {'Blade Spanwise Coordinate' : span_coord,
                      'Blade Span Fraction' : span_frac
                     }
+            if thin_wall_flag:
+                # report the thin-walled estimates next to the VABS results
+                est = self._thin_wall_props(station)
+                d['K_44, GJ_twist (thin-walled)'] = est.pop('K_44, GJ_twist')
+                d.update(est)
             list_of_dicts.append(d)
         self.mk = pd.DataFrame(list_of_dicts, index=range(1,len(list_of_dicts)+1))
         csvpath = os.path.join(self.blade_path, props_filename)
-        self.mk.to_csv(csvpath, index_label='Blade Station Number', cols=[
-            'Blade Span Fraction',
-            'Blade Spanwise Coordinate',
-            'K_55, EI_flap',
-            'K_66, EI_edge',
-            'K_44, GJ_twist',
-            'K_11, EA_axial',
-            'M_11, mu_mass',
-            'M_55, i22_flap',
-            'M_66, i33_edge'])
+        cols = ['Blade Span Fraction',
+                'Blade Spanwise Coordinate',
+                'K_55, EI_flap',
+                'K_66, EI_edge',
+                'K_44, GJ_twist',
+                'K_44, GJ_twist (thin-walled)',
+                'K_11, EA_axial',
+                'M_11, mu_mass',
+                'M_55, i22_flap',
+                'M_66, i33_edge'] + self.shear_center_cols()
+        self.mk.to_csv(csvpath, index_label='Blade Station Number',
+            cols=[c for c in cols if c in self.mk.columns])
@@ -0,0 +1,276 @@
+"""Coarsen a quadratic cross-section grid into a linear grid, for quick-look
+VABS runs.
+
+Every station is meshed with quadratic elements (see
+truegrid.write_truegrid_header()), which is the right choice for the final
+cross-section properties. For design iterations, the class CoarseGrid makes a
+much smaller linear grid from the same mesh:
+  * each 8-noded quadrilateral becomes a 4-noded quadrilateral, and each
+    6-noded triangle becomes a 3-noded triangle (the mid-side nodes are
+    dropped)
+  * optionally (merge_patches=True), each 2x2 patch of quadrilaterals is
+    merged into one quadrilateral
+The unused nodes are dropped, and the nodes and elements are renumbered
+1, 2, 3, ... A CoarseGrid can be written to a VABS input file, just like an
+AbaqusGrid.
+
+The coarse grid must not have any hanging nodes, so quadrilaterals are merged
+two at a time, in strips: if two neighboring elements are merged, the elements
+on either side of them must also be merged in pairs, and so on, all the way
+through the thickness of the laminate (across element sets) until the strip
+reaches the edge of the grid. Strips that run into a triangle or an irregular
+node, or that would merge two elements from different element sets, are not
+merged. The first pass merges pairs of elements; the second pass merges pairs
+of the merged elements in the other direction, to make 2x2 patches. Where
+only one pass succeeds, a 2x1 patch is kept.
+
+Usage
+-----
+import lib.abaqus_utils2 as au
+import lib.coarsen as cs
+import lib.vabs_utils as vu
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+# ... assign the layer plane angles of g ...
+c = cs.CoarseGrid(g, merge_patches=True)
+vu.VabsInputFile(vabs_filename='sandia_blade/stn01/mesh_stn01_coarse.vabs',
+    grid=c,
+    material_filename='sandia_blade/materials.csv',
+    layer_filename='sandia_blade/layers.csv')
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+import grid as gr
+reload(gr)
+import mesh_quality as mq
+reload(mq)
+
+
+class CoarseGrid:
+    """A linear grid, coarsened from a quadratic grid.
+
+    Initialization:
+    CoarseGrid(grid, merge_patches=False, print_flag=True)
+      grid - An object with list_of_nodes and list_of_elements attributes
+        (e.g. an abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object).
+        It is not changed.
+      merge_patches - Optional boolean to merge 2x2 patches of quadrilaterals
+        into one quadrilateral.
+      print_flag - Optional boolean to print the number of nodes and elements,
+        before and after.
+
+    Public attributes:
+    fine_grid - The original grid.
+    list_of_nodes - A list of new gr.Node objects, numbered 1, 2, 3, ...
+    list_of_elements - A list of new gr.QuadrilateralLinearElement and
+        gr.TriangularLinearElement objects, numbered 1, 2, 3, ... The element
+        set, layer number, and layer plane angle (theta1) of each element are
+        copied from its first original element.
+    number_of_nodes - An integer for the number of nodes in the grid.
+    number_of_elements - An integer for the number of elements in the grid.
+    original_node_nums - An array of ints, the number of each node in the
+        original grid, i.e. original_node_nums[node_num-1].
+    original_elem_nums - A list of tuples, the numbers of the original
+        elements in each element, i.e. original_elem_nums[elem_num-1].
+
+    """
+    def __init__(self, grid, merge_patches=False, print_flag=True):
+        self.filename = None
+        self.fine_grid = grid
+        self.list_of_nodes = []
+        self.list_of_elements = []
+        self.number_of_nodes = 0
+        self.number_of_elements = 0
+        self.original_node_nums = None
+        self.original_elem_nums = []
+        (self._x, conn) = gr.connectivity_arrays(grid)
+        quad = mq.element_shapes(conn) != 'tri6'
+        quad &= mq.element_shapes(conn) != 'tri3'
+        el_list = grid.list_of_elements
+        self._sets = [(el.element_set, el.layer_num) for el in el_list]
+        # the coarse elements: the original elements in each one, its corner
+        #   node indices (3 or 4), and the sides it may be merged across
+        self._groups = [[i] for i in range(len(el_list))]
+        self._corners = [list(conn[i,:4]) if quad[i] else list(conn[i,:3])
+            for i in range(len(el_list))]
+        self._mergeable_sides = [range(4) if quad[i] else []
+            for i in range(len(el_list))]
+        if merge_patches:
+            for i in range(2):
+                self._merge_pass()
+        self._build_grid()
+        if print_flag:
+            patches = [len(g) for g in self._groups]
+            print ' Coarsened {0} nodes and {1} elements into {2} nodes and {3} elements ({4} 2x2 patches, {5} 2x1 patches)'.format(
+                len(self._x), len(el_list), self.number_of_nodes,
+                self.number_of_elements, patches.count(4), patches.count(2))
+
+    def _neighbors(self):
+        """Returns a dict of the elements on each side, keyed by node pair."""
+        sides = {}
+        for (i, c) in enumerate(self._corners):
+            for k in range(len(c)):
+                key = frozenset((c[k], c[(k+1) % len(c)]))
+                sides.setdefault(key, []).append((i, k))
+        return sides
+
+    def _strip(self, q, d, sides, users, used):
+        """Returns the pairs of elements to merge, along the strip of q.
+
+        Starting with element q and its neighbor across side d, pairs of
+        elements are added on either side of the pair, until the strip
+        reaches the edge of the grid. Returns None if the strip cannot be
+        merged.
+
+        Returns
+        -------
+        pairs : dict, {element: (partner, side)} for both elements of each
+            pair
+
+        """
+        pairs = {}
+        queue = [(q, d)]
+        while len(queue) > 0:
+            (q, d) = queue.pop()
+            if used[q]:
+                return None
+            c = self._corners[q]
+            others = [(i, k) for (i, k) in
+                sides[frozenset((c[d], c[(d+1) % 4]))] if i != q]
+            if len(others) != 1:
+                return None
+            (r, dr) = others[0]
+            if q in pairs or r in pairs:
+                if pairs.get(q) != (r, d) or pairs.get(r) != (q, dr):
+                    return None
+                continue
+            if (used[r] or self._sets[q] != self._sets[r] or
+                d not in self._mergeable_sides[q] or
+                dr not in self._mergeable_sides[r]):
+                return None
+            pairs[q] = (r, d)
+            pairs[r] = (q, dr)
+            # continue the strip past each end of the shared side
+            for (n, dq) in [(c[d], (d-1) % 4), (c[(d+1) % 4], (d+1) % 4)]:
+                if set(users[n]) == set([q, r]):
+                    continue    # the strip has reached the edge of the grid
+                if len(users[n]) != 4:
+                    return None
+                # the element next to q, across its other side at node n
+                cq = self._corners[q]
+                p = [(i, k) for (i, k) in
+                    sides[frozenset((cq[dq], cq[(dq+1) % 4]))] if i != q]
+                if (len(p) != 1 or used[p[0][0]] or
+                    len(self._corners[p[0][0]]) != 4):
+                    return None
+                (p, kp) = p[0]
+                # p must be merged across its other side at node n
+                cp = self._corners[p]
+                if cp[kp] == n:
+                    queue.append((p, (kp-1) % 4))
+                else:
+                    queue.append((p, (kp+1) % 4))
+        return pairs
+
+    def _merge_pass(self):
+        """Merges strips of pairs of quadrilaterals.
+
+        This non-public method is automatically run (twice) when a new
+        CoarseGrid instance is created with merge_patches=True.
+
+        """
+        sides = self._neighbors()
+        users = {}
+        for (i, c) in enumerate(self._corners):
+            for n in c:
+                users.setdefault(n, []).append(i)
+        used = np.zeros(len(self._corners), dtype=bool)
+        for q in range(len(self._corners)):
+            if used[q] or len(self._mergeable_sides[q]) == 0:
+                continue
+            # try to merge across the longer sides first, which gives better
+            #   shaped elements
+            c = self._x[self._corners[q]]
+            lengths = np.hypot(*(np.roll(c, -1, axis=0) - c).T)
+            for d in sorted(self._mergeable_sides[q],
+                key=lambda k: -lengths[k]):
+                pairs = self._strip(q, d, sides, users, used)
+                if pairs is not None:
+                    break
+            if pairs is None:
+                continue
+            for (i, (r, k)) in pairs.items():
+                used[i] = True
+                if i < r:
+                    self._merge_pair(i, k, r, pairs[r][1])
+        # remove the elements that were merged into others
+        keep = [i for i in range(len(self._corners))
+            if len(self._corners[i]) > 0]
+        self._groups = [self._groups[i] for i in keep]
+        self._corners = [self._corners[i] for i in keep]
+        self._mergeable_sides = [self._mergeable_sides[i] for i in keep]
+        self._sets = [self._sets[i] for i in keep]
+
+    def _merge_pair(self, q, d, r, dr):
+        """Merges element r into element q, across side d of q (dr of r)."""
+        cq = self._corners[q]
+        cr = self._corners[r]
+        # the far side of q, then the far side of r (CCW)
+        self._corners[q] = [cq[(d+2) % 4], cq[(d+3) % 4], cr[(dr+2) % 4],
+            cr[(dr+3) % 4]]
+        self._groups[q] = self._groups[q] + self._groups[r]
+        # the next pass may only merge across the doubled sides (1 and 3),
+        #   to make a 2x2 patch
+        self._mergeable_sides[q] = [1, 3]
+        self._corners[r] = []
+        self._mergeable_sides[r] = []
+
+    def _build_grid(self):
+        """Creates the nodes and elements of the coarse grid.
+
+        This non-public method is automatically run when a new CoarseGrid
+        instance is created.
+
+        """
+        el_list = self.fine_grid.list_of_elements
+        fine_node_index = dict([(node.node_num, i) for (i, node) in
+            enumerate(self.fine_grid.list_of_nodes)])
+        # sort the coarse elements by their first original element
+        order = sorted(range(len(self._groups)),
+            key=lambda j: min(self._groups[j]))
+        # keep the nodes that are used, in their original order
+        keep = np.zeros(len(self._x), dtype=bool)
+        for c in self._corners:
+            keep[c] = True
+        new_index = np.cumsum(keep) - 1
+        self.original_node_nums = np.array([node.node_num for (node, k) in
+            zip(self.fine_grid.list_of_nodes, keep) if k])
+        self.list_of_nodes = [gr.Node(i+1, x2, x3)
+            for (i, (x2, x3)) in enumerate(self._x[keep])]
+        self.number_of_nodes = len(self.list_of_nodes)
+        # create the linear elements
+        for (j, g) in enumerate(order):
+            fine = el_list[min(self._groups[g])]
+            c = self._corners[g]
+            # start at node1 of the first original element, if it's a corner
+            n1 = fine_node_index[fine.node1.node_num]
+            if n1 in c:
+                k = c.index(n1)
+                c = c[k:] + c[:k]
+            nodes = [self.list_of_nodes[new_index[n]] for n in c]
+            if len(nodes) == 4:
+                el = gr.QuadrilateralLinearElement(j+1, nodes[0], nodes[1],
+                    nodes[2], nodes[3], fine.layer_num)
+            else:
+                el = gr.TriangularLinearElement(j+1, nodes[0], nodes[1],
+                    nodes[2], fine.layer_num)
+            el.element_set = fine.element_set
+            el.theta1 = fine.theta1
+            self.list_of_elements.append(el)
+            self.original_elem_nums.append(tuple(sorted([el_list[i].elem_num
+                for i in self._groups[g]])))
+        self.number_of_elements = len(self.list_of_elements)
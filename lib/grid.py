@@ -9,34 +9,91 @@ Last modified: April 2, 2014
 import numpy as np
 import matplotlib.pyplot as plt
 from shapely.geometry import Polygon, LineString
-from shapely.geometry.polygon import orient
 from descartes import PolygonPatch
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee, connected_components
+from scipy.spatial import cKDTree
 
 
-class Node:
-    number_of_nodes = 0
+class Node(object):
+    # __slots__ saves memory: a grid has tens of thousands of nodes
+    __slots__ = ('node_num', 'x2', 'x3', 'parent_element', 'is_corner_node')
     def __init__(self, node_num, x2, x3):
-        Node.number_of_nodes += 1
         self.node_num = int(node_num)
         self.x2 = float(x2)
         self.x3 = float(x3)
-        self.coords = (self.x2,self.x3)
         self.parent_element = None
         self.is_corner_node = None
 
+    @property
+    def coords(self):
+        return (self.x2,self.x3)
+
     def __str__(self):
         return "Node #{0}: ({1:10.8f}, {2:10.8f})".format(self.node_num,
             self.x2, self.x3)
 
 
-class _Element:
-    number_of_elements = 0
+class _AbsentNode(Node):
+    """A placeholder for the nodes of an element that are not present.
+
+    Its node_num is 0. Only one instance (absent_node) is created, and it is
+    shared by all elements, so it cannot be changed.
+
+    """
+    __slots__ = ()
+    def __init__(self):
+        for (name, value) in [('node_num', 0), ('x2', 0.0), ('x3', 0.0),
+            ('parent_element', None), ('is_corner_node', None)]:
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The absent node (node_num=0) cannot be changed!")
+
+
+absent_node = _AbsentNode()
+
+
+class _Element(object):
+    __slots__ = ('elem_num', 'element_set', 'theta1', 'layer_num', 'node1',
+        'node2', 'node3', 'node4', 'node5', 'node6', 'node7', 'node8', 'node9',
+        'nodes', '_polygon', '_outer_edge_node0', '_outer_edge_node1',
+        '_inner_edge_node0', '_inner_edge_node1')
+    # names of the nodes around the boundary of the element, in order
+    _boundary = ()
     def __init__(self, elem_num, layer_num):
-        _Element.number_of_elements += 1
         self.elem_num = int(elem_num)
         self.element_set = None
         self.theta1 = None
         self.layer_num = layer_num
+        self._polygon = None
+
+    @property
+    def polygon(self):
+        """A Shapely Polygon of this element.
+
+        The polygon is only created the first time it is used (e.g. to plot
+        the element), since most grids are never plotted.
+
+        """
+        if self._polygon is None:
+            self._polygon = Polygon([getattr(self, name).coords
+                for name in self._boundary])
+        return self._polygon
+
+    @polygon.setter
+    def polygon(self, p):
+        self._polygon = p
+
+    def signed_area(self):
+        """Returns the area inside the boundary nodes of this element.
+
+        The area is negative if the nodes are in clockwise order.
+
+        """
+        x = [getattr(self, name).x2 for name in self._boundary]
+        y = [getattr(self, name).x3 for name in self._boundary]
+        return sum([x[i-1]*y[i] - x[i]*y[i-1] for i in range(len(x))])/2.0
 
     def swap_nodes(self, nodeA, nodeB):
         temp = nodeA
@@ -79,18 +136,20 @@ The VABS quadrilateral element node numbering scheme is shown below:
     1-------2
 
     """
+    __slots__ = ('x2_middle', 'x3_middle')
+    _boundary = ('node1', 'node2', 'node3', 'node4')
     def __init__(self, elem_num, node1, node2, node3, node4, layer_num):
         _Element.__init__(self, elem_num, layer_num)
         self.node1 = node1
         self.node2 = node2
         self.node3 = node3
         self.node4 = node4
-        # assign node_num=0 for nodes that are not present
-        self.node5 = Node(0, 0.0, 0.0)
-        self.node6 = Node(0, 0.0, 0.0)
-        self.node7 = Node(0, 0.0, 0.0)
-        self.node8 = Node(0, 0.0, 0.0)
-        self.node9 = Node(0, 0.0, 0.0)
+        # nodes that are not present share absent_node (node_num=0)
+        self.node5 = absent_node
+        self.node6 = absent_node
+        self.node7 = absent_node
+        self.node8 = absent_node
+        self.node9 = absent_node
         self.nodes = (self.node1,self.node2,self.node3,self.node4)
         for node in self.nodes:
             node.parent_element = self
@@ -286,65 +345,27 @@ The VABS quadrilateral element node numbering scheme is shown below:
 The central node (9) is optional.
 
     """
+    __slots__ = ()
+    _boundary = ('node1', 'node5', 'node2', 'node6', 'node3', 'node7', 'node4',
+        'node8')
     def __init__(self, elem_num, node1, node2, node3, node4, node5, node6,
         node7, node8, layer_num, autocorrect=True):
         _Element.__init__(self, elem_num, layer_num)
-        # create a polygon representation
-        p = Polygon([
-            node1.coords, 
-            node5.coords, 
-            node2.coords, 
-            node6.coords, 
-            node3.coords,
-            node7.coords,
-            node4.coords,
-            node8.coords
-            ])
-        if autocorrect:
-            p_ccw = orient(p)
-            self.polygon = p_ccw
-            # find each node that matches each polygon point
-            node_list = []
-            for point in p_ccw.exterior.coords[:-1]:
-                if point == node1.coords:
-                    node_list.append(node1)
-                elif point == node2.coords:
-                    node_list.append(node2)
-                elif point == node3.coords:
-                    node_list.append(node3)
-                elif point == node4.coords:
-                    node_list.append(node4)
-                elif point == node5.coords:
-                    node_list.append(node5)
-                elif point == node6.coords:
-                    node_list.append(node6)
-                elif point == node7.coords:
-                    node_list.append(node7)
-                elif point == node8.coords:
-                    node_list.append(node8)
-                else:
-                    raise Warning("No point match found!")
-            # assign the nodes in a proper CCW-orientation
-            self.node1 = node_list[0]
-            self.node5 = node_list[1]
-            self.node2 = node_list[2]
-            self.node6 = node_list[3]
-            self.node3 = node_list[4]
-            self.node7 = node_list[5]
-            self.node4 = node_list[6]
-            self.node8 = node_list[7]
-        else:
-            self.polygon = p
-            self.node1 = node1
-            self.node2 = node2
-            self.node3 = node3
-            self.node4 = node4
-            self.node5 = node5
-            self.node6 = node6
-            self.node7 = node7
-            self.node8 = node8
-        # assign node_num=0 for nodes that are not present
-        self.node9 = Node(0, 0.0, 0.0)
+        self.node1 = node1
+        self.node2 = node2
+        self.node3 = node3
+        self.node4 = node4
+        self.node5 = node5
+        self.node6 = node6
+        self.node7 = node7
+        self.node8 = node8
+        if autocorrect and self.signed_area() < 0.0:
+            # reverse the nodes (after node1) into a proper CCW-orientation
+            (self.node5, self.node2, self.node6, self.node3, self.node7,
+                self.node4, self.node8) = (node8, node4, node7, node3, node6,
+                node2, node5)
+        # nodes that are not present share absent_node (node_num=0)
+        self.node9 = absent_node
         self.nodes = (self.node1,self.node2,self.node3,self.node4,self.node5,
             self.node6,self.node7,self.node8)
         for node in self.nodes:
@@ -417,25 +438,20 @@ The VABS triangular element node numbering scheme is shown below:
     1-------2
 
     """
+    __slots__ = ()
+    _boundary = ('node1', 'node2', 'node3')
     def __init__(self, elem_num, node1, node2, node3, layer_num):
         _Element.__init__(self, elem_num, layer_num)
-        # create a polygon representation
-        p = Polygon([
-            node1.coords, 
-            node2.coords, 
-            node3.coords
-            ])
-        self.polygon = p
         self.node1 = node1
         self.node2 = node2
         self.node3 = node3
-        # assign node_num=0 for nodes that are not present
-        self.node4 = Node(0, 0.0, 0.0)
-        self.node5 = Node(0, 0.0, 0.0)
-        self.node6 = Node(0, 0.0, 0.0)
-        self.node7 = Node(0, 0.0, 0.0)
-        self.node8 = Node(0, 0.0, 0.0)
-        self.node9 = Node(0, 0.0, 0.0)
+        # nodes that are not present share absent_node (node_num=0)
+        self.node4 = absent_node
+        self.node5 = absent_node
+        self.node6 = absent_node
+        self.node7 = absent_node
+        self.node8 = absent_node
+        self.node9 = absent_node
         self.nodes = (self.node1,self.node2,self.node3)
         for node in self.nodes:
             node.parent_element = self
@@ -469,57 +485,25 @@ The VABS triangular element node numbering scheme is shown below:
     1---5---2
 
     """
+    __slots__ = ()
+    _boundary = ('node1', 'node5', 'node2', 'node6', 'node3', 'node7')
     def __init__(self, elem_num, node1, node2, node3, node5, node6, node7,
         layer_num, autocorrect=True):
         _Element.__init__(self, elem_num, layer_num)
-        # create a polygon representation
-        p = Polygon([
-            node1.coords, 
-            node5.coords, 
-            node2.coords, 
-            node6.coords, 
-            node3.coords,
-            node7.coords
-            ])
-        if autocorrect:
-            p_ccw = orient(p)
-            self.polygon = p_ccw
-            # find each node that matches each polygon point
-            node_list = []
-            for point in p_ccw.exterior.coords[:-1]:
-                if point == node1.coords:
-                    node_list.append(node1)
-                elif point == node2.coords:
-                    node_list.append(node2)
-                elif point == node3.coords:
-                    node_list.append(node3)
-                elif point == node5.coords:
-                    node_list.append(node5)
-                elif point == node6.coords:
-                    node_list.append(node6)
-                elif point == node7.coords:
-                    node_list.append(node7)
-                else:
-                    raise Warning("No point match found!")
-            # assign the nodes in a proper CCW-orientation
-            self.node1 = node_list[0]
-            self.node5 = node_list[1]
-            self.node2 = node_list[2]
-            self.node6 = node_list[3]
-            self.node3 = node_list[4]
-            self.node7 = node_list[5]
-        else:
-            self.polygon = p
-            self.node1 = node1
-            self.node2 = node2
-            self.node3 = node3
-            self.node5 = node5
-            self.node6 = node6
-            self.node7 = node7
-        # assign node_num=0 for nodes that are not present
-        self.node4 = Node(0, 0.0, 0.0)
-        self.node8 = Node(0, 0.0, 0.0)
-        self.node9 = Node(0, 0.0, 0.0)
+        self.node1 = node1
+        self.node2 = node2
+        self.node3 = node3
+        self.node5 = node5
+        self.node6 = node6
+        self.node7 = node7
+        if autocorrect and self.signed_area() < 0.0:
+            # reverse the nodes (after node1) into a proper CCW-orientation
+            (self.node5, self.node2, self.node6, self.node3, self.node7) = (
+                node7, node3, node6, node2, node5)
+        # nodes that are not present share absent_node (node_num=0)
+        self.node4 = absent_node
+        self.node8 = absent_node
+        self.node9 = absent_node
         self.nodes = (self.node1,self.node2,self.node3,self.node5,self.node6,
             self.node7)
         for node in self.nodes:
@@ -594,3 +578,421 @@ The VABS triangular element node numbering scheme is shown below:
         self.theta1 = np.degrees(outer_angle)
         if self.theta1 < 0.0:
             self.theta1 += 360.0
+
+
+def connectivity_arrays(grid):
+    """Returns arrays of the node coords and element connectivity of a grid.
+
+    These arrays are used to process all the elements of a grid at once (e.g.
+    mesh_quality.element_quality()), instead of one element at a time.
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+
+    Returns
+    -------
+    x : np.array, shape (N,2), the (x2,x3) coords of each node, in the same
+        order as grid.list_of_nodes
+    conn : np.array of ints, shape (E,9), for each element, the index in x of
+        node1, node2, ..., node9, in the same order as grid.list_of_elements
+        (-1 for nodes that are not present, i.e. node_num=0)
+
+    """
+    x = np.array([(node.x2, node.x3) for node in grid.list_of_nodes])
+    index = dict([(node.node_num, i)
+        for (i, node) in enumerate(grid.list_of_nodes)])
+    index[0] = -1
+    conn = np.array([(index[el.node1.node_num], index[el.node2.node_num],
+        index[el.node3.node_num], index[el.node4.node_num],
+        index[el.node5.node_num], index[el.node6.node_num],
+        index[el.node7.node_num], index[el.node8.node_num],
+        index[el.node9.node_num]) for el in grid.list_of_elements],
+        dtype=int).reshape(-1, 9)
+    return (x, conn)
+
+def node_element_incidence(conn, num_nodes):
+    """Returns the sparse node-to-element incidence matrix of a grid.
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+    num_nodes : int, the number of nodes in the grid
+
+    Returns
+    -------
+    incidence : scipy.sparse.csr_matrix of ints, shape (N,E), 1 if node n is
+        in element e (row n lists the elements that share node n)
+
+    Usage
+    -----
+    (x, conn) = gr.connectivity_arrays(g)
+    incidence = gr.node_element_incidence(conn, len(x))
+    incidence[n].indices                # the elements that share node n
+    node_adjacency = incidence * incidence.T    # nodes that share an element
+
+    """
+    (e, k) = np.nonzero(conn >= 0)
+    return csr_matrix((np.ones(len(e), dtype=np.int32), (conn[e,k], e)),
+        shape=(num_nodes, len(conn)))
+
+def element_sides(conn):
+    """Returns the sides of every element, in CCW order.
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+
+    Returns
+    -------
+    sides : np.array of ints, shape (S,3), the indices of the two corner
+        nodes and the mid-side node (-1 for linear elements) of each side
+    element : np.array of ints, shape (S,), the element of each side
+    local_side : np.array of ints, shape (S,), the side number within its
+        element (0 for the side from node1 to node2, 1 for node2 to node3,
+        ...)
+
+    """
+    num_corners = np.where(conn[:,3] >= 0, 4, 3)
+    element = np.repeat(np.arange(len(conn)), num_corners)
+    local_side = (np.arange(len(element)) -
+        np.repeat(np.cumsum(num_corners) - num_corners, num_corners))
+    sides = np.column_stack((conn[element, local_side],
+        conn[element, (local_side + 1) % num_corners[element]],
+        conn[element, 4 + local_side]))
+    return (sides, element, local_side)
+
+def _shared_sides(sides):
+    """Returns the pairs of sides (indices into sides) with the same corners.
+
+    Also returns a boolean array, True for the sides that are not shared.
+
+    """
+    a = np.minimum(sides[:,0], sides[:,1])
+    b = np.maximum(sides[:,0], sides[:,1])
+    order = np.lexsort((b, a))
+    same = ((a[order][1:] == a[order][:-1]) & (b[order][1:] == b[order][:-1]))
+    pairs = np.column_stack((order[:-1][same], order[1:][same]))
+    unshared = np.ones(len(sides), dtype=bool)
+    unshared[pairs.ravel()] = False
+    return (pairs, unshared)
+
+def element_adjacency(conn):
+    """Returns the sparse element adjacency matrix of a grid.
+
+    Two elements are adjacent if they share a side (not just a node; use
+    node_element_incidence() for that).
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+
+    Returns
+    -------
+    adjacency : scipy.sparse.csr_matrix of ints, shape (E,E), symmetric, 1 if
+        elements i and j share a side (row i lists the neighbors of element i)
+
+    """
+    (sides, element, local_side) = element_sides(conn)
+    (pairs, unshared) = _shared_sides(sides)
+    (i, j) = (element[pairs[:,0]], element[pairs[:,1]])
+    E = len(conn)
+    return csr_matrix((np.ones(2*len(i), dtype=np.int32),
+        (np.concatenate((i, j)), np.concatenate((j, i)))), shape=(E, E))
+
+def boundary_edges(conn):
+    """Returns the sides on the boundary of a grid (not shared by elements).
+
+    The outer boundary of a cross-section runs CCW, and the boundaries of the
+    holes (e.g. between the spar webs) run CW.
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+
+    Returns
+    -------
+    edges : np.array of ints, shape (B,3), the indices of the two corner
+        nodes and the mid-side node (-1 for linear elements) of each
+        boundary side
+    element : np.array of ints, shape (B,), the element of each boundary side
+
+    """
+    (sides, element, local_side) = element_sides(conn)
+    (pairs, unshared) = _shared_sides(sides)
+    return (sides[unshared], element[unshared])
+
+def interface_edges(conn, labels):
+    """Returns the sides shared by elements with different labels.
+
+    Use this to find the interfaces between layers (labels = the layer number
+    of each element) or between parts (labels = the element set of each
+    element).
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+    labels : array-like, shape (E,), the label of each element
+
+    Returns
+    -------
+    edges : np.array of ints, shape (P,3), the indices of the two corner
+        nodes and the mid-side node of each interface side, in the CCW order
+        of its first element
+    elements : np.array of ints, shape (P,2), the two elements on either
+        side of each interface side
+
+    """
+    labels = np.asarray(labels)
+    (sides, element, local_side) = element_sides(conn)
+    (pairs, unshared) = _shared_sides(sides)
+    elements = element[pairs]
+    different = labels[elements[:,0]] != labels[elements[:,1]]
+    return (sides[pairs[different,0]], elements[different])
+
+def build_topology(grid):
+    """Builds the sparse connectivity and adjacency structures of a grid.
+
+    They are built once, with vectorized operations, instead of looping over
+    grid.list_of_elements and the nodes of each element. Run this again
+    after the nodes or elements of the grid are changed (renumber_grid() and
+    merge_coincident_nodes() rebuild them automatically).
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+
+    Saves
+    -----
+    grid.node_element_incidence : scipy.sparse.csr_matrix, shape (N,E), see
+        node_element_incidence()
+    grid.element_adjacency : scipy.sparse.csr_matrix, shape (E,E), see
+        element_adjacency()
+    grid.boundary_edges : np.array of ints, shape (B,3), see boundary_edges()
+
+    All of these use the indices of the nodes and elements in
+    grid.list_of_nodes and grid.list_of_elements (not their numbers).
+
+    Usage
+    -----
+    import lib.grid as gr
+    gr.build_topology(g)
+    g.element_adjacency[0].indices      # the neighbors of the first element
+    (x, conn) = gr.connectivity_arrays(g)
+    layers = [el.layer_num for el in g.list_of_elements]
+    (edges, elements) = gr.interface_edges(conn, layers)
+
+    """
+    (x, conn) = connectivity_arrays(grid)
+    grid.node_element_incidence = node_element_incidence(conn, len(x))
+    grid.element_adjacency = element_adjacency(conn)
+    grid.boundary_edges = boundary_edges(conn)[0]
+
+def bandwidth_and_profile(conn):
+    """Returns the bandwidth and profile of the node adjacency of a grid.
+
+    Two nodes are adjacent if they share an element. The bandwidth is the
+    largest difference between the indices of two adjacent nodes. The profile
+    (or envelope) is the sum, over all nodes, of the difference between the
+    index of the node and the lowest index of its adjacent nodes. Both are
+    smaller when adjacent nodes have nearby numbers.
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from connectivity_arrays()
+
+    Returns
+    -------
+    (bandwidth, profile) : tuple of ints
+
+    """
+    c = np.where(conn < 0, conn.max(axis=1)[:,np.newaxis], conn)
+    bandwidth = int((c.max(axis=1) - c.min(axis=1)).max())
+    # for each node, find the lowest index of the elements it belongs to
+    lowest = np.arange(c.max()+1)
+    np.minimum.at(lowest, c.ravel(), np.repeat(c.min(axis=1), 9))
+    profile = int((np.arange(len(lowest)) - lowest).sum())
+    return (bandwidth, profile)
+
+def renumber_grid(grid, print_flag=True):
+    """Renumbers the nodes and elements of a grid to reduce its bandwidth.
+
+    The nodes are renumbered with the reverse Cuthill-McKee ordering, so that
+    nodes that share an element have nearby numbers. Then, the elements are
+    renumbered in order of their lowest node number. The grid's
+    list_of_nodes and list_of_elements are sorted by their new numbers.
+
+    Run this function just before writing the VABS input file (e.g. with
+    vabs_utils.VabsInputFile(..., renumber=True)), after all the elements
+    have been assigned their layer plane angles, because the
+    layer_plane_angles_stnXX.py scripts look up elements by their original
+    numbers.
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+    print_flag : bool (default: True), print the bandwidth and profile
+        before and after renumbering
+
+    Returns
+    -------
+    report : dict, with the keys 'bandwidth' and 'profile', each a tuple of
+        (before, after)
+
+    Saves
+    -----
+    grid.original_node_nums : np.array of ints, the original number of each
+        node, i.e. original_node_nums[new_node_num-1] = original node_num
+    grid.original_elem_nums : np.array of ints, the original number of each
+        element, i.e. original_elem_nums[new_elem_num-1] = original elem_num
+    (If the grid has already been renumbered, these still map back to the
+    first numbers.)
+    grid.node_element_incidence, grid.element_adjacency,
+    grid.boundary_edges : rebuilt, if build_topology() has been run
+
+    Usage
+    -----
+    import lib.grid as gr
+    gr.renumber_grid(g)
+    g.original_node_nums[g.list_of_nodes[0].node_num-1]
+
+    """
+    (x, conn) = connectivity_arrays(grid)
+    N = len(x)
+    (bandwidth0, profile0) = bandwidth_and_profile(conn)
+    # build the node adjacency matrix: two nodes are adjacent if they share
+    #   an element
+    incidence = node_element_incidence(conn, N)
+    adjacency = incidence * incidence.T
+    # RCM breaks ties in the order of each row's column indices
+    adjacency.sort_indices()
+    # order[k] is the index of the node that gets the new number k+1
+    order = reverse_cuthill_mckee(adjacency, symmetric_mode=True)
+    new_index = np.empty(N, dtype=int)
+    new_index[order] = np.arange(N)
+    new_conn = np.where(conn < 0, -1, new_index[np.maximum(conn, 0)])
+    # sort the elements by their lowest (then highest) new node index
+    c = np.where(new_conn < 0, new_conn.max(axis=1)[:,np.newaxis], new_conn)
+    elem_order = np.lexsort((c.max(axis=1), c.min(axis=1)))
+    (bandwidth1, profile1) = bandwidth_and_profile(new_conn[elem_order])
+    # save the mapping back to the original numbers
+    old_node_nums = np.array([node.node_num for node in grid.list_of_nodes])
+    old_elem_nums = np.array([el.elem_num for el in grid.list_of_elements])
+    if getattr(grid, 'original_node_nums', None) is not None:
+        old_node_nums = grid.original_node_nums[old_node_nums-1]
+        old_elem_nums = grid.original_elem_nums[old_elem_nums-1]
+    grid.original_node_nums = old_node_nums[order]
+    grid.original_elem_nums = old_elem_nums[elem_order]
+    # renumber the nodes and elements
+    grid.list_of_nodes = [grid.list_of_nodes[i] for i in order]
+    for (i, node) in enumerate(grid.list_of_nodes):
+        node.node_num = i+1
+    grid.list_of_elements = [grid.list_of_elements[i] for i in elem_order]
+    for (i, el) in enumerate(grid.list_of_elements):
+        el.elem_num = i+1
+    if getattr(grid, 'node_element_incidence', None) is not None:
+        build_topology(grid)
+    if print_flag:
+        print ' Renumbered {0} nodes and {1} elements'.format(N, len(conn))
+        print '   bandwidth: {0} --> {1}'.format(bandwidth0, bandwidth1)
+        print '   profile:   {0} --> {1}'.format(profile0, profile1)
+    return {'bandwidth': (bandwidth0, bandwidth1),
+            'profile': (profile0, profile1)}
+
+def merge_coincident_nodes(grid, tol=1e-6, print_flag=True):
+    """Merges nodes that are closer together than tol, and renumbers them.
+
+    Parts that are meshed separately (e.g. the blocks of each layer region in
+    TrueGrid) can leave duplicate nodes along their shared edges, so the
+    cross-section is not connected there. This function finds these nodes
+    with a KD-tree. Each group of coincident nodes is replaced with the
+    first node of the group (in the order of grid.list_of_nodes). Then the
+    remaining nodes are renumbered 1, 2, 3, ...
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+    tol : float (default: 1e-6), the largest distance between two nodes that
+        are merged
+    print_flag : bool (default: True), print the number of merged nodes
+
+    Returns
+    -------
+    merged : dict, the number of nodes that were removed from each element
+        set (a node that is shared by two element sets is counted in both)
+
+    Saves
+    -----
+    grid.list_of_nodes, grid.number_of_nodes
+    grid.original_node_nums : updated, if the grid has been renumbered with
+        renumber_grid()
+    grid.node_element_incidence, grid.element_adjacency,
+    grid.boundary_edges : rebuilt, if build_topology() has been run
+
+    Usage
+    -----
+    import lib.grid as gr
+    gr.merge_coincident_nodes(g, tol=1e-6)
+
+    """
+    (x, conn) = connectivity_arrays(grid)
+    N = len(x)
+    pairs = cKDTree(x).query_pairs(tol, output_type='ndarray')
+    if len(pairs) == 0:
+        if print_flag:
+            print ' No coincident nodes were found.'
+        return {}
+    # group the coincident nodes, and keep the first node in each group
+    graph = csr_matrix((np.ones(len(pairs), dtype=np.int8),
+        (pairs[:,0], pairs[:,1])), shape=(N, N))
+    (num_groups, group) = connected_components(graph, directed=False)
+    first = np.full(num_groups, N, dtype=int)
+    np.minimum.at(first, group, np.arange(N))
+    keep = np.zeros(N, dtype=bool)
+    keep[first] = True
+    new_index = np.cumsum(keep) - 1
+    # remap the connectivity of every element at once
+    new_conn = np.where(conn < 0, -1, new_index[first[group[conn]]])
+    # check for elements that would collapse
+    s = np.sort(new_conn, axis=1)
+    collapsed = ((s[:,1:] == s[:,:-1]) & (s[:,1:] >= 0)).any(axis=1)
+    if collapsed.any():
+        bad = [grid.list_of_elements[i].elem_num
+            for i in np.nonzero(collapsed)[0]]
+        raise ValueError("Merging nodes with tol={0} would collapse {1} elements (e.g. element #{2})! Try a smaller tol.".format(tol, len(bad), bad[0]))
+    # count the removed nodes in each element set
+    sets = np.array([str(el.element_set) for el in grid.list_of_elements])
+    (e, k) = np.nonzero((conn >= 0) & ~keep[np.maximum(conn, 0)])
+    merged = {}
+    for (name, node) in set(zip(sets[e], conn[e,k])):
+        merged[name] = merged.get(name, 0) + 1
+    # save the new nodes and connectivity
+    old_node_nums = np.array([node.node_num for node in grid.list_of_nodes])
+    if getattr(grid, 'original_node_nums', None) is not None:
+        grid.original_node_nums = grid.original_node_nums[
+            old_node_nums[keep]-1]
+    grid.list_of_nodes = [node for (node, k) in
+        zip(grid.list_of_nodes, keep) if k]
+    grid.number_of_nodes = len(grid.list_of_nodes)
+    for (i, node) in enumerate(grid.list_of_nodes):
+        node.node_num = i+1
+    for (el, row) in zip(grid.list_of_elements, new_conn):
+        nodes = []
+        for (k, j) in enumerate(row):
+            if j >= 0:
+                node = grid.list_of_nodes[j]
+                setattr(el, 'node{0}'.format(k+1), node)
+                nodes.append(node)
+        el.nodes = tuple(nodes)
+    if getattr(grid, 'node_element_incidence', None) is not None:
+        build_topology(grid)
+    if print_flag:
+        print ' Merged {0} coincident nodes ({1} nodes remain)'.format(
+            N - grid.number_of_nodes, grid.number_of_nodes)
+        for name in sorted(merged):
+            print '   {0}: {1}'.format(name, merged[name])
+    return merged
@@ -0,0 +1,347 @@
+"""Find the elements of a cross-section grid at many points, all at once.
+
+Use the class GridIndex to find which element (and so which element set,
+layer, or material) is at a point (x2, x3), e.g. at a strain gauge, or at the
+nodes of another grid when results are mapped from one grid to another.
+Instead of testing the polygon of every element, the elements are sorted into
+a uniform grid of square buckets, and only the elements in a point's bucket
+are tested.
+
+For each point, the index of the element in grid.list_of_elements is returned,
+along with the local coords (xi, eta) of the point in the parent element
+(-1 <= xi, eta <= 1 for quadrilaterals, and 0 <= xi, eta, xi+eta <= 1 for
+triangles).
+
+Usage
+-----
+import numpy as np
+import lib.abaqus_utils2 as au
+import lib.grid_index as gi
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+index = gi.GridIndex(g)
+points = np.array([[0.1, 0.2], [-1.0, 0.1]])
+(elements, local_coords) = index.locate(points)
+g.list_of_elements[elements[0]].layer_num
+(elements, local_coords, distances) = index.nearest(points)
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+from scipy.spatial import cKDTree
+import grid as gr
+reload(gr)
+import mesh_quality as mq
+reload(mq)
+
+
+# the (xi, eta) coords of the middle of each element shape
+_middle = {
+    'quad4': (0.0, 0.0),
+    'quad8': (0.0, 0.0),
+    'tri3': (1.0/3.0, 1.0/3.0),
+    'tri6': (1.0/3.0, 1.0/3.0)
+    }
+
+
+def _newton(X, points, shape, xi, max_iterations, tol):
+    """Returns the local coords of some points, from Newton's method.
+
+    xi : np.array, shape (P,2), the starting (xi, eta) coords of each pair
+    (see inverse_map() for the other parameters)
+
+    """
+    xi = xi.copy()
+    size = np.hypot(*(X.max(axis=1) - X.min(axis=1)).T)
+    converged = np.zeros(len(points), dtype=bool)
+    active = np.arange(len(points))     # the pairs that haven't converged
+    for i in range(max_iterations):
+        Xa = X[active]
+        N = mq.shape_functions(shape, xi[active])
+        dN = mq.shape_function_derivatives(shape, xi[active])
+        r = np.einsum('pn,pna->pa', N, Xa) - points[active]
+        J = np.einsum('pna,pnb->pab', Xa, dN)
+        det_J = J[:,0,0]*J[:,1,1] - J[:,0,1]*J[:,1,0]
+        det_J[det_J == 0.0] = np.inf
+        # solve J*delta = r for each pair
+        delta = np.column_stack((J[:,1,1]*r[:,0] - J[:,0,1]*r[:,1],
+            J[:,0,0]*r[:,1] - J[:,1,0]*r[:,0]))/det_J[:,np.newaxis]
+        # keep far-away points from running off to infinity
+        xi[active] = np.clip(xi[active] - delta, -3.0, 3.0)
+        done = np.hypot(r[:,0], r[:,1]) <= tol*size[active]
+        converged[active[done]] = True
+        active = active[~done]
+        if len(active) == 0:
+            break
+    xi[~converged] = np.nan
+    return xi
+
+def inverse_map(X, points, shape, max_iterations=20, tol=1e-10):
+    """Returns the local coords of some points in some elements.
+
+    Solves x(xi, eta) = point with Newton's method, for every
+    (element, point) pair at once. A pair has converged when the distance
+    from x(xi, eta) to its point is at most tol times the size of its element
+    (the diagonal of the element's bounding box). Converged pairs get one last
+    Newton step, and are then left alone while the other pairs iterate, so
+    the result for each pair doesn't depend on the other pairs in the batch.
+
+    Newton's method is started at the middle of each element. The map of a
+    thin, curved quadratic element can fold back on itself outside the parent
+    element, so a pair that doesn't converge inside the parent element is
+    started again from each Gauss point, until it does.
+
+    Parameters
+    ----------
+    X : np.array, shape (P,n,2), the node coords of the element of each pair
+    points : np.array, shape (P,2), the (x2, x3) coords of each point
+    shape : str, 'quad4', 'quad8', 'tri3', or 'tri6'
+    max_iterations : int (default: 20), the most Newton steps for each pair
+    tol : float (default: 1e-10), the tolerance of the distance, relative to
+        the size of the element
+
+    Returns
+    -------
+    xi : np.array, shape (P,2), the (xi, eta) coords of each point (NaN if
+        Newton's method did not converge)
+
+    """
+    xi = _newton(X, points, shape, np.tile(_middle[shape], (len(points), 1)),
+        max_iterations, tol)
+    for start in mq._gauss_points[shape]:
+        retry = np.nonzero(~is_inside(xi, shape))[0]
+        if len(retry) == 0:
+            break
+        xi_retry = _newton(X[retry], points[retry], shape,
+            np.tile(start, (len(retry), 1)), max_iterations, tol)
+        # keep the new coords if they are inside, or if the old ones are NaN
+        better = is_inside(xi_retry, shape) | np.isnan(xi[retry]).any(axis=1)
+        xi[retry[better]] = xi_retry[better]
+    return xi
+
+def is_inside(xi, shape, tol=1e-8):
+    """Returns True for the local coords (xi, eta) inside the parent element."""
+    with np.errstate(invalid='ignore'):
+        if shape in ['quad4', 'quad8']:
+            return (np.abs(xi) <= 1.0 + tol).all(axis=1)
+        else:
+            return ((xi >= -tol).all(axis=1) &
+                (xi.sum(axis=1) <= 1.0 + tol))
+
+
+class GridIndex:
+    """A spatial index of the elements in a cross-section grid.
+
+    Initialization:
+    GridIndex(grid, bucket_size=None)
+      grid - An object with list_of_nodes and list_of_elements attributes
+        (e.g. an abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object).
+      bucket_size - Optional float for the width of each square bucket. By
+        default, it is about the size of an average element.
+
+    Public attributes:
+    grid - The grid.
+    x - An array of the node coords, from grid.connectivity_arrays().
+    conn - An array of the element connectivity, from
+        grid.connectivity_arrays().
+    shapes - An array of the shape of each element ('quad4', 'quad8', 'tri3',
+        or 'tri6').
+    bucket_size - A float for the width of each square bucket.
+
+    """
+    def __init__(self, grid, bucket_size=None):
+        self.grid = grid
+        (self.x, self.conn) = gr.connectivity_arrays(grid)
+        self.shapes = mq.element_shapes(self.conn)
+        # bounding box of each element (from all its nodes)
+        X = self.x[np.where(self.conn < 0, self.conn[:,[0]], self.conn)]
+        self._lower = X.min(axis=1)
+        self._upper = X.max(axis=1)
+        # a curved (quadratic) side can bulge past its nodes, but it stays
+        #   inside the triangle of its corners and its control point,
+        #   2*(mid-side node) - (corner 1 + corner 2)/2
+        for shape in ['quad8', 'tri6']:
+            mask = self.shapes == shape
+            if not mask.any():
+                continue
+            B = self.x[self.conn[mask][:,mq.boundary_slots[shape]]]
+            control = 2.0*B[:,1::2] - 0.5*(B[:,0::2] +
+                np.roll(B[:,0::2], -1, axis=1))
+            self._lower[mask] = np.minimum(self._lower[mask],
+                control.min(axis=1))
+            self._upper[mask] = np.maximum(self._upper[mask],
+                control.max(axis=1))
+        # pad the boxes a little, for round-off
+        pad = 0.01*(self._upper - self._lower).max(axis=1)[:,np.newaxis]
+        self._lower -= pad
+        self._upper += pad
+        self._origin = self._lower.min(axis=0)
+        span = self._upper.max(axis=0) - self._origin
+        E = len(self.conn)
+        if bucket_size is None:
+            bucket_size = np.sqrt(
+                np.prod(self._upper - self._lower, axis=1).mean())
+            # use about 4 buckets per element, at most
+            bucket_size = max(bucket_size, np.sqrt(np.prod(span)/(4.0*E)))
+        self.bucket_size = bucket_size
+        self._shape = (np.floor(span/bucket_size).astype(int) + 1)
+        self._build_buckets()
+        self._centroid_tree = None
+
+    def _bucket_coords(self, points):
+        """Returns the (i,j) bucket of each point (may be outside the grid)."""
+        return np.floor((points - self._origin)/self.bucket_size).astype(int)
+
+    def _build_buckets(self):
+        """Sorts the elements into buckets.
+
+        This non-public method is automatically run when a new GridIndex
+        instance is created.
+
+        Saves:
+        self._bucket_start - An array of ints, the elements in bucket b are
+            self._bucket_elements[self._bucket_start[b]:self._bucket_start[b+1]]
+        self._bucket_elements - An array of ints, the element indices, sorted
+            by bucket.
+
+        """
+        ij0 = np.clip(self._bucket_coords(self._lower), 0, self._shape-1)
+        ij1 = np.clip(self._bucket_coords(self._upper), 0, self._shape-1)
+        n = ij1 - ij0 + 1
+        count = n[:,0]*n[:,1]
+        element = np.repeat(np.arange(len(count)), count)
+        k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        i = ij0[element,0] + k // n[element,1]
+        j = ij0[element,1] + k % n[element,1]
+        bucket = i*self._shape[1] + j
+        order = np.argsort(bucket, kind='mergesort')
+        self._bucket_elements = element[order]
+        self._bucket_start = np.searchsorted(bucket[order],
+            np.arange(self._shape[0]*self._shape[1] + 1))
+
+    def _candidates(self, points):
+        """Returns the (point, element) pairs that share a bucket."""
+        ij = self._bucket_coords(points)
+        ok = ((ij >= 0) & (ij < self._shape)).all(axis=1)
+        bucket = np.where(ok, ij[:,0]*self._shape[1] + ij[:,1], 0)
+        start = self._bucket_start[bucket]
+        count = np.where(ok, self._bucket_start[bucket+1] - start, 0)
+        point = np.repeat(np.arange(len(points)), count)
+        k = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        element = self._bucket_elements[start[point] + k]
+        # keep the pairs where the point is in the element's bounding box
+        p = points[point]
+        keep = ((p >= self._lower[element]) &
+            (p <= self._upper[element])).all(axis=1)
+        return (point[keep], element[keep])
+
+    def _local_coords(self, point, element, points):
+        """Returns the local coords of each (point, element) pair."""
+        xi = np.empty((len(point), 2))
+        for shape in mq.node_slots:
+            mask = self.shapes[element] == shape
+            if not mask.any():
+                continue
+            X = self.x[self.conn[element[mask]][:,mq.node_slots[shape]]]
+            xi[mask] = inverse_map(X, points[point[mask]], shape)
+        return xi
+
+    def locate(self, points):
+        """Returns the element that contains each point.
+
+        Parameters
+        ----------
+        points : np.array, shape (P,2), the (x2, x3) coords of each point
+
+        Returns
+        -------
+        elements : np.array of ints, shape (P,), the index (in
+            grid.list_of_elements) of the element that contains each point
+            (-1 if the point is not in any element)
+        local_coords : np.array, shape (P,2), the (xi, eta) coords of each
+            point in its element (NaN if the point is not in any element)
+
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        (point, element) = self._candidates(points)
+        xi = self._local_coords(point, element, points)
+        inside = np.zeros(len(point), dtype=bool)
+        for shape in mq.node_slots:
+            mask = self.shapes[element] == shape
+            inside[mask] = is_inside(xi[mask], shape)
+        # a point on a shared side is in two elements; keep the first one
+        (found, first) = np.unique(point[inside], return_index=True)
+        elements = np.full(len(points), -1, dtype=int)
+        local_coords = np.full((len(points), 2), np.nan)
+        elements[found] = element[inside][first]
+        local_coords[found] = xi[inside][first]
+        return (elements, local_coords)
+
+    def nearest(self, points, k=16):
+        """Returns the nearest element to each point.
+
+        Points inside the grid are located with locate(). For points outside
+        the grid, the boundaries of the k elements with the nearest
+        centroids are checked, and the nearest point on those boundaries is
+        used.
+
+        Parameters
+        ----------
+        points : np.array, shape (P,2), the (x2, x3) coords of each point
+        k : int (default: 16), the number of elements checked for each point
+            outside the grid
+
+        Returns
+        -------
+        elements : np.array of ints, shape (P,), the index (in
+            grid.list_of_elements) of the nearest element to each point
+        local_coords : np.array, shape (P,2), the (xi, eta) coords of the
+            nearest point in that element
+        distances : np.array, shape (P,), the distance from each point to its
+            element (0 for points inside the grid)
+
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        (elements, local_coords) = self.locate(points)
+        distances = np.zeros(len(points))
+        outside = np.nonzero(elements < 0)[0]
+        if len(outside) == 0:
+            return (elements, local_coords, distances)
+        if self._centroid_tree is None:
+            corners = self.x[np.where(self.conn[:,:4] < 0, self.conn[:,[0]],
+                self.conn[:,:4])]
+            self._centroid_tree = cKDTree(corners.mean(axis=1))
+        k = min(k, len(self.conn))
+        candidates = self._centroid_tree.query(points[outside], k=k)[1]
+        candidates = candidates.reshape(len(outside), k)
+        # the nearest point on the boundary of each candidate element
+        p = points[outside]
+        nearest_points = np.empty((len(outside), k, 2))
+        d = np.empty((len(outside), k))
+        for shape in mq.boundary_slots:
+            mask = self.shapes[candidates] == shape
+            if not mask.any():
+                continue
+            B = self.x[self.conn[candidates[mask]][:,mq.boundary_slots[shape]]]
+            A = B - np.roll(B, 1, axis=1)          # side vectors
+            P = p[np.nonzero(mask)[0]][:,np.newaxis,:] - np.roll(B, 1, axis=1)
+            length2 = (A*A).sum(axis=2)
+            t = np.clip((P*A).sum(axis=2)/np.where(length2 > 0, length2, 1.0),
+                0.0, 1.0)
+            Q = np.roll(B, 1, axis=1) + t[:,:,np.newaxis]*A
+            dist = np.hypot(*(p[np.nonzero(mask)[0]][:,np.newaxis,:] -
+                Q).transpose(2,0,1))
+            side = dist.argmin(axis=1)
+            d[mask] = dist[np.arange(len(side)), side]
+            nearest_points[mask] = Q[np.arange(len(side)), side]
+        best = d.argmin(axis=1)
+        rows = np.arange(len(outside))
+        elements[outside] = candidates[rows, best]
+        distances[outside] = d[rows, best]
+        q = nearest_points[rows, best]
+        local_coords[outside] = self._local_coords(np.arange(len(outside)),
+            elements[outside], q)
+        return (elements, local_coords, distances)
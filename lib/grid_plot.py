@@ -0,0 +1,182 @@
+"""Plot a whole cross-section grid, all at once.
+
+Element.plot() adds a separate patch, text labels, and edge lines for each
+element, so only a few elements can be plotted at a time (e.g. every 25th
+element, in the layer_plane_angles_stnXX.py scripts). plot_grid() draws the
+whole grid with a few matplotlib collections instead:
+  * one PolyCollection for all the elements, colored by element set, layer,
+    or layer plane angle (theta1)
+  * one quiver call for the layer plane angle (theta1) arrows
+  * one LineCollection for the outer edges, and one for the inner edges, that
+    were used to calculate the layer plane angles
+A full 5000-element station is drawn in a fraction of a second, and can be
+panned and zoomed interactively.
+
+Usage
+-----
+import matplotlib.pyplot as plt
+import lib.abaqus_utils2 as au
+import lib.grid_plot as gp
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+# ... assign the layer plane angles of g ...
+gp.plot_grid(g, color_by='element_set')
+plt.show()
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection, LineCollection
+import grid as gr
+reload(gr)
+import mesh_quality as mq
+reload(mq)
+
+
+def element_polygons(x, conn):
+    """Returns the vertices of the boundary polygon of each element.
+
+    The mid-side nodes of quadratic elements are included, so the polygons
+    follow curved sides (with straight segments).
+
+    Parameters
+    ----------
+    x : np.array, shape (N,2), the node coords, from grid.connectivity_arrays()
+    conn : np.array of ints, shape (E,9), the element connectivity, from
+        grid.connectivity_arrays()
+
+    Returns
+    -------
+    verts : list of np.arrays, shape (n,2), the boundary of each element in
+        CCW order (n = 3, 4, 6, or 8 vertices)
+
+    """
+    shapes = mq.element_shapes(conn)
+    verts = [None]*len(conn)
+    for shape in mq.boundary_slots:
+        index = np.nonzero(shapes == shape)[0]
+        if len(index) == 0:
+            continue
+        X = x[conn[index][:,mq.boundary_slots[shape]]]
+        for (i, v) in zip(index, X):
+            verts[i] = v
+    return verts
+
+def _edge_segments(grid, edge):
+    """Returns the segments of the outer or inner edges of all the elements.
+
+    Elements without a layer plane angle (calculated with
+    calculate_layer_plane_angle()) do not have edges, and are skipped.
+
+    """
+    attr0 = '_{0}_edge_node0'.format(edge)
+    attr1 = '_{0}_edge_node1'.format(edge)
+    segments = []
+    for el in grid.list_of_elements:
+        node0 = getattr(el, attr0, None)
+        node1 = getattr(el, attr1, None)
+        if node0 is not None and node1 is not None:
+            segments.append(((node0.x2, node0.x3), (node1.x2, node1.x3)))
+    return segments
+
+def plot_grid(grid, color_by='element_set', ax=None, alpha=0.5,
+    edge_color='k', plot_theta1=True, plot_outer_inner_edges=True,
+    cmap=None):
+    """Plots all the elements of a grid.
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+    color_by : str (default: 'element_set'), color each element by its
+        'element_set', 'layer_num', or 'theta1' (None for a single color)
+    ax : matplotlib axes (default: the current axes)
+    alpha : float (default: 0.5), the transparency of the elements
+    edge_color : matplotlib color (default: 'k'), the color of the element
+        boundaries (None to hide them)
+    plot_theta1 : bool (default: True), plot an arrow at the middle of each
+        element, in the direction of its layer plane angle (theta1)
+    plot_outer_inner_edges : bool (default: True), plot the outer edges (blue)
+        and the inner edges (magenta) used to calculate the layer plane angles
+    cmap : matplotlib colormap (default: 'tab20' for 'element_set' and
+        'layer_num', 'hsv' for 'theta1')
+
+    Returns
+    -------
+    artists : dict, the matplotlib collections that were added to ax, keyed by
+        'elements', 'theta1', 'outer_edges', and 'inner_edges' (only the ones
+        that were plotted)
+
+    """
+    if ax is None:
+        ax = plt.gcf().gca()
+    (x, conn) = gr.connectivity_arrays(grid)
+    verts = element_polygons(x, conn)
+    el_list = grid.list_of_elements
+    artists = {}
+    # the elements
+    polys = PolyCollection(verts, alpha=alpha, zorder=1,
+        edgecolors=('none' if edge_color is None else edge_color),
+        linewidths=0.2)
+    if color_by is None:
+        polys.set_facecolor('r')
+    elif color_by == 'theta1':
+        theta1 = np.array([np.nan if el.theta1 is None else el.theta1
+            for el in el_list])
+        polys.set_array(np.ma.masked_invalid(theta1))
+        polys.set_cmap(plt.get_cmap('hsv' if cmap is None else cmap))
+        polys.set_clim(0.0, 360.0)
+    elif color_by in ['element_set', 'layer_num']:
+        values = [getattr(el, color_by) for el in el_list]
+        (unique, index) = np.unique(np.array(values, dtype=str),
+            return_inverse=True)
+        colors = plt.get_cmap('tab20' if cmap is None else cmap)
+        polys.set_facecolor(colors(index % colors.N))
+    else:
+        raise ValueError("color_by must be 'element_set', 'layer_num', 'theta1', or None")
+    ax.add_collection(polys)
+    artists['elements'] = polys
+    # the layer plane angles, as arrows at the middle of each element
+    if plot_theta1:
+        has_theta1 = np.array([el.theta1 is not None for el in el_list],
+            dtype=bool)
+        if has_theta1.any():
+            theta1 = np.radians([el.theta1 for el in el_list
+                if el.theta1 is not None])
+            # the middle and area of each element, for each shape at once
+            shapes = mq.element_shapes(conn)
+            middles = np.empty((len(conn), 2))
+            areas = np.empty(len(conn))
+            for shape in mq.boundary_slots:
+                mask = shapes == shape
+                if not mask.any():
+                    continue
+                X = x[conn[mask][:,mq.boundary_slots[shape]]]
+                middles[mask] = X.mean(axis=1)
+                Y = np.roll(X, -1, axis=1)
+                areas[mask] = 0.5*np.abs((X[:,:,0]*Y[:,:,1] -
+                    X[:,:,1]*Y[:,:,0]).sum(axis=1))
+            middles = middles[has_theta1]
+            # scale each arrow by the size of its element
+            length = 0.6*np.sqrt(areas[has_theta1])
+            artists['theta1'] = ax.quiver(middles[:,0], middles[:,1],
+                length*np.cos(theta1), length*np.sin(theta1),
+                angles='xy', scale_units='xy', scale=1.0, pivot='middle',
+                units='xy', width=0.08*length.mean(), color='k', zorder=3)
+    # the outer and inner edges used to calculate the layer plane angles
+    if plot_outer_inner_edges:
+        for (edge, color) in [('outer', 'b'), ('inner', 'm')]:
+            segments = _edge_segments(grid, edge)
+            if len(segments) == 0:
+                continue
+            lines = LineCollection(segments, colors=color, alpha=0.7,
+                linewidths=1.5, capstyle='round', zorder=2)
+            ax.add_collection(lines)
+            artists[edge + '_edges'] = lines
+    ax.autoscale_view()
+    ax.set_aspect('equal')
+    return artists
@@ -8,6 +8,8 @@ Last updated: October 11, 2013
 
 import os
 import numpy as np
+import text_utils as tu
+reload(tu)
 from shapely.geometry import asLineString, Point, LineString
 from shapely.affinity import translate
 
@@ -62,6 +64,46 @@ class Layer:
         total_mass = self.parent_part.parent_structure.mass
         return self.mass/total_mass
 
+    def moments_of_area(self):
+        """Returns the area, first, and second moments of area of this layer.
+
+        The moments are taken about the origin of the station coordinates
+        (the pitch axis), with the shoelace formulas for each ring of the
+        polygon. Interior rings are subtracted from the exterior ring.
+
+        Returns a numpy array: [A, S_2, S_3, I_22, I_33, I_23], where
+            A = int(dA)
+            S_2 = int(x2 dA),   S_3 = int(x3 dA)
+            I_22 = int(x3^2 dA) (about the x2-axis, flapwise)
+            I_33 = int(x2^2 dA) (about the x3-axis, edgewise)
+            I_23 = int(x2*x3 dA)
+
+        """
+        m = np.zeros(6)
+        rings = [self.polygon.exterior] + list(self.polygon.interiors)
+        for (i, ring) in enumerate(rings):
+            a = np.array(ring.coords)
+            # rings are closed, so the last vertex is the same as the first
+            x0 = a[:-1,0]
+            y0 = a[:-1,1]
+            x1 = a[1:,0]
+            y1 = a[1:,1]
+            c = x0*y1 - x1*y0
+            r = np.array([
+                np.sum(c)/2.0,
+                np.sum((x0+x1)*c)/6.0,
+                np.sum((y0+y1)*c)/6.0,
+                np.sum((y0*y0 + y0*y1 + y1*y1)*c)/12.0,
+                np.sum((x0*x0 + x0*x1 + x1*x1)*c)/12.0,
+                np.sum((x0*y1 + 2.0*x0*y0 + 2.0*x1*y1 + x1*y0)*c)/24.0])
+            # clockwise rings have a negative area, so flip their sign
+            r *= np.sign(r[0])
+            if i == 0:
+                m += r
+            else:
+                m -= r
+        return m
+
     def plot_edges(self, axes):
         """Plots the polygon edges of this layer."""
         if self.left is None:
@@ -373,7 +415,7 @@ class Layer:
         self.corners = list_of_corners
 
     def write_alt_layer_edges(self, f):
-        """Writes the edges for this alternate layer in the file f."""
+        """Writes the edges for this alternate layer in the TrueGridDeck f."""
         part_name = self.parent_part.__class__.__name__  # part name
         layer_name = self.name  # layer name
         if part_name in ['ShearWeb', 'AftPanel', 'InternalSurface']:
@@ -384,14 +426,10 @@ class Layer:
         # get the edges
         self.get_edges2()
         for edge in self.edges:
-            f.write('curd # lp3\n')
-            for cd_pair in edge:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(
-                    cd_pair[0], cd_pair[1]))
-            f.write(';;\n\n')
+            f.curve('#', edge)
 
     def write_alt_layer_edges2(self, f, start_edge_num, tol=1e-07):
-        """Writes the edges for this alternate layer in the file f.
+        """Writes the edges for this alternate layer in the TrueGridDeck f.
 
         This is an alternate version of the method write_alt_layer_edges()
 
@@ -417,15 +455,11 @@ class Layer:
                 self.edges.pop(bad_edge)
                 print "*** Warning: In '{0},' a small edge was found and thrown out!".format(prefix)
         for edge in self.edges:
-            f.write('curd {0} lp3\n'.format(start_edge_num))
+            f.curve(start_edge_num, edge)
             start_edge_num += 1
-            for cd_pair in edge:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(
-                    cd_pair[0], cd_pair[1]))
-            f.write(';;\n\n')
 
     def write_layer_edges(self, f, start_edge_num, triangular_region=False):
-        """Writes the edges for this layer in the file f.
+        """Writes the edges for this layer in the TrueGridDeck f.
 
         Returns a dictionary of ID numbers for each edge.
         d['<part>, <layer>, left'] : start_edge_num
@@ -440,7 +474,8 @@ class Layer:
 
         Parameters
         ----------
-        f : file object, the handle for the file being written to
+        f : truegrid.TrueGridDeck object, the TrueGrid input file being
+            written to
         start_edge_num : int, the ID number for the first edge being written
 
         """
@@ -462,40 +497,26 @@ class Layer:
                  '{0}; right'.format(prefix) : start_edge_num+2,
                  '{0}; top'.format(prefix) : start_edge_num+3}
         # left edge
-        f.write('curd {0} lp3\n'.format(start_edge_num))
-        for cd_pair in self.left:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(start_edge_num, self.left)
         # bottom edge
-        f.write('curd {0} lp3\n'.format(start_edge_num+1))
-        for cd_pair in self.bottom:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(start_edge_num+1, self.bottom)
         if triangular_region:
             # top edge
-            f.write('curd {0} lp3\n'.format(start_edge_num+2))
-            for cd_pair in self.top:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-            f.write(';;\n\n')
+            f.curve(start_edge_num+2, self.top)
         else:
             # right edge
-            f.write('curd {0} lp3\n'.format(start_edge_num+2))
-            for cd_pair in self.right:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-            f.write(';;\n\n')
+            f.curve(start_edge_num+2, self.right)
             # top edge
-            f.write('curd {0} lp3\n'.format(start_edge_num+3))
-            for cd_pair in self.top:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-            f.write(';;\n\n')
+            f.curve(start_edge_num+3, self.top)
         return d
 
     def write_layer_edges2(self, f, curve_num_placeholder='#'):
-        """Writes the edges for this layer in the file f.
+        """Writes the edges for this layer in the TrueGridDeck f.
 
         Parameters
         ----------
-        f : file object, the handle for the file being written to
+        f : truegrid.TrueGridDeck object, the TrueGrid input file being
+            written to
 
         """
         part_name = self.parent_part.__class__.__name__  # part name
@@ -506,25 +527,13 @@ class Layer:
         else:
             prefix = '{0}; {1}'.format(part_name, layer_name)
         # left edge
-        f.write('curd {0} lp3\n'.format(curve_num_placeholder))
-        for cd_pair in self.left:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(curve_num_placeholder, self.left)
         # bottom edge
-        f.write('curd {0} lp3\n'.format(curve_num_placeholder))
-        for cd_pair in self.bottom:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(curve_num_placeholder, self.bottom)
         # right edge
-        f.write('curd {0} lp3\n'.format(curve_num_placeholder))
-        for cd_pair in self.right:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(curve_num_placeholder, self.right)
         # top edge
-        f.write('curd {0} lp3\n'.format(curve_num_placeholder))
-        for cd_pair in self.top:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
-        f.write(';;\n\n')
+        f.curve(curve_num_placeholder, self.top)
 
     def write_polygon_edges(self, airfoil=None):
         """Write edges for this layer's polygon to a file in `station_path`."""
@@ -554,8 +563,7 @@ class Layer:
         # exterior
         f.write('# exterior:\n')
         f.write('# ---------\n')
-        for cd_pair in self.polygon.exterior.coords:
-            f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
+        f.write(tu.format_block(self.polygon.exterior.coords, tu.coords_fmt))
         f.write(';;\n\n')
         # interior
         try:
@@ -564,8 +572,7 @@ class Layer:
             interior = self.polygon.interiors[0]
             f.write('# interior:\n')
             f.write('# ---------\n')
-            for cd_pair in interior.coords:
-                f.write('{0: .8f}  {1: .8f}  0.0\n'.format(cd_pair[0], cd_pair[1]))
+            f.write(tu.format_block(interior.coords, tu.coords_fmt))
             f.write(';;\n\n')
         except IndexError:
             # no interior coords exist
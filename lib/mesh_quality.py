@@ -0,0 +1,354 @@
+"""Measure the quality of every element in a cross-section grid, all at once.
+
+A bad element is usually found when VABS fails, or when
+grid.QuadrilateralLinearElement raises "Element is bad! Its nodes are not
+oriented CCW." These functions check a whole grid (from an ABAQUS file, or
+from the builtin mesher) in one vectorized pass, so a bad mesh can be rejected
+before it is sent to VABS.
+
+For each element, these quality metrics are computed:
+- min_jacobian : the smallest determinant of the Jacobian at the Gauss points
+  (negative for an element that is turned inside out)
+- scaled_jacobian : min_jacobian divided by the largest absolute determinant
+  at the Gauss points (1 for a parallelogram with straight sides, <= 0 for an
+  element that is turned inside out, -1 for a parallelogram with CW nodes)
+- aspect_ratio : the longest side divided by the shortest side (1 is best)
+- skew : the equiangle skew, from the corner angles (0 for a square or an
+  equilateral triangle, 1 for a degenerate element)
+- midside_offset : the largest distance from a mid-side node to the middle of
+  its straight side, divided by the length of that side (0 for straight
+  sides; 0 for linear elements)
+- min_angle : the smallest corner angle, in degrees
+
+Usage
+-----
+import lib.abaqus_utils2 as au
+import lib.mesh_quality as mq
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+q = mq.element_quality(g)
+q['scaled_jacobian'].values  # numpy array, one entry for each element
+mq.summarize(q)              # one row for each element set
+bad = mq.bad_elements(q, min_scaled_jacobian=0.1)
+if len(bad) > 0:
+    raise Warning("The grid has {0} bad elements!".format(len(bad)))
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+import pandas as pd
+import grid as gr
+reload(gr)
+
+
+# Gauss points (xi, eta) for each element shape
+_a = np.sqrt(0.6)
+_gauss_points = {
+    'quad4': np.array([(xi, eta) for xi in [-1.0/np.sqrt(3.0), 1.0/np.sqrt(3.0)]
+        for eta in [-1.0/np.sqrt(3.0), 1.0/np.sqrt(3.0)]]),
+    'quad8': np.array([(xi, eta) for xi in [-_a, 0.0, _a]
+        for eta in [-_a, 0.0, _a]]),
+    'tri3': np.array([(1.0/3.0, 1.0/3.0)]),
+    'tri6': np.array([(1.0/6.0, 1.0/6.0), (2.0/3.0, 1.0/6.0),
+        (1.0/6.0, 2.0/3.0)])
+    }
+# columns of grid.connectivity_arrays() used by each element shape
+node_slots = {
+    'quad4': [0, 1, 2, 3],
+    'quad8': [0, 1, 2, 3, 4, 5, 6, 7],
+    'tri3': [0, 1, 2],
+    'tri6': [0, 1, 2, 4, 5, 6]
+    }
+# columns of grid.connectivity_arrays() around the boundary of each element
+#   shape, in CCW order
+boundary_slots = {
+    'quad4': [0, 1, 2, 3],
+    'quad8': [0, 4, 1, 5, 2, 6, 3, 7],
+    'tri3': [0, 1, 2],
+    'tri6': [0, 4, 1, 5, 2, 6]
+    }
+
+
+def shape_functions(shape, points):
+    """Returns the values of the shape functions at some points.
+
+    Parameters
+    ----------
+    shape : str, 'quad4', 'quad8', 'tri3', or 'tri6'
+    points : np.array, shape (G,2), the (xi, eta) coords of each point, in the
+        parent element (-1 <= xi, eta <= 1 for quadrilaterals, and
+        0 <= xi, eta, xi+eta <= 1 for triangles)
+
+    Returns
+    -------
+    N : np.array, shape (G,n), N[g,i] = N_i at point g, for each node i (in
+        the VABS order: corners, then mid-sides)
+
+    """
+    xi = points[:,0][:,np.newaxis]
+    eta = points[:,1][:,np.newaxis]
+    if shape in ['quad4', 'quad8']:
+        xi_i = np.array([-1.0, 1.0, 1.0, -1.0])
+        eta_i = np.array([-1.0, -1.0, 1.0, 1.0])
+        N = (1.0 + xi*xi_i)*(1.0 + eta*eta_i)/4.0
+        if shape == 'quad8':
+            # corner nodes
+            N = N*(xi*xi_i + eta*eta_i - 1.0)
+            # mid-side nodes 5, 6, 7, 8
+            N = np.hstack((N, (1.0 - xi**2)*(1.0 - eta)/2.0,
+                (1.0 + xi)*(1.0 - eta**2)/2.0, (1.0 - xi**2)*(1.0 + eta)/2.0,
+                (1.0 - xi)*(1.0 - eta**2)/2.0))
+    elif shape in ['tri3', 'tri6']:
+        # area coordinates: L1 = 1-xi-eta, L2 = xi, L3 = eta
+        L = np.hstack((1.0 - xi - eta, xi, eta))
+        if shape == 'tri3':
+            N = L
+        else:
+            N = np.hstack((L*(2.0*L - 1.0), 4.0*L[:,[0]]*L[:,[1]],
+                4.0*L[:,[1]]*L[:,[2]], 4.0*L[:,[2]]*L[:,[0]]))
+    else:
+        raise ValueError("Unknown element shape '{0}'!".format(shape))
+    return N
+
+def shape_function_derivatives(shape, points):
+    """Returns the derivatives of the shape functions at some points.
+
+    Parameters
+    ----------
+    shape : str, 'quad4', 'quad8', 'tri3', or 'tri6'
+    points : np.array, shape (G,2), the (xi, eta) coords of each point, in the
+        parent element (-1 <= xi, eta <= 1 for quadrilaterals, and
+        0 <= xi, eta, xi+eta <= 1 for triangles)
+
+    Returns
+    -------
+    dN : np.array, shape (G,n,2), dN[g,i] = (dN_i/dxi, dN_i/deta) at point
+        g, for each node i (in the VABS order: corners, then mid-sides)
+
+    """
+    xi = points[:,0][:,np.newaxis]
+    eta = points[:,1][:,np.newaxis]
+    if shape in ['quad4', 'quad8']:
+        xi_i = np.array([-1.0, 1.0, 1.0, -1.0])
+        eta_i = np.array([-1.0, -1.0, 1.0, 1.0])
+        if shape == 'quad4':
+            dxi = xi_i*(1.0 + eta*eta_i)/4.0
+            deta = eta_i*(1.0 + xi*xi_i)/4.0
+        else:
+            # corner nodes
+            dxi = xi_i*(1.0 + eta*eta_i)*(2.0*xi*xi_i + eta*eta_i)/4.0
+            deta = eta_i*(1.0 + xi*xi_i)*(xi*xi_i + 2.0*eta*eta_i)/4.0
+            # mid-side nodes 5, 6, 7, 8
+            dxi = np.hstack((dxi, -xi*(1.0 - eta), (1.0 - eta**2)/2.0,
+                -xi*(1.0 + eta), -(1.0 - eta**2)/2.0))
+            deta = np.hstack((deta, -(1.0 - xi**2)/2.0, -eta*(1.0 + xi),
+                (1.0 - xi**2)/2.0, -eta*(1.0 - xi)))
+    elif shape in ['tri3', 'tri6']:
+        # area coordinates: L1 = 1-xi-eta, L2 = xi, L3 = eta
+        L1 = 1.0 - xi - eta
+        L2 = xi
+        L3 = eta
+        one = np.ones_like(xi)
+        zero = np.zeros_like(xi)
+        if shape == 'tri3':
+            dxi = np.hstack((-one, one, zero))
+            deta = np.hstack((-one, zero, one))
+        else:
+            dxi = np.hstack((-(4.0*L1 - 1.0), 4.0*L2 - 1.0, zero,
+                4.0*(L1 - L2), 4.0*L3, -4.0*L3))
+            deta = np.hstack((-(4.0*L1 - 1.0), zero, 4.0*L3 - 1.0,
+                -4.0*L2, 4.0*L2, 4.0*(L1 - L3)))
+    else:
+        raise ValueError("Unknown element shape '{0}'!".format(shape))
+    return np.dstack((dxi, deta))
+
+def element_shapes(conn):
+    """Returns the shape of each element: 'quad4', 'quad8', 'tri3', or 'tri6'.
+
+    Parameters
+    ----------
+    conn : np.array of ints, shape (E,9), from grid.connectivity_arrays()
+
+    """
+    quad = conn[:,3] >= 0
+    quadratic = conn[:,4] >= 0
+    shapes = np.empty(len(conn), dtype=object)
+    shapes[quad & ~quadratic] = 'quad4'
+    shapes[quad & quadratic] = 'quad8'
+    shapes[~quad & ~quadratic] = 'tri3'
+    shapes[~quad & quadratic] = 'tri6'
+    return shapes
+
+def jacobian_determinants(x, conn, shape):
+    """Returns the Jacobian determinants at the Gauss points of some elements.
+
+    Parameters
+    ----------
+    x : np.array, shape (N,2), the node coords
+    conn : np.array of ints, shape (E,9), the connectivity of E elements,
+        which all have the same shape
+    shape : str, 'quad4', 'quad8', 'tri3', or 'tri6'
+
+    Returns
+    -------
+    det_J : np.array, shape (E,G), for G Gauss points in each element
+
+    """
+    X = x[conn[:,node_slots[shape]]]   # (E,n,2)
+    dN = shape_function_derivatives(shape, _gauss_points[shape])  # (G,n,2)
+    # J[e,g,a,b] = d(x_a)/d(xi_b) at Gauss point g of element e
+    J = np.einsum('ena,gnb->egab', X, dN)
+    return J[:,:,0,0]*J[:,:,1,1] - J[:,:,0,1]*J[:,:,1,0]
+
+def corner_metrics(x, conn, num_corners):
+    """Returns the aspect ratio, skew, and min angle of some elements.
+
+    Parameters
+    ----------
+    x : np.array, shape (N,2), the node coords
+    conn : np.array of ints, shape (E,9), the connectivity of E elements,
+        which all have num_corners corners
+    num_corners : int, 3 (triangles) or 4 (quadrilaterals)
+
+    Returns
+    -------
+    aspect_ratio, skew, min_angle : np.arrays, shape (E,)
+
+    """
+    C = x[conn[:,:num_corners]]                 # (E,k,2)
+    v_next = np.roll(C, -1, axis=1) - C
+    v_prev = np.roll(C, 1, axis=1) - C
+    lengths = np.hypot(v_next[:,:,0], v_next[:,:,1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aspect_ratio = lengths.max(axis=1)/lengths.min(axis=1)
+    # interior angle at each corner (for CCW nodes)
+    cross = v_next[:,:,0]*v_prev[:,:,1] - v_next[:,:,1]*v_prev[:,:,0]
+    dot = (v_next*v_prev).sum(axis=2)
+    angles = np.degrees(np.arctan2(cross, dot)) % 360.0
+    ideal = 180.0*(num_corners-2)/num_corners
+    skew = np.maximum((angles.max(axis=1) - ideal)/(180.0 - ideal),
+        (ideal - angles.min(axis=1))/ideal)
+    return (aspect_ratio, skew, angles.min(axis=1))
+
+def midside_offsets(x, conn, num_corners):
+    """Returns the largest mid-side node offset of some quadratic elements.
+
+    The offset of a mid-side node is its distance from the middle of the
+    straight line between its corner nodes, divided by the length of that
+    line.
+
+    """
+    C = x[conn[:,:num_corners]]
+    M = x[conn[:,4:4+num_corners]]
+    C_next = np.roll(C, -1, axis=1)
+    offset = M - (C + C_next)/2.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = (np.hypot(offset[:,:,0], offset[:,:,1]) /
+            np.hypot(*(C_next - C).transpose(2,0,1)))
+    return ratio.max(axis=1)
+
+def element_quality(grid):
+    """Returns a table of quality metrics, with one row for each element.
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+
+    Returns
+    -------
+    q : pandas.DataFrame, indexed by elem_num, with columns element_set,
+        shape, min_jacobian, scaled_jacobian, aspect_ratio, skew,
+        midside_offset, and min_angle (see the top of this module)
+
+    """
+    (x, conn) = gr.connectivity_arrays(grid)
+    shapes = element_shapes(conn)
+    E = len(conn)
+    columns = ['min_jacobian', 'scaled_jacobian', 'aspect_ratio', 'skew',
+        'midside_offset', 'min_angle']
+    m = dict([(c, np.zeros(E)) for c in columns])
+    for shape in ['quad4', 'quad8', 'tri3', 'tri6']:
+        mask = shapes == shape
+        if not mask.any():
+            continue
+        c = conn[mask]
+        num_corners = 4 if shape.startswith('quad') else 3
+        det_J = jacobian_determinants(x, c, shape)
+        m['min_jacobian'][mask] = det_J.min(axis=1)
+        # divide by the largest |det_J|, so an element that is turned inside
+        #   out (all det_J < 0) is scaled to -1, not +1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m['scaled_jacobian'][mask] = (det_J.min(axis=1) /
+                np.abs(det_J).max(axis=1))
+        (m['aspect_ratio'][mask], m['skew'][mask],
+            m['min_angle'][mask]) = corner_metrics(x, c, num_corners)
+        if shape in ['quad8', 'tri6']:
+            m['midside_offset'][mask] = midside_offsets(x, c, num_corners)
+    q = pd.DataFrame(m, columns=columns,
+        index=pd.Index([el.elem_num for el in grid.list_of_elements],
+            name='elem_num'))
+    q.insert(0, 'element_set', [el.element_set for el in grid.list_of_elements])
+    q.insert(1, 'shape', shapes)
+    return q
+
+def summarize(q, min_scaled_jacobian=0.0):
+    """Returns a table of the worst quality metrics in each element set.
+
+    Parameters
+    ----------
+    q : pandas.DataFrame, from element_quality()
+    min_scaled_jacobian : float (default: 0.0), elements with a scaled
+        Jacobian at or below this value are counted as bad
+
+    Returns
+    -------
+    s : pandas.DataFrame, indexed by element set, with columns
+        number_of_elements, number_of_bad_elements, min_scaled_jacobian,
+        max_aspect_ratio, max_skew, max_midside_offset, and min_angle
+
+    """
+    q = q.copy()
+    q['element_set'] = q['element_set'].fillna('(none)')
+    q['bad'] = q['scaled_jacobian'] <= min_scaled_jacobian
+    g = q.groupby('element_set')
+    s = pd.DataFrame({
+        'number_of_elements': g.size(),
+        'number_of_bad_elements': g['bad'].sum().astype(int),
+        'min_scaled_jacobian': g['scaled_jacobian'].min(),
+        'max_aspect_ratio': g['aspect_ratio'].max(),
+        'max_skew': g['skew'].max(),
+        'max_midside_offset': g['midside_offset'].max(),
+        'min_angle': g['min_angle'].min()},
+        columns=['number_of_elements', 'number_of_bad_elements',
+            'min_scaled_jacobian', 'max_aspect_ratio', 'max_skew',
+            'max_midside_offset', 'min_angle'])
+    return s
+
+def bad_elements(q, min_scaled_jacobian=0.0, max_aspect_ratio=None,
+    max_skew=None, max_midside_offset=None, min_angle=None):
+    """Returns the rows of q for elements that fail any of the limits.
+
+    Parameters
+    ----------
+    q : pandas.DataFrame, from element_quality()
+    min_scaled_jacobian : float (default: 0.0), elements with a scaled
+        Jacobian at or below this value fail (the default catches elements
+        that are turned inside out)
+    max_aspect_ratio, max_skew, max_midside_offset, min_angle : float
+        (default: None), optional limits for the other metrics
+
+    """
+    bad = ~(q['scaled_jacobian'] > min_scaled_jacobian)
+    if max_aspect_ratio is not None:
+        bad |= ~(q['aspect_ratio'] <= max_aspect_ratio)
+    if max_skew is not None:
+        bad |= ~(q['skew'] <= max_skew)
+    if max_midside_offset is not None:
+        bad |= ~(q['midside_offset'] <= max_midside_offset)
+    if min_angle is not None:
+        bad |= ~(q['min_angle'] >= min_angle)
+    return q[bad]
@@ -0,0 +1,811 @@
+"""Mesh the layers of a cross-section with a built-in transfinite mesher.
+
+Each layer region (an uncut layer, like a spar cap or a shear web, or an
+alternate layer cut from a ring, see poly_utils.partition_alt_layers()) has
+four sides, or three sides for a triangular region. Every region is meshed
+with 8-noded quadrilateral elements by transfinite interpolation (a Coons
+patch) between its sides. A triangular region is meshed as a quadrilateral
+with one collapsed side, so the elements along that side are 6-noded
+triangles.
+
+Neighboring regions share the nodes along their common boundaries:
+- the corners of every region are "hard points," and the sides of each region
+  are split at the hard points of its neighbors (e.g. where the corners of the
+  spar cap touch the inner side of the external surface)
+- each piece of a side (a "sub-edge") gets the same number of elements, and
+  the same node coordinates, in every region that shares it
+- the number of elements on opposite sides of each region are balanced, so
+  the transfinite interpolation is possible
+- sharp bends on the inner and outer sides of each region are paired up as
+  hard points, so the nodes on both sides line up around each bend (a sharp
+  bend on one side may be rounded off on the other side)
+
+If the transfinite interpolation turns any elements of a region inside out
+(e.g. where the outer side wraps around a flatback TE, but the inner side
+doesn't), the interior nodes of that region are smoothed until they untangle
+(see smooth()).
+
+The resulting grid has the same node, element, and element set structure as
+an abaqus_utils2.AbaqusGrid object, so it can be written straight to a VABS
+input file, without meshing in TrueGrid.
+
+Usage
+-----
+import lib.poly_utils as pu
+import lib.mesher as mh
+import lib.vabs_utils as vu
+station.airfoil.create_polygon()
+station.structure.create_all_layers()
+station.structure.save_all_layer_edges()
+st = station.structure
+new_layers = pu.partition_alt_layers(st)
+g = mh.TransfiniteGrid(new_layers + pu.uncut_layers(st), element_size=0.02)
+g.number_of_nodes
+g.list_of_elements[0].element_set
+f = vu.VabsInputFile(vabs_filename='sandia_blade/stn01/mesh_stn01.vabs',
+    grid=g, material_filename='sandia_blade/materials.csv',
+    layer_filename='sandia_blade/layers.csv', flags={...})
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+from shapely.geometry import LineString, Point, MultiLineString
+from shapely.geometry.polygon import orient
+from shapely.ops import cascaded_union
+import grid as gr
+reload(gr)
+
+
+def element_set_name(layer):
+    """Returns the element set name for a layer, e.g. 'ShearWeb1; foam'.
+
+    The names match the comments in the TrueGrid input files. In a biplane
+    station, the names start with the airfoil, e.g. 'lower SparCap; upper'.
+
+    """
+    part = layer.parent_part
+    part_name = part.__class__.__name__
+    if part_name in ['ShearWeb', 'AftPanel', 'InternalSurface']:
+        name = '{0}{1}; {2}'.format(part_name, part.num, layer.name)
+    else:
+        name = '{0}; {1}'.format(part_name, layer.name)
+    for (attr, value) in vars(part.parent_structure).items():
+        if value is part and attr.split('_')[0] in ['lower', 'upper']:
+            name = attr.split('_')[0] + ' ' + name
+    return name
+
+def cumulative_length(a):
+    """Returns the arc length at each point of the polyline a, shape (n,2)."""
+    return np.append(0.0, np.cumsum(np.hypot(*np.diff(a, axis=0).T)))
+
+def resample(a, num):
+    """Returns num points spaced evenly along the arc length of polyline a.
+
+    The first and last points of a are kept exactly.
+
+    """
+    s = cumulative_length(a)
+    t = np.linspace(0.0, s[-1], num)
+    b = np.column_stack((np.interp(t, s, a[:,0]), np.interp(t, s, a[:,1])))
+    b[0] = a[0]
+    b[-1] = a[-1]
+    return b
+
+def turning_angles(a):
+    """Returns the turning angle (radians) at each vertex of the closed loop a.
+
+    The loop a, shape (n,2), does not repeat its first point at the end.
+
+    """
+    d_in = a - np.roll(a, 1, axis=0)
+    d_out = np.roll(a, -1, axis=0) - a
+    cross = d_in[:,0]*d_out[:,1] - d_in[:,1]*d_out[:,0]
+    dot = (d_in*d_out).sum(axis=1)
+    return np.abs(np.arctan2(cross, dot))
+
+def _remove_duplicate_points(a, tol):
+    """Removes consecutive points of the closed loop a closer than tol."""
+    keep = np.hypot(*(a - np.roll(a, 1, axis=0)).T) >= tol
+    return a[keep]
+
+def _group_pieces(pieces, bends):
+    """Splits a side into lists of sub-edge IDs, at each bend (hard point ID).
+
+    Returns None if a bend isn't at the end of one of the pieces.
+
+    """
+    groups = [[]]
+    remaining = list(bends)
+    for (e, rev, end) in pieces:
+        groups[-1].append(e)
+        if len(remaining) > 0 and end == remaining[0]:
+            remaining.pop(0)
+            groups.append([])
+    if len(remaining) > 0 or len(groups[-1]) == 0:
+        return None
+    return groups
+
+def region_corners(layer, tol=1.0e-06):
+    """Returns the CCW exterior of a layer, and the indices of its corners.
+
+    The corners come from:
+    - <layer>.corners, for an alternate layer (saved by find_corners())
+    - the ends of <layer>.left, .top, .right, and .bottom, for an uncut layer
+      (saved by <structure>.save_all_layer_edges())
+    - the 4 sharpest vertices of the layer, otherwise
+    Corners closer than tol are merged, and corners at the tip of a hairline
+    spike are thrown out (along with the spike). If more than 4 corners are
+    left (e.g. where a cut touches a hairline sliver), only the corners next
+    to another corner are kept, and then only the 4 sharpest.
+
+    Returns
+    -------
+    a : np.array, shape (n,2), the CCW exterior of the layer, without
+        repeating its first point at the end
+    idx : list of ints, the indices of 3 or 4 corners in a, in CCW order
+
+    """
+    a = np.array(orient(layer.polygon).exterior.coords)[:-1]
+    a = _remove_duplicate_points(a, tol)
+    # remove the tips of hairline spikes, where the exterior doubles back on
+    #   itself (e.g. where a cut just touches a hairline sliver)
+    angles = turning_angles(a)
+    while (angles > np.pi-1.0e-03).any() and len(a) > 4:
+        a = _remove_duplicate_points(a[angles <= np.pi-1.0e-03], tol)
+        angles = turning_angles(a)
+    if len(layer.corners) > 0:
+        pts = [(c.x, c.y) for c in layer.corners]
+    elif layer.left is not None:
+        pts = []
+        for edge in [layer.left, layer.top, layer.right, layer.bottom]:
+            if edge is not None:
+                pts.extend([edge[0], edge[-1]])
+    else:
+        pts = [a[i] for i in np.argsort(angles)[-4:]]
+    idx = []
+    for pt in pts:
+        d = np.hypot(*(a - pt).T)
+        i = int(np.argmin(d))
+        if d[i] < tol and all([np.hypot(*(a[i]-a[j])) >= tol for j in idx]):
+            idx.append(i)
+    if len(idx) > 4:
+        # the corners of an alternate layer come in pairs, joined by an edge
+        #   along the cut; throw out corners where the layer only touches the
+        #   cut (e.g. at the tip of a hairline sliver)
+        paired = [i for i in idx
+            if (i-1) % len(a) in idx or (i+1) % len(a) in idx]
+        if len(paired) >= 3:
+            idx = paired
+    if len(idx) > 4:
+        idx = sorted(idx, key=lambda i: angles[i])[-4:]
+    if len(idx) < 3:
+        raise ValueError("Found {0} corners in '{1}'; a region needs 3 or 4 corners!".format(len(idx), element_set_name(layer)))
+    idx.sort()
+    return (a, idx)
+
+
+class TransfiniteGrid:
+    """Mesh a list of four-sided (or three-sided) layer regions.
+
+    Parameters
+    ----------
+    list_of_layers : list of layer.Layer objects, the regions to mesh (e.g.
+        the alternate layers from poly_utils.partition_alt_layers(), plus the
+        layers from poly_utils.uncut_layers())
+    element_size : float (default: 0.02), the target length (meters) of the
+        element sides; every sub-edge gets at least one element
+    tol : float (default: 1.0e-06), geometric tolerance (meters) for merging
+        corners and finding hard points on the sides of each region
+    bend_angle : float (default: 45.0), the smallest turning angle (degrees)
+        of a sharp bend along the inner or outer side of a region
+    max_iterations : int (default: 1000), the maximum number of passes over
+        the regions to balance the elements on opposite sides
+    max_smoothing_iterations : int (default: 1000), the maximum number of
+        smoothing passes over the interior nodes of a region with inverted
+        elements (see smooth())
+
+    Public attributes
+    -----------------
+    filename : None, there is no grid file (for compatibility with
+        abaqus_utils2.AbaqusGrid)
+    list_of_nodes : list of grid.Node objects, numbered from 1
+    list_of_elements : list of grid.QuadrilateralQuadraticElement and
+        grid.TriangularQuadraticElement objects, numbered from 1, with
+        element_set, layer_num (the material number), and theta1 (the layer
+        plane angle, in degrees) assigned
+    number_of_nodes : int
+    number_of_elements : int
+    hanging_edges : dict, the number of element edges in each element set
+        that don't match the edge of a neighboring element (should be empty)
+    inverted_elements : dict, the number of elements in each element set
+        that are turned inside out, e.g. where a layer bends sharply on only
+        one side (should be empty)
+
+    Usage
+    -----
+    g = TransfiniteGrid(new_layers + pu.uncut_layers(st), element_size=0.02)
+
+    """
+    def __init__(self, list_of_layers, element_size=0.02, tol=1.0e-06,
+        bend_angle=45.0, max_iterations=1000, max_smoothing_iterations=1000):
+        self.filename = None
+        self.list_of_layers = list_of_layers
+        self.element_size = element_size
+        self.tol = tol
+        self.bend_angle = np.radians(bend_angle)
+        self.max_smoothing_iterations = max_smoothing_iterations
+        self.list_of_nodes = []
+        self.list_of_elements = []
+        self.number_of_nodes = 0
+        self.number_of_elements = 0
+        self.hanging_edges = {}
+        self.inverted_elements = {}
+        self._hard_points = []
+        self._sub_edges = []
+        self._sub_edge_lookup = {}
+        self._regions = []
+        self._find_regions()
+        self._balance_divisions(max_iterations)
+        self._mesh_regions()
+        self._find_hanging_edges()
+        self._find_inverted_elements()
+
+    def _hard_point(self, pt):
+        """Returns the ID of the hard point at pt, and adds it if it's new."""
+        if len(self._hard_points) > 0:
+            d = np.hypot(*(np.array(self._hard_points) - pt).T)
+            i = int(np.argmin(d))
+            if d[i] < self.tol:
+                return i
+        self._hard_points.append(np.array(pt, dtype=float))
+        return len(self._hard_points)-1
+
+    def _sub_edge(self, a, start, end):
+        """Returns (ID, reversed flag) of the sub-edge along polyline a.
+
+        The sub-edge runs from hard point `start` to hard point `end`. If a
+        neighboring region already added the same sub-edge, its ID is
+        returned, so both regions share its nodes.
+
+        """
+        key = (min(start, end), max(start, end))
+        length = cumulative_length(a)[-1]
+        mid = LineString(a).interpolate(0.5, normalized=True)
+        for e in self._sub_edge_lookup.get(key, []):
+            if e['mid'].distance(mid) < 0.01*length + self.tol:
+                return (e['id'], e['start'] != start)
+        e = {'id': len(self._sub_edges), 'start': start, 'coords': a,
+            'length': length, 'mid': mid,
+            'num': max(1, int(np.ceil(length/self.element_size)))}
+        self._sub_edges.append(e)
+        self._sub_edge_lookup.setdefault(key, []).append(e)
+        return (e['id'], False)
+
+    def _find_regions(self):
+        """Split each region into 4 sides, and each side into sub-edges.
+
+        The sides of each region are saved in CCW order, starting with its
+        inner side: [inner, right end, outer, left end]. The elements are
+        oriented the same way, so node1 -> node2 runs along the inner side,
+        and theta1 follows the VABS convention for the layer plane angle
+        (e.g. 0 on the upper surface, 180 on the lower surface).
+
+        A triangular region gets a collapsed side (None), opposite its
+        shortest side.
+
+        Sharp bends along the inner and outer sides (e.g. where an internal
+        surface turns the corner from a panel onto a shear web) are paired up,
+        and saved as hard points, so the nodes on both sides line up at each
+        bend. A hard point at a bend of one region may be on a rounded bend of
+        its neighbor (e.g. in the layers on the outside of a sharp bend), so
+        the bends are found again, until no new hard points are added.
+
+        """
+        tol = self.tol
+        outline = cascaded_union([layer.polygon.buffer(tol)
+            for layer in self.list_of_layers])
+        outline = MultiLineString([p.exterior
+            for p in getattr(outline, 'geoms', [outline])])
+        # split each region at its corners, and orient its sides
+        oriented = []
+        for layer in self.list_of_layers:
+            (a, idx) = region_corners(layer, tol)
+            ids = [self._hard_point(a[i]) for i in idx]
+            sides = []
+            for m in range(len(idx)):
+                if m < len(idx)-1:
+                    side = a[idx[m]:idx[m+1]+1]
+                else:
+                    side = np.vstack((a[idx[m]:], a[:idx[0]+1]))
+                side = side.copy()
+                side[0] = self._hard_points[ids[m]]
+                side[-1] = self._hard_points[ids[(m+1) % len(idx)]]
+                sides.append((side, ids[m], ids[(m+1) % len(idx)]))
+            if len(sides) == 3:
+                # collapse the corner opposite the shortest side
+                k = int(np.argmin([cumulative_length(s[0])[-1]
+                    for s in sides]))
+                sides = [sides[(k+2) % 3], sides[k], sides[(k+1) % 3], None]
+            # find the pair of sides that run along the layer
+            if sides[3] is not None:
+                if layer.parent_part.__class__.__name__ == 'ShearWeb':
+                    # the long sides of a shear web are its vertical walls
+                    dy = [np.abs(np.diff(s[0][:,1])).sum() for s in sides]
+                    r = 0 if dy[0]+dy[2] >= dy[1]+dy[3] else 1
+                else:
+                    length = [cumulative_length(s[0])[-1] for s in sides]
+                    r = 0 if length[0]+length[2] >= length[1]+length[3] else 1
+            else:
+                r = 0
+            # find the inner side of the pair
+            if layer.parent_part.__class__.__name__ == 'ShearWeb':
+                # the outer wall of shear web 1 faces the LE, and the outer
+                #   walls of shear webs 2 and 3 face the TE
+                x = [sides[r][0][:,0].mean(), sides[r+2][0][:,0].mean()]
+                if layer.parent_part.num == 1:
+                    outer = r if x[0] < x[1] else r+2
+                else:
+                    outer = r if x[0] > x[1] else r+2
+            else:
+                # the outer side is closer to the surface of the airfoil
+                d = [np.mean([outline.distance(Point(pt))
+                    for pt in resample(sides[s][0], 11)]) for s in [r, r+2]]
+                outer = r if d[0] < d[1] else r+2
+            inner = (outer+2) % 4
+            sides = sides[inner:] + sides[:inner]
+            oriented.append((layer, sides))
+        # find the bends of each region
+        for iteration in range(len(oriented)):
+            num_hard_points = len(self._hard_points)
+            list_of_bends = [self._find_bends(sides)
+                for (layer, sides) in oriented]
+            if len(self._hard_points) == num_hard_points:
+                break
+        # split each side at the hard points of its neighbors
+        for ((layer, sides), bends) in zip(oriented, list_of_bends):
+            pieces = [None if side is None else self._split_side(*side)
+                for side in sides]
+            # pair up the sub-edges on opposite sides, between the bends
+            pairs = []
+            if pieces[1] is not None and pieces[3] is not None:
+                pairs.append(([e for (e, rev, end) in pieces[1]],
+                    [e for (e, rev, end) in pieces[3]]))
+            inner = _group_pieces(pieces[0], [b[0] for b in bends])
+            outer = _group_pieces(pieces[2], [b[1] for b in bends[::-1]])
+            if inner is None or outer is None:
+                inner = [[e for (e, rev, end) in pieces[0]]]
+                outer = [[e for (e, rev, end) in pieces[2]]]
+            pairs.extend(zip(inner, outer[::-1]))
+            self._regions.append({'layer': layer,
+                'sides': [None if p is None else [(e, rev)
+                    for (e, rev, end) in p] for p in pieces],
+                'pairs': pairs,
+                'element_set': element_set_name(layer)})
+
+    def _find_bends(self, sides):
+        """Returns a list of hard point IDs at matching bends of a region.
+
+        Each item is a pair (ID on the inner side, ID on the outer side). A
+        bend on the inner side is paired with the nearest bend on the outer
+        side, if they are each other's nearest bend, and they are close
+        together (within a few thicknesses of the layer). Bends without a
+        partner are ignored.
+
+        A sharp bend on one side may be rounded off on the other side (e.g. a
+        fillet on the outside of a sharp inner corner), where the side turns by
+        more than bend_angle within one thickness, without a sharp bend of its
+        own. So a bend without a partner is paired with the point across from
+        it on the other side (along the bisector of a sharp bend), if the
+        other side is rounded off there. The hard points on a rounded bend
+        (e.g. from a bend of a neighboring region) are bends, too; the point
+        across from one of them is the nearest point on the other side.
+
+        """
+        if sides[1] is None or sides[3] is None:
+            return []
+        thickness = max([cumulative_length(sides[s][0])[-1] for s in [1, 3]])
+        def rounded(a, s_pt):
+            # does side a turn by more than bend_angle within one thickness of
+            #   arc length s_pt, without a sharp bend?
+            w = turning_angles(a)[1:-1][
+                np.abs(cumulative_length(a)[1:-1] - s_pt) <= thickness]
+            return (len(w) > 0 and w.sum() > self.bend_angle and
+                w.max() <= self.bend_angle)
+        def bends(side):
+            # returns the points at the bends of a side, and the direction
+            #   across each bend (None at a hard point on a rounded bend)
+            a = side[0]
+            ls = LineString(a)
+            list_of_bends = []
+            for i in np.nonzero(turning_angles(a)[1:-1] > self.bend_angle)[0]+1:
+                u_in = (a[i] - a[i-1])/np.hypot(*(a[i] - a[i-1]))
+                u_out = (a[i+1] - a[i])/np.hypot(*(a[i+1] - a[i]))
+                list_of_bends.append((a[i], u_out - u_in))
+            for (s_h, h) in self._hard_points_on(*side):
+                if rounded(a, s_h):
+                    list_of_bends.append((self._hard_points[h], None))
+            list_of_bends.sort(key=lambda (pt, n): ls.project(Point(pt)))
+            return list_of_bends
+        def across(a, pt, n):
+            # the point on side a across from pt, if a is rounded off there
+            ls = LineString(a)
+            if n is None:
+                q = np.array(ls.interpolate(ls.project(Point(pt))).coords[0])
+            else:
+                n = 3.0*thickness*n/np.hypot(*n)
+                x = LineString([pt - n, pt + n]).intersection(ls)
+                pts = [np.array(p.coords[0]) for p in getattr(x, 'geoms', [x])
+                    if p.geom_type == 'Point']
+                if len(pts) == 0:
+                    return None
+                q = min(pts, key=lambda q: np.hypot(*(q - pt)))
+            if (np.hypot(*(q - pt)) < 3.0*thickness and
+                rounded(a, ls.project(Point(q)))):
+                return q
+            return None
+        (a_inner, a_outer) = (sides[0][0], sides[2][0])
+        inner_bends = bends(sides[0])
+        outer_bends = bends(sides[2])[::-1]
+        inner = np.array([pt for (pt, n) in inner_bends]).reshape(-1, 2)
+        outer = np.array([pt for (pt, n) in outer_bends]).reshape(-1, 2)
+        pairs = []
+        if len(inner) > 0 and len(outer) > 0:
+            d = np.hypot(inner[:,np.newaxis,0] - outer[np.newaxis,:,0],
+                inner[:,np.newaxis,1] - outer[np.newaxis,:,1])
+            pairs = [(i, int(np.argmin(d[i]))) for i in range(len(inner))]
+            pairs = [(i, j) for (i, j) in pairs
+                if np.argmin(d[:,j]) == i and d[i,j] < 3.0*thickness]
+        paired = zip(*pairs) if len(pairs) > 0 else [[], []]
+        pairs = [(inner[i], outer[j]) for (i, j) in pairs]
+        for (i, (pt, n)) in enumerate(inner_bends):
+            if i not in paired[0]:
+                q = across(a_outer, pt, n)
+                if q is not None:
+                    pairs.append((pt, q))
+        for (j, (pt, n)) in enumerate(outer_bends):
+            if j not in paired[1]:
+                p = across(a_inner, pt, n)
+                if p is not None:
+                    pairs.append((p, pt))
+        # sort the pairs along the inner side (the outer side runs the
+        #   opposite way)
+        (ls_inner, ls_outer) = (LineString(a_inner), LineString(a_outer))
+        pairs.sort(key=lambda (p, q): ls_inner.project(Point(p)))
+        if np.any(np.diff([ls_outer.project(Point(q))
+            for (p, q) in pairs]) >= 0):
+            # the bends cross each other
+            return []
+        return [(self._hard_point(p), self._hard_point(q)) for (p, q) in pairs]
+
+    def _hard_points_on(self, a, start, end):
+        """Returns the hard points on side a, between its ends.
+
+        Returns a list of (arc length along side a, hard point ID), sorted by
+        arc length. The hard points at the ends of the side (`start` and
+        `end`) are left out.
+
+        """
+        tol = self.tol
+        hp = np.array(self._hard_points)
+        (minx, miny) = a.min(axis=0) - tol
+        (maxx, maxy) = a.max(axis=0) + tol
+        near = np.nonzero((hp[:,0] > minx) & (hp[:,0] < maxx) &
+            (hp[:,1] > miny) & (hp[:,1] < maxy))[0]
+        ls = LineString(a)
+        length = ls.length
+        cuts = []
+        for i in near:
+            if i in [start, end]:
+                continue
+            pt = Point(hp[i])
+            if ls.distance(pt) < tol:
+                s_cut = ls.project(pt)
+                if tol < s_cut < length-tol:
+                    cuts.append((s_cut, i))
+        cuts.sort()
+        return cuts
+
+    def _split_side(self, a, start, end):
+        """Splits side a at every hard point on it, into sub-edges.
+
+        Returns a list of (sub-edge ID, reversed flag, ID of the hard point at
+        the end of the sub-edge), in order along side a.
+
+        """
+        tol = self.tol
+        hp = np.array(self._hard_points)
+        s = cumulative_length(a)
+        pieces = []
+        (s_start, p_start) = (0.0, start)
+        for (s_cut, p_cut) in self._hard_points_on(a, start, end) + [(s[-1],
+            end)]:
+            inside = a[(s > s_start+tol) & (s < s_cut-tol)]
+            piece = np.vstack((hp[p_start], inside, hp[p_cut]))
+            (e, rev) = self._sub_edge(piece, p_start, p_cut)
+            pieces.append((e, rev, p_cut))
+            (s_start, p_start) = (s_cut, p_cut)
+        return pieces
+
+    def _divisions(self, list_of_sub_edges):
+        return sum([self._sub_edges[e]['num'] for e in list_of_sub_edges])
+
+    def _balance_divisions(self, max_iterations):
+        """Make the number of elements on opposite sides of each region equal.
+
+        Elements are added to the sub-edge with the longest elements, on the
+        side with fewer elements, until both sides match. (Between paired
+        bends, each stretch of the inner and outer sides is balanced
+        separately.) Sub-edges are shared between regions, so this is
+        repeated until every region balances.
+
+        """
+        for iteration in range(max_iterations):
+            changed = False
+            for region in self._regions:
+                for (side_a, side_b) in region['pairs']:
+                    n_a = self._divisions(side_a)
+                    n_b = self._divisions(side_b)
+                    while n_a != n_b:
+                        smaller = side_a if n_a < n_b else side_b
+                        e = max([self._sub_edges[e] for e in smaller],
+                            key=lambda e: e['length']/e['num'])
+                        e['num'] += 1
+                        changed = True
+                        n_a = self._divisions(side_a)
+                        n_b = self._divisions(side_b)
+            if not changed:
+                break
+        else:
+            raise Warning("Couldn't balance the elements on opposite sides of every region after {0} iterations!".format(max_iterations))
+
+    def _side_points(self, side):
+        """Returns the nodes along a side, in CCW order around its region."""
+        pts = []
+        for (e, rev) in side:
+            b = self._sub_edges[e]['points']
+            if rev:
+                b = b[::-1]
+            pts.append(b if len(pts) == 0 else b[1:])
+        return np.vstack(pts)
+
+    def _mesh_regions(self):
+        """Mesh each region by transfinite interpolation, and number the nodes.
+
+        The nodes are merged by their coordinates: the nodes along each
+        sub-edge are computed once, so every region that shares the sub-edge
+        gets the same coordinates.
+
+        """
+        for e in self._sub_edges:
+            e['points'] = resample(e['coords'], 2*e['num']+1)
+        node_ids = {}
+        list_of_coords = []
+        def node_id(pt):
+            key = (pt[0], pt[1])
+            if key not in node_ids:
+                node_ids[key] = len(list_of_coords)
+                list_of_coords.append(key)
+            return node_ids[key]
+        elements = []
+        for region in self._regions:
+            sides = region['sides']
+            pts = [None if s is None else self._side_points(s)
+                for s in sides]
+            for (i, j) in [(0, 2), (1, 3), (2, 0), (3, 1)]:
+                if pts[i] is None:
+                    # collapsed side: repeat the corner it collapses to
+                    corner = pts[(i+1) % 4][0]
+                    pts[i] = np.tile(corner, (len(pts[j]), 1))
+            X = transfinite_interpolation(pts[0], pts[1], pts[2][::-1],
+                pts[3][::-1])
+            if (signed_areas(X) <= 0.0).any():
+                # e.g. where the outer side wraps around the TE, but the
+                #   inner side doesn't
+                X = smooth(X, self.max_smoothing_iterations)
+            ids = np.empty(X.shape[:2], dtype=int)
+            for i in range(X.shape[0]):
+                for j in range(X.shape[1]):
+                    ids[i,j] = node_id(X[i,j])
+            layer = region['layer']
+            for i in range(0, X.shape[0]-1, 2):
+                for j in range(0, X.shape[1]-1, 2):
+                    c = [ids[i,j], ids[i+2,j], ids[i+2,j+2], ids[i,j+2]]
+                    m = [ids[i+1,j], ids[i+2,j+1], ids[i+1,j+2], ids[i,j+1]]
+                    xi = (X[i+2,j] - X[i,j]) + (X[i+2,j+2] - X[i,j+2])
+                    theta1 = np.degrees(np.arctan2(xi[1], xi[0])) % 360.0
+                    elements.append((c, m, layer, region['element_set'],
+                        theta1))
+        # create the grid entities
+        self.list_of_nodes = [gr.Node(n+1, x2, x3)
+            for (n, (x2, x3)) in enumerate(list_of_coords)]
+        nodes = self.list_of_nodes
+        for (c, m, layer, element_set, theta1) in elements:
+            elem_num = len(self.list_of_elements)+1
+            layer_num = layer.material.material_num
+            collapsed = [k for k in range(4) if c[k] == c[(k+1) % 4]]
+            if len(collapsed) == 0:
+                el = gr.QuadrilateralQuadraticElement(elem_num,
+                    nodes[c[0]], nodes[c[1]], nodes[c[2]], nodes[c[3]],
+                    nodes[m[0]], nodes[m[1]], nodes[m[2]], nodes[m[3]],
+                    layer_num, autocorrect=False)
+            else:
+                k = collapsed[0]
+                t = [(k+1) % 4, (k+2) % 4, (k+3) % 4]
+                el = gr.TriangularQuadraticElement(elem_num,
+                    nodes[c[t[0]]], nodes[c[t[1]]], nodes[c[t[2]]],
+                    nodes[m[t[0]]], nodes[m[t[1]]], nodes[m[t[2]]],
+                    layer_num, autocorrect=False)
+            el.element_set = element_set
+            el.theta1 = theta1
+            self.list_of_elements.append(el)
+        self.number_of_nodes = len(self.list_of_nodes)
+        self.number_of_elements = len(self.list_of_elements)
+
+    def _find_hanging_edges(self):
+        """Count the element edges that don't match a neighboring element.
+
+        An element edge that is only used by one element must lie on the
+        boundary of the mesh. Otherwise, it is a hanging edge, and the mesh
+        is not conforming there.
+
+        """
+        count = {}
+        owner = {}
+        for el in self.list_of_elements:
+            if isinstance(el, gr.TriangularQuadraticElement):
+                edges = [(el.node1, el.node5, el.node2),
+                    (el.node2, el.node6, el.node3),
+                    (el.node3, el.node7, el.node1)]
+            else:
+                edges = [(el.node1, el.node5, el.node2),
+                    (el.node2, el.node6, el.node3),
+                    (el.node3, el.node7, el.node4),
+                    (el.node4, el.node8, el.node1)]
+            for (n0, mid, n1) in edges:
+                key = (min(n0.node_num, n1.node_num),
+                    max(n0.node_num, n1.node_num))
+                count[key] = count.get(key, 0) + 1
+                owner[key] = (mid, el.element_set)
+        union = cascaded_union([layer.polygon.buffer(self.tol)
+            for layer in self.list_of_layers])
+        boundary = union.boundary
+        self.hanging_edges = {}
+        for (key, n) in count.items():
+            if n > 1:
+                continue
+            (mid, element_set) = owner[key]
+            if boundary.distance(Point(mid.coords)) > 3.0*self.tol:
+                self.hanging_edges[element_set] = (
+                    self.hanging_edges.get(element_set, 0) + 1)
+        if len(self.hanging_edges) > 0:
+            print "*** Warning: {0} hanging element edges were found!".format(sum(self.hanging_edges.values()))
+            for (element_set, n) in sorted(self.hanging_edges.items()):
+                print "    {0}: {1}".format(element_set, n)
+
+    def _find_inverted_elements(self):
+        """Count the elements with nodes in CW order (negative area)."""
+        self.inverted_elements = {}
+        for el in self.list_of_elements:
+            if el.signed_area() <= 0.0:
+                self.inverted_elements[el.element_set] = (
+                    self.inverted_elements.get(el.element_set, 0) + 1)
+        if len(self.inverted_elements) > 0:
+            print "*** Warning: {0} inverted elements were found!".format(sum(self.inverted_elements.values()))
+            for (element_set, n) in sorted(self.inverted_elements.items()):
+                print "    {0}: {1}".format(element_set, n)
+
+
+def transfinite_interpolation(bottom, right, top, left):
+    """Returns a structured grid of points inside four boundary curves.
+
+    The grid is a Coons patch, with the points on each boundary spaced by
+    arc length (so the interior points follow uneven spacing on the
+    boundaries).
+
+    Parameters
+    ----------
+    bottom, top : np.array, shape (nx+1,2), the points along the bottom and
+        top sides, from left to right
+    left, right : np.array, shape (ny+1,2), the points along the left and
+        right sides, from bottom to top
+    The corners must match, e.g. bottom[0] == left[0].
+
+    Returns
+    -------
+    X : np.array, shape (nx+1,ny+1,2), X[i,j] is the point in column i and
+        row j
+
+    """
+    def parameter(a):
+        s = cumulative_length(a)
+        if s[-1] == 0.0:
+            return np.linspace(0.0, 1.0, len(a))
+        return s/s[-1]
+    u_b = parameter(bottom)[:,np.newaxis]
+    u_t = parameter(top)[:,np.newaxis]
+    v_l = parameter(left)[np.newaxis,:]
+    v_r = parameter(right)[np.newaxis,:]
+    # solve u = (1-v)*u_b + v*u_t and v = (1-u)*v_l + u*v_r at each point
+    den = 1.0 - (u_t-u_b)*(v_r-v_l)
+    u = (u_b + v_l*(u_t-u_b))/den
+    v = (v_l + u_b*(v_r-v_l))/den
+    u = u[:,:,np.newaxis]
+    v = v[:,:,np.newaxis]
+    B = bottom[:,np.newaxis,:]
+    T = top[:,np.newaxis,:]
+    L = left[np.newaxis,:,:]
+    R = right[np.newaxis,:,:]
+    X = ((1.0-v)*B + v*T + (1.0-u)*L + u*R
+        - (1.0-u)*(1.0-v)*bottom[0] - u*(1.0-v)*bottom[-1]
+        - u*v*top[-1] - (1.0-u)*v*top[0])
+    # keep the boundary points exactly
+    X[:,0] = bottom
+    X[:,-1] = top
+    X[0,:] = left
+    X[-1,:] = right
+    return X
+
+def signed_areas(X):
+    """Returns the signed area of each element of a structured grid.
+
+    Like <element>.signed_area(), the area inside the boundary nodes of each
+    8-noded element is found, and it is negative if the element is turned
+    inside out.
+
+    Parameters
+    ----------
+    X : np.array, shape (2*nx+1,2*ny+1,2), the points of a structured grid of
+        nx by ny 8-noded elements, from transfinite_interpolation()
+
+    Returns
+    -------
+    A : np.array, shape (nx,ny), A[i,j] is the signed area of the element in
+        column i and row j
+
+    """
+    (nx, ny) = ((X.shape[0]-1)//2, (X.shape[1]-1)//2)
+    # the boundary nodes of each element, in CCW order
+    offsets = [(0,0), (1,0), (2,0), (2,1), (2,2), (1,2), (0,2), (0,1)]
+    B = np.array([X[di:di+2*nx-1:2,dj:dj+2*ny-1:2] for (di, dj) in offsets])
+    (x, y) = (B[...,0], B[...,1])
+    return 0.5*(x*np.roll(y, -1, axis=0) - np.roll(x, -1, axis=0)*y).sum(axis=0)
+
+def smooth(X, max_iterations):
+    """Smooths the interior points of a structured grid, to untangle it.
+
+    Each interior point is moved by one Jacobi pass of the Winslow (elliptic)
+    grid equations, until no element is inverted, or for max_iterations
+    passes. The boundary points don't move. Unlike Laplacian smoothing (the
+    average of the four neighbors), the Winslow equations don't fold the
+    grid in a non-convex region, e.g. in the thin wedge between a notch and
+    the skin around a flatback TE.
+
+    Parameters
+    ----------
+    X : np.array, shape (2*nx+1,2*ny+1,2), the points of a structured grid of
+        nx by ny 8-noded elements, from transfinite_interpolation()
+    max_iterations : int, the maximum number of smoothing passes
+
+    Returns
+    -------
+    X : np.array, the smoothed grid (a copy)
+
+    """
+    X = X.copy()
+    for iteration in range(max_iterations):
+        if (signed_areas(X) > 0.0).all():
+            break
+        X_u = 0.5*(X[2:,1:-1] - X[:-2,1:-1])
+        X_v = 0.5*(X[1:-1,2:] - X[1:-1,:-2])
+        alpha = (X_v**2).sum(axis=2)[:,:,np.newaxis]
+        beta = (X_u*X_v).sum(axis=2)[:,:,np.newaxis]
+        gamma = (X_u**2).sum(axis=2)[:,:,np.newaxis]
+        X[1:-1,1:-1] = (alpha*(X[2:,1:-1] + X[:-2,1:-1]) +
+            gamma*(X[1:-1,2:] + X[1:-1,:-2]) -
+            0.5*beta*(X[2:,2:] - X[:-2,2:] - X[2:,:-2] + X[:-2,:-2]))/(
+            2.0*(alpha + gamma))
+    return X
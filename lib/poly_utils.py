@@ -6,6 +6,7 @@ Last modified: March 14, 2014
 """
 
 
+import numpy as np
 import matplotlib.pyplot as plt
 from shapely.geometry import Polygon, Point, LineString
 from descartes import PolygonPatch
@@ -88,3 +89,287 @@ def plot_corners(list_of_corners):
     ax = plt.gca()
     for corner in list_of_corners:
         ax.scatter(corner.x, corner.y, s=40, alpha=0.8, zorder=100)
+
+
+# partition the ring-shaped layers automatically --------------------------
+def _station_part(st, name, airfoil=None):
+    """Returns the part `name` of the structure st, e.g. 'spar_cap'.
+
+    In a biplane station, the part of the lower or upper airfoil is returned,
+    e.g. st.lower_spar_cap for airfoil='lower'.
+
+    """
+    if airfoil is None:
+        return getattr(st, name)
+    elif airfoil in ['lower', 'upper']:
+        return getattr(st, airfoil + '_' + name)
+    else:
+        raise ValueError("Keyword `airfoil` must be None, 'lower', or 'upper'.")
+
+def _airfoil_polygon(st, airfoil=None):
+    """Returns the airfoil polygon of the structure st."""
+    af = st.parent_station.airfoil
+    if airfoil is None:
+        return af.polygon
+    elif airfoil == 'lower':
+        return af.lower_polygon
+    elif airfoil == 'upper':
+        return af.upper_polygon
+    else:
+        raise ValueError("Keyword `airfoil` must be None, 'lower', or 'upper'.")
+
+def _station_layers(st, airfoil=None):
+    """Returns the list of layers of the structure st."""
+    if airfoil is None:
+        return st._list_of_layers
+    elif airfoil == 'lower':
+        return st._list_of_lower_layers
+    elif airfoil == 'upper':
+        return st._list_of_upper_layers
+    else:
+        raise ValueError("Keyword `airfoil` must be None, 'lower', or 'upper'.")
+
+def ring_layers(st, airfoil=None):
+    """Returns a list of the layers in st that are rings (closed loops).
+
+    The layers of the root buildup, external surface, and internal surfaces
+    wrap around a hole, so they must be cut into four-sided regions before
+    they can be meshed.
+
+    """
+    return [layer for layer in _station_layers(st, airfoil)
+        if len(layer.polygon.interiors) > 0]
+
+def uncut_layers(st, airfoil=None):
+    """Returns a list of the layers in st that are not rings.
+
+    These layers already have four sides (e.g. the spar caps, shear webs, and
+    TE reinforcement), so they can be passed to
+    <structure>.write_truegrid_inputfile(additional_layers=...) uncut.
+
+    """
+    return [layer for layer in _station_layers(st, airfoil)
+        if len(layer.polygon.interiors) == 0]
+
+def mean_line_y(p, x):
+    """Returns the x3-coord halfway between the top and bottom of p at x2=x."""
+    (minx, miny, maxx, maxy) = p.bounds
+    chord = LineString([(x, miny-1.0), (x, maxy+1.0)]).intersection(p)
+    (cminx, cminy, cmaxx, cmaxy) = chord.bounds
+    return (cminy + cmaxy)/2.0
+
+def crosses_cleanly(layer, x, tol=1.0e-06):
+    """Checks if the line x2=x crosses the ring layer cleanly.
+
+    A clean cut crosses the ring layer from its exterior to its interior in
+    one straight strip each time. The cut is not clean if it runs along a wall
+    of the ring, passes through one of its vertices, or clips a step in its
+    wall (e.g. where the skin gets thicker at the spar cap), because then the
+    cut layer would have extra corners.
+
+    """
+    p = layer.polygon
+    (minx, miny, maxx, maxy) = p.bounds
+    for loop in [p.exterior] + list(p.interiors):
+        if (np.abs(np.array(loop.coords)[:,0]-x) < tol).any():
+            return False
+    cut = LineString([(x, miny-1.0), (x, maxy+1.0)]).intersection(p)
+    if cut.is_empty:
+        return True
+    for strip in getattr(cut, 'geoms', [cut]):
+        if strip.length < tol:
+            # the cut only touches a hairline sliver of the layer polygon
+            continue
+        start_on_exterior = p.exterior.distance(Point(strip.coords[0])) < tol
+        end_on_exterior = p.exterior.distance(Point(strip.coords[-1])) < tol
+        if start_on_exterior == end_on_exterior:
+            return False
+    return True
+
+def partition_cuts(st, airfoil=None, step=0.01, tol=1.0e-06):
+    """Returns a sorted list of x2-coords to cut the ring layers of st.
+
+    The cuts are placed at the edges of the structural parts:
+    - the center of shear web 1, or the left edge of the spar cap (if shear
+      web 1 doesn't exist)
+    - the center of shear web 2, or the right edge of the spar cap (if shear
+      web 2 doesn't exist)
+    - the center of shear web 3
+    - the left edge of the TE reinforcement
+
+    If a cut doesn't cross every ring layer cleanly (see crosses_cleanly()),
+    it is moved into the neighboring part, one `step` at a time, until it
+    does.
+
+    Parameters
+    ----------
+    st : MonoplaneStructure or BiplaneStructure object
+    airfoil : str, set to either 'lower' or 'upper', to designate which airfoil
+        should be cut in a biplane station (default=None for monoplane
+        stations)
+    step : float (default: 0.01), distance (meters) to move a cut that doesn't
+        cross the ring layers cleanly
+    tol : float (default: 1.0e-06), geometric tolerance (meters)
+
+    """
+    sc = _station_part(st, 'spar_cap', airfoil)
+    sw1 = _station_part(st, 'shear_web_1', airfoil)
+    sw2 = _station_part(st, 'shear_web_2', airfoil)
+    sw3 = _station_part(st, 'shear_web_3', airfoil)
+    ter = _station_part(st, 'TE_reinforcement', airfoil)
+    # list (x2-coord, direction to move the cut) for each candidate cut
+    candidates = []
+    if sw1.exists():
+        candidates.append(((sw1.left+sw1.right)/2.0, 1.0))
+    elif sc.exists():
+        candidates.append((sc.left, 1.0))
+    if sw2.exists():
+        candidates.append(((sw2.left+sw2.right)/2.0, -1.0))
+    elif sc.exists():
+        candidates.append((sc.right, -1.0))
+    if sw3.exists():
+        candidates.append(((sw3.left+sw3.right)/2.0, 1.0))
+    if ter.exists():
+        candidates.append((ter.left, 1.0))
+    rings = ring_layers(st, airfoil)
+    (minx, miny, maxx, maxy) = _airfoil_polygon(st, airfoil).bounds
+    cuts = []
+    for (x_cut, direction) in candidates:
+        while minx < x_cut < maxx:
+            if all([crosses_cleanly(layer, x_cut, tol) for layer in rings]):
+                break
+            x_cut += direction*step
+        if not (minx < x_cut < maxx):
+            print " Couldn't find a clean cut near x2={0:.4f}.".format(x_cut)
+            continue
+        if len(cuts) > 0 and (np.abs(np.array(cuts)-x_cut) < step).any():
+            # this cut is too close to an earlier cut
+            continue
+        cuts.append(x_cut)
+    cuts.sort()
+    return cuts
+
+def partition_bounding_polygons(st, airfoil=None, num_points=50,
+    boundary_buffer=0.2, step=0.01, tol=1.0e-06):
+    """Returns a list of (label, bounding polygon) to cut the ring layers of st.
+
+    The airfoil is split into slices at the cuts from partition_cuts(), and
+    each slice is split into an upper and a lower bounding polygon at the mean
+    line of the airfoil (halfway between its top and bottom surfaces). Every
+    ring layer crosses each bounding polygon as a strip with four sides.
+
+    Each label is named after the part that spans its slice of the airfoil
+    (e.g. 'upper spar cap', 'lower TE reinforcement').
+
+    Parameters
+    ----------
+    st : MonoplaneStructure or BiplaneStructure object
+    airfoil : str, set to either 'lower' or 'upper', to designate which airfoil
+        should be cut in a biplane station (default=None for monoplane
+        stations)
+    num_points : int (default: 50), number of points along the mean line
+    boundary_buffer : float (default: 0.2), fraction of the chord that the
+        bounding polygons are stretched past the airfoil
+    step, tol : float, passed to partition_cuts()
+
+    """
+    p = _airfoil_polygon(st, airfoil)
+    (minx, miny, maxx, maxy) = p.bounds
+    pad = boundary_buffer*(maxx-minx)
+    cuts = partition_cuts(st, airfoil, step=step, tol=tol)
+    # points along the mean line, which include each cut
+    x = np.union1d(np.linspace(minx, maxx, num_points)[1:-1], cuts)
+    y = np.array([mean_line_y(p, xi) for xi in x])
+    # drop the points that lie inside a ring layer, or else they would become
+    #   extra corners of the cut layers
+    rings = [layer.polygon.buffer(tol) for layer in ring_layers(st, airfoil)]
+    keep = [(xi in cuts) or not any([r.contains(Point(xi, yi)) for r in rings])
+        for (xi, yi) in zip(x, y)]
+    x = x[np.array(keep)]
+    y = y[np.array(keep)]
+    x = np.hstack((minx-pad, x, maxx+pad))
+    y = np.hstack((y[0], y, y[-1]))
+    bottom = miny - pad
+    top = maxy + pad
+    # name each slice after the part that spans it
+    parts = [('LE panel', 'LE_panel'),
+             ('spar cap', 'spar_cap'),
+             ('aft panel 1', 'aft_panel_1'),
+             ('aft panel 2', 'aft_panel_2'),
+             ('TE reinforcement', 'TE_reinforcement')]
+    edges = np.hstack((x[0], cuts, x[-1]))
+    labels = []
+    for i in range(len(edges)-1):
+        x_mid = (max(edges[i], minx) + min(edges[i+1], maxx))/2.0
+        label = 'region {0}'.format(i+1)
+        for (part_label, part_name) in parts:
+            part = _station_part(st, part_name, airfoil)
+            if (part.exists() and part.left is not None and
+                part.left <= x_mid <= part.right):
+                label = part_label
+                break
+        labels.append(label)
+    bounding_polygons = []
+    for i in range(len(edges)-1):
+        label = labels[i]
+        if labels.count(label) > 1:
+            label = label + ' {0}'.format(labels[:i+1].count(label))
+        mask = (x >= edges[i]) & (x <= edges[i+1])
+        mean_line = zip(x[mask], y[mask])
+        upper = mean_line + [(x[mask][-1], top), (x[mask][0], top)]
+        lower = mean_line + [(x[mask][-1], bottom), (x[mask][0], bottom)]
+        bounding_polygons.append(('upper ' + label, Polygon(upper)))
+        bounding_polygons.append(('lower ' + label, Polygon(lower)))
+    return bounding_polygons
+
+def partition_alt_layers(st, airfoil=None, area_threshold=1.0e-08,
+    plot_flag=True, **kwargs):
+    """Cut all the ring layers of st into alternate layers, for meshing.
+
+    This replaces the bounding polygons that were typed by hand in each
+    prep_stnXX_mesh.py script. Each ring layer (see ring_layers()) is cut by
+    each bounding polygon from partition_bounding_polygons(), and every piece
+    is saved as an alternate layer and written to a text file in
+    `station_path`, just like cut_plot_and_write_alt_layer().
+
+    Returns a list of the new alternate layers.
+
+    Parameters
+    ----------
+    st : MonoplaneStructure or BiplaneStructure object
+    airfoil : str, set to either 'lower' or 'upper', to designate which airfoil
+        should be cut in a biplane station (default=None for monoplane
+        stations)
+    area_threshold : float, polygons with areas smaller than this threshold
+        will be thrown out
+    plot_flag : bool, True if the bounding polygons should be plotted on the
+        current axes
+    **kwargs : passed to partition_bounding_polygons()
+
+    Usage
+    -----
+    st = station.structure
+    st.create_all_layers()
+    st.save_all_layer_edges()
+    station.plot_parts()
+    new_layers = pu.partition_alt_layers(st)
+    st.write_truegrid_inputfile(interrupt_flag=True,
+        additional_layers=pu.uncut_layers(st))
+
+    """
+    list_of_rings = ring_layers(st, airfoil)
+    new_layers = []
+    for (label, bounding_polygon) in partition_bounding_polygons(st, airfoil,
+        **kwargs):
+        if plot_flag:
+            plot_polygon(bounding_polygon, 'None', '#000000')
+        for layer in list_of_rings:
+            if layer.polygon.intersection(bounding_polygon).area < area_threshold:
+                # this ring doesn't cross the bounding polygon
+                continue
+            part = layer.parent_part
+            cut_plot_and_write_alt_layer(part, layer.name, label,
+                bounding_polygon, area_threshold=area_threshold,
+                airfoil=airfoil)
+            new_layers.append(part.alt_layer[layer.name + ', ' + label])
+    return new_layers
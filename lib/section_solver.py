@@ -0,0 +1,438 @@
+"""Calculate the stiffness and mass matrices of a cross-section, without VABS.
+
+The class CrossSection calculates the classical (Euler-Bernoulli) 4x4
+stiffness matrix and the 6x6 mass matrix of a cross-section grid, with the
+same inputs as a VABS input file (the grid, materials.csv, and layers.csv),
+so no external executable is needed. The results are in the same units and
+order as the VABS output (.K) file:
+  K (classical) : 1-extension; 2-twist; 3,4-bending
+  M (mass) : 1-extension; 2,3-shear; 4-twist; 5,6-bending
+
+The classical stiffness is found like the zeroth-order (classical) model of
+VABS: the cross-section is free to warp in and out of its plane, and the
+warping that minimizes the strain energy is found for each of the four
+classical strains (extension, twist, and two bending curvatures) with the
+finite element method. The 3D strains are
+    Gamma = Gamma_h*w + Gamma_eps*eps
+where w are the warping displacements (w1, w2, w3) at the nodes, and
+eps = (gamma11, kappa1, kappa2, kappa3). The stiffness matrix of the
+warping (E), and its couplings with the classical strains (D_he, D_ee), are
+integrated with Gauss quadrature over each element, all elements of each
+shape at once. The warping is solved from
+    E*V = -D_he
+with one sparse LU factorization, and then
+    K = D_ee + D_he^T*V
+The rigid body motions of the warping (which do not change K) are removed
+by fixing w1, w2, w3 at one node, and w3 at a second node.
+
+Each element's material stiffness matrix is rotated from its material
+coordinate system into the beam coordinate system with its layer plane
+angle (theta1, about x1), and the layup orientation angle (theta3, about
+y3) of its layer, like VABS.
+
+Usage
+-----
+import lib.abaqus_utils2 as au
+import lib.section_solver as ss
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+# ... assign the layer plane angles of g ...
+cs = ss.CrossSection(g, material_filename='sandia_blade/materials.csv',
+    layer_filename='sandia_blade/layers.csv')
+cs.K                        # 4x4 classical stiffness matrix
+cs.M                        # 6x6 mass matrix
+cs.get_key_properties()     # same as vabs_utils.VabsOutputFile
+
+# or, from an existing VABS input file
+(K, M) = ss.solve(**ss.read_vabs_input('sandia_blade/stn01/mesh_stn01.vabs'))
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import splu
+import grid as gr
+reload(gr)
+import mesh_quality as mq
+reload(mq)
+
+
+# Gauss weights for the Gauss points of each element shape (in
+#   mesh_quality._gauss_points)
+_gauss_weights = {
+    'quad4': np.ones(4),
+    'quad8': np.array([wi*wj for wi in [5.0/9.0, 8.0/9.0, 5.0/9.0]
+        for wj in [5.0/9.0, 8.0/9.0, 5.0/9.0]]),
+    'tri3': np.array([0.5]),
+    'tri6': np.ones(3)/6.0
+    }
+# the (i,j) tensor indices of each strain component, in the VABS order:
+#   11, 2*12, 2*13, 22, 2*23, 33
+_vabs_pairs = [(0,0), (0,1), (0,2), (1,1), (1,2), (2,2)]
+# the (i,j) tensor indices of each strain component, in the usual order of
+#   material compliance matrices: 11, 22, 33, 2*23, 2*13, 2*12
+_material_pairs = [(0,0), (1,1), (2,2), (1,2), (0,2), (0,1)]
+
+
+def material_stiffness(E1, E2=None, E3=None, G12=None, G13=None, G23=None,
+    nu12=None, nu13=None, nu23=None):
+    """Returns the 6x6 stiffness matrix of a material, in its own coords.
+
+    For an isotropic material, only E1 (= E) and nu12 (= nu) are given.
+
+    Returns
+    -------
+    C : np.array, shape (6,6), the stiffness matrix, for the strains (11,
+        22, 33, 2*23, 2*13, 2*12)
+
+    """
+    if E2 is None:
+        (E2, E3) = (E1, E1)
+        (nu13, nu23) = (nu12, nu12)
+        G12 = G13 = G23 = E1/(2.0*(1.0 + nu12))
+    S = np.array([
+        [1.0/E1, -nu12/E1, -nu13/E1, 0.0, 0.0, 0.0],
+        [-nu12/E1, 1.0/E2, -nu23/E2, 0.0, 0.0, 0.0],
+        [-nu13/E1, -nu23/E2, 1.0/E3, 0.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0/G23, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 0.0, 1.0/G13, 0.0],
+        [0.0, 0.0, 0.0, 0.0, 0.0, 1.0/G12]])
+    return np.linalg.inv(S)
+
+def read_materials(material_filename):
+    """Returns the stiffness matrix and density of each material.
+
+    Parameters
+    ----------
+    material_filename : str, the materials CSV file (e.g.
+        'sandia_blade/materials.csv')
+
+    Returns
+    -------
+    materials : dict of {material number: (C, rho)}, where C is from
+        material_stiffness()
+
+    """
+    mf = pd.read_csv(material_filename)
+    materials = {}
+    for m in range(len(mf)):
+        if mf['type'][m] == 'isotropic':
+            C = material_stiffness(mf['E1'][m], nu12=mf['nu12'][m])
+        elif mf['type'][m] == 'orthotropic':
+            C = material_stiffness(mf['E1'][m], mf['E2'][m], mf['E3'][m],
+                mf['G12'][m], mf['G13'][m], mf['G23'][m],
+                mf['nu12'][m], mf['nu13'][m], mf['nu23'][m])
+        else:
+            raise ValueError("The material type {0} is undefined!".format(
+                mf['type'][m]))
+        materials[int(mf['number'][m])] = (C, float(mf['rho'][m]))
+    return materials
+
+def rotate_stiffness(C, theta1, theta3):
+    """Returns material stiffness matrices in the beam coordinate system.
+
+    The material coords (y1, y2, y3) are found by rotating the beam coords
+    (x1, x2, x3) by theta1 about x1 (the layer plane angle), and then by
+    theta3 about y3 (the layup orientation angle), like VABS.
+
+    Parameters
+    ----------
+    C : np.array, shape (E,6,6), the stiffness matrix of each element, in
+        its material coords, for the strains (11, 22, 33, 2*23, 2*13, 2*12)
+    theta1 : np.array, shape (E,), the layer plane angle of each element, in
+        degrees
+    theta3 : np.array, shape (E,), the layup orientation angle of each
+        element, in degrees
+
+    Returns
+    -------
+    D : np.array, shape (E,6,6), the stiffness matrix of each element in the
+        beam coords, for the strains (11, 2*12, 2*13, 22, 2*23, 33)
+
+    """
+    (c1, s1) = (np.cos(np.radians(theta1)), np.sin(np.radians(theta1)))
+    (c3, s3) = (np.cos(np.radians(theta3)), np.sin(np.radians(theta3)))
+    # the columns of Q are the material axes, in the beam coords
+    Q = np.zeros((len(C), 3, 3))
+    Q[:,0,0] = c3
+    Q[:,1,0] = s3*c1
+    Q[:,2,0] = s3*s1
+    Q[:,0,1] = -s3
+    Q[:,1,1] = c3*c1
+    Q[:,2,1] = c3*s1
+    Q[:,1,2] = -s1
+    Q[:,2,2] = c1
+    # rotate the 4th order stiffness tensor, one index at a time
+    C4 = np.zeros((len(C), 3, 3, 3, 3))
+    for (I, (i, j)) in enumerate(_material_pairs):
+        for (J, (k, l)) in enumerate(_material_pairs):
+            for (a, b) in set([(i, j), (j, i)]):
+                for (c, d) in set([(k, l), (l, k)]):
+                    C4[:,a,b,c,d] = C[:,I,J]
+    C4 = np.einsum('eia,eabcd->eibcd', Q, C4)
+    C4 = np.einsum('ejb,eibcd->eijcd', Q, C4)
+    C4 = np.einsum('ekc,eijcd->eijkd', Q, C4)
+    C4 = np.einsum('eld,eijkd->eijkl', Q, C4)
+    D = np.empty((len(C), 6, 6))
+    for (I, (i, j)) in enumerate(_vabs_pairs):
+        for (J, (k, l)) in enumerate(_vabs_pairs):
+            D[:,I,J] = C4[:,i,j,k,l]
+    return D
+
+def solve(x, conn, material_num, theta1, theta3, materials):
+    """Returns the classical stiffness matrix and the mass matrix.
+
+    Parameters
+    ----------
+    x : np.array, shape (N,2), the (x2, x3) coords of each node
+    conn : np.array of ints, shape (E,9), the element connectivity (from
+        grid.connectivity_arrays())
+    material_num : np.array of ints, shape (E,), the material of each element
+    theta1 : np.array, shape (E,), the layer plane angle of each element, in
+        degrees
+    theta3 : np.array, shape (E,), the layup orientation angle of each
+        element, in degrees
+    materials : dict of {material number: (C, rho)}, from read_materials()
+
+    Returns
+    -------
+    K : np.array, shape (4,4), the classical stiffness matrix (1-extension;
+        2-twist; 3,4-bending)
+    M : np.array, shape (6,6), the mass matrix (1-extension; 2,3-shear;
+        4-twist; 5,6-bending)
+
+    """
+    material_num = np.asarray(material_num)
+    try:
+        C = np.array([materials[m][0] for m in material_num])
+        rho = np.array([materials[m][1] for m in material_num])
+    except KeyError as e:
+        raise ValueError("Material #{0} is not defined!".format(e.args[0]))
+    D = rotate_stiffness(C, np.asarray(theta1, dtype=float),
+        np.asarray(theta3, dtype=float))
+    shapes = mq.element_shapes(conn)
+    N = len(x)
+    rows = []
+    cols = []
+    values = []
+    D_he = np.zeros((3*N, 4))
+    D_ee = np.zeros((4, 4))
+    # the mass integrals: int(rho*(1, x2, x3, x2^2, x3^2, x2*x3) dA)
+    m = np.zeros(6)
+    for shape in mq.node_slots:
+        index = np.nonzero(shapes == shape)[0]
+        if len(index) == 0:
+            continue
+        nodes = conn[index][:,mq.node_slots[shape]]
+        n = nodes.shape[1]
+        X = x[nodes]                                    # (E,n,2)
+        (points, weights) = (mq._gauss_points[shape], _gauss_weights[shape])
+        Ng = mq.shape_functions(shape, points)          # (G,n)
+        dN = mq.shape_function_derivatives(shape, points)   # (G,n,2)
+        # J[e,g,a,b] = d(x_a)/d(xi_b) at Gauss point g of element e
+        J = np.einsum('ena,gnb->egab', X, dN)
+        det_J = J[:,:,0,0]*J[:,:,1,1] - J[:,:,0,1]*J[:,:,1,0]
+        if (det_J <= 0.0).any():
+            raise ValueError("{0} elements are turned inside out!".format(
+                (det_J <= 0.0).any(axis=1).sum()))
+        inv_J = np.empty_like(J)
+        inv_J[:,:,0,0] = J[:,:,1,1]/det_J
+        inv_J[:,:,0,1] = -J[:,:,0,1]/det_J
+        inv_J[:,:,1,0] = -J[:,:,1,0]/det_J
+        inv_J[:,:,1,1] = J[:,:,0,0]/det_J
+        # dN_dx[e,g,i,a] = d(N_i)/d(x_a), with a=0 for x2 and a=1 for x3
+        dN_dx = np.einsum('gnb,egba->egna', dN, inv_J)
+        xg = np.einsum('gn,ena->ega', Ng, X)            # Gauss point coords
+        w = det_J*weights                               # (E,G)
+        (E, G) = w.shape
+        # the strains from the warping (w1, w2, w3 at each node)
+        B_h = np.zeros((E, G, 6, 3*n))
+        B_h[:,:,1,0::3] = dN_dx[:,:,:,0]    # 2*G12 = dw1/dx2
+        B_h[:,:,2,0::3] = dN_dx[:,:,:,1]    # 2*G13 = dw1/dx3
+        B_h[:,:,3,1::3] = dN_dx[:,:,:,0]    # G22 = dw2/dx2
+        B_h[:,:,4,1::3] = dN_dx[:,:,:,1]    # 2*G23 = dw2/dx3 + dw3/dx2
+        B_h[:,:,4,2::3] = dN_dx[:,:,:,0]
+        B_h[:,:,5,2::3] = dN_dx[:,:,:,1]    # G33 = dw3/dx3
+        # the strains from the classical strains (gamma11, kappa1, kappa2,
+        #   kappa3)
+        B_e = np.zeros((E, G, 6, 4))
+        B_e[:,:,0,0] = 1.0
+        B_e[:,:,0,2] = xg[:,:,1]
+        B_e[:,:,0,3] = -xg[:,:,0]
+        B_e[:,:,1,1] = -xg[:,:,1]
+        B_e[:,:,2,1] = xg[:,:,0]
+        # integrate B^T*D*B over each element, as one batch of matrix
+        #   products over the (Gauss point, strain) rows
+        wDB_h = np.einsum('eij,egjk,eg->egik', D[index], B_h, w).reshape(E,
+            6*G, 3*n)
+        wDB_e = np.einsum('eij,egjk,eg->egik', D[index], B_e, w).reshape(E,
+            6*G, 4)
+        B_hT = B_h.reshape(E, 6*G, 3*n).transpose(0, 2, 1)
+        K_e = np.matmul(B_hT, wDB_h)
+        D_he_e = np.matmul(B_hT, wDB_e)
+        D_ee += np.einsum('egji,egjk->ik', B_e, wDB_e.reshape(E, G, 6, 4))
+        # assemble
+        dofs = (3*nodes[:,:,np.newaxis] + np.arange(3)).reshape(E, 3*n)
+        rows.append(np.repeat(dofs, 3*n, axis=1).ravel())
+        cols.append(np.tile(dofs, (1, 3*n)).ravel())
+        values.append(K_e.ravel())
+        np.add.at(D_he, dofs.ravel(), D_he_e.reshape(-1, 4))
+        # mass
+        rw = rho[index][:,np.newaxis]*w
+        (x2, x3) = (xg[:,:,0], xg[:,:,1])
+        m += [(rw*f).sum() for f in [1.0, x2, x3, x2**2, x3**2, x2*x3]]
+    K_h = coo_matrix((np.concatenate(values),
+        (np.concatenate(rows), np.concatenate(cols))),
+        shape=(3*N, 3*N)).tocsc()
+    # remove the rigid body motions of the warping: fix (w1, w2, w3) at the
+    #   first node, and w3 at the node farthest from it along x2
+    used = np.unique(conn[conn >= 0])
+    far = used[np.argmax(np.abs(x[used,0] - x[used[0],0]))]
+    fixed = [3*used[0], 3*used[0]+1, 3*used[0]+2, 3*far+2]
+    free = np.setdiff1d((3*used[:,np.newaxis] + np.arange(3)).ravel(), fixed)
+    V = np.zeros((3*N, 4))
+    # K_h is symmetric positive definite, so no pivoting is needed
+    lu = splu(K_h[free][:,free], permc_spec='MMD_AT_PLUS_A',
+        diag_pivot_thresh=0.0, options=dict(SymmetricMode=True))
+    V[free] = lu.solve(-D_he[free])
+    K = D_ee + np.dot(D_he.T, V)
+    K = (K + K.T)/2.0
+    # the mass matrix, in the VABS layout
+    (mu, mu_x2, mu_x3, i33, i22, i23) = m
+    M = np.array([
+        [mu, 0.0, 0.0, 0.0, mu_x3, -mu_x2],
+        [0.0, mu, 0.0, -mu_x3, 0.0, 0.0],
+        [0.0, 0.0, mu, mu_x2, 0.0, 0.0],
+        [0.0, -mu_x3, mu_x2, i22 + i33, 0.0, 0.0],
+        [mu_x3, 0.0, 0.0, 0.0, i22, -i23],
+        [-mu_x2, 0.0, 0.0, 0.0, -i23, i33]])
+    return (K, M)
+
+def read_vabs_input(vabs_filename):
+    """Returns the inputs of solve(), from a VABS input file.
+
+    Only VABS input files with format_flag=1 (like the ones written by
+    vabs_utils.VabsInputFile), and isotropic or orthotropic materials, can be
+    read.
+
+    Returns
+    -------
+    dict, with the keys 'x', 'conn', 'material_num', 'theta1', 'theta3', and
+    'materials' (see solve())
+
+    """
+    f = open(vabs_filename, 'r')
+    tokens = ' '.join([line.split('#')[0] for line in f]).split()
+    f.close()
+    values = iter(tokens)
+    def take(k):
+        return [next(values) for i in range(k)]
+    (format_flag, num_layers) = [int(v) for v in take(2)]
+    if format_flag != 1:
+        raise ValueError("{0} has format_flag={1}; only format_flag=1 can be read".format(vabs_filename, format_flag))
+    take(3)         # Timoshenko_flag, recover_flag, thermal_flag
+    (curve, oblique, trapeze, vlasov) = [int(v) for v in take(4)]
+    if curve == 1:
+        take(3)     # k1, k2, k3
+    if oblique == 1:
+        take(2)     # cos11, cos21
+    (num_nodes, num_elements, num_materials) = [int(v) for v in take(3)]
+    nodes = np.array(take(3*num_nodes), dtype=float).reshape(-1, 3)
+    elements = np.array(take(10*num_elements), dtype=int).reshape(-1, 10)
+    element_layers = np.array(take(3*num_elements),
+        dtype=float).reshape(-1, 3)
+    layers = np.array(take(3*num_layers), dtype=float).reshape(-1, 3)
+    materials = {}
+    for i in range(num_materials):
+        (number, orth) = [int(v) for v in take(2)]
+        if orth == 0:
+            (E, nu, rho) = [float(v) for v in take(3)]
+            materials[number] = (material_stiffness(E, nu12=nu), rho)
+        elif orth == 1:
+            p = [float(v) for v in take(10)]
+            materials[number] = (material_stiffness(*p[:9]), p[9])
+        else:
+            raise ValueError("Material #{0} in {1} is anisotropic (orth={2}); only isotropic and orthotropic materials can be read".format(number, vabs_filename, orth))
+    # the node indices of each element (-1 for absent nodes)
+    index = np.full(int(nodes[:,0].max()) + 1, -1, dtype=int)
+    index[nodes[:,0].astype(int)] = np.arange(num_nodes)
+    conn = np.where(elements[:,1:] > 0, index[elements[:,1:]], -1)
+    # sort the element layers into the order of the elements
+    order = np.argsort(element_layers[:,0])
+    element_layers = element_layers[order][np.searchsorted(
+        element_layers[order,0], elements[:,0])]
+    layer_index = dict([(int(l[0]), i) for (i, l) in enumerate(layers)])
+    l = np.array([layer_index[int(n)] for n in element_layers[:,1]])
+    return {'x': nodes[:,1:],
+            'conn': conn,
+            'material_num': layers[l,1].astype(int),
+            'theta1': element_layers[:,2],
+            'theta3': layers[l,2],
+            'materials': materials}
+
+
+class CrossSection:
+    """The classical stiffness and mass matrices of a cross-section grid.
+
+    Initialization:
+    CrossSection(grid, material_filename, layer_filename)
+      grid - An object with list_of_nodes and list_of_elements attributes
+        (e.g. an abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object).
+        Every element must have a layer plane angle (theta1).
+      material_filename - A string for the materials CSV file (e.g.
+        'sandia_blade/materials.csv').
+      layer_filename - A string for the layers CSV file (e.g.
+        'sandia_blade/layers.csv').
+
+    Public attributes:
+    grid - The grid.
+    K - A 4x4 array, the classical stiffness matrix (1-extension; 2-twist;
+        3,4-bending).
+    M - A 6x6 array, the mass matrix (1-extension; 2,3-shear; 4-twist;
+        5,6-bending).
+    mass_center - A tuple of floats, the (x2, x3) coords of the mass center.
+    tension_center - A tuple of floats, the (x2, x3) coords of the tension
+        center (neutral axes).
+
+    """
+    def __init__(self, grid, material_filename, layer_filename):
+        self.grid = grid
+        (x, conn) = gr.connectivity_arrays(grid)
+        lf = pd.read_csv(layer_filename)
+        layers = dict([(lf['layer number'][l], (lf['material number'][l],
+            lf['layup orientation angle'][l])) for l in range(len(lf))])
+        material_num = []
+        theta1 = []
+        theta3 = []
+        for el in grid.list_of_elements:
+            if el.theta1 is None:
+                raise ValueError("Element #{0} has no layer plane angle!".format(el.elem_num))
+            if el.layer_num not in layers:
+                raise ValueError("Layer #{0} of element #{1} is not in the layer file!".format(el.layer_num, el.elem_num))
+            material_num.append(layers[el.layer_num][0])
+            theta1.append(el.theta1)
+            theta3.append(layers[el.layer_num][1])
+        (self.K, self.M) = solve(x, conn, material_num, theta1, theta3,
+            read_materials(material_filename))
+        self.mass_center = (-self.M[0,5]/self.M[0,0],
+            self.M[0,4]/self.M[0,0])
+        self.tension_center = (-self.K[0,3]/self.K[0,0],
+            self.K[0,2]/self.K[0,0])
+
+    def get_key_properties(self):
+        """Returns 7 important entries of the stiffness and mass matrices.
+
+        The entries are in the same order as
+        vabs_utils.VabsOutputFile.get_key_properties():
+        K_55      K_66       K_44      K_11        M_11      M_55      M_66
+        (flap, edge, and torsional stiffness, axial stiffness, mass per unit
+        length, and flap and edge mass moments of inertia). The classical
+        stiffness entries are used, e.g. K_55 is K[2,2].
+
+        """
+        return (self.K[2,2], self.K[3,3], self.K[1,1], self.K[0,0],
+            self.M[0,0], self.M[4,4], self.M[5,5])
@@ -32,12 +32,18 @@ Last updated: April 14, 2014
 
 import os
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import layer as l
 reload(l)
+import thin_wall as tw
+reload(tw)
+import truegrid as tg
+reload(tg)
 from math import isnan
 from shapely.geometry import Polygon, asLineString
 from shapely.ops import cascaded_union
+from shapely.affinity import translate
 from shapely.topology import TopologicalError
 from descartes import PolygonPatch
 # the descartes module translates shapely objects into matplotlib objects
@@ -46,6 +52,126 @@ from operator import attrgetter
 # ref: https://wiki.python.org/moin/HowTo/Sorting#Operator_Module_Functions
 
 
+def estimate_mass_and_stiffness(list_of_layers):
+    """Estimate the sectional mass and stiffness properties of a list of layers.
+
+    Integrates the area and moments of area of each layer polygon, weighted by
+    the axial modulus (E1, or E for isotropic materials) and the density of
+    each layer's material. This neglects the ply angles and all shear
+    stiffnesses, so it is only a quick approximation of a VABS analysis.
+
+    Returns a dictionary with the same entries as VabsOutputFile.
+    get_key_properties() (except K_44), taken about the station origin:
+        'K_11, EA_axial' : axial stiffness
+        'K_55, EI_flap'  : flapwise bending stiffness
+        'K_66, EI_edge'  : edgewise bending stiffness
+        'M_11, mu_mass'  : mass per unit length
+        'M_55, i22_flap' : flapwise mass moment of inertia per unit length
+        'M_66, i33_edge' : edgewise mass moment of inertia per unit length
+    and the sectional mass center:
+        'mass center, x2' : chordwise coord of the mass center
+        'mass center, x3' : flapwise coord of the mass center
+
+    """
+    if len(list_of_layers) == 0:
+        raise ValueError("There are no layers to integrate.\n  Try running <station>.structure.create_all_layers() first.")
+    moments = np.array([layer.moments_of_area() for layer in list_of_layers])
+    E = np.zeros(len(list_of_layers))
+    rho = np.zeros(len(list_of_layers))
+    for (i, layer) in enumerate(list_of_layers):
+        if layer.material.type == 'isotropic':
+            E[i] = layer.material.E
+        else:
+            E[i] = layer.material.E1
+        rho[i] = layer.material.rho
+    (EA, ES_2, ES_3, EI_22, EI_33, EI_23) = np.dot(E, moments)
+    (mu, mS_2, mS_3, mI_22, mI_33, mI_23) = np.dot(rho, moments)
+    return {'K_11, EA_axial' : EA,
+            'K_55, EI_flap'  : EI_22,
+            'K_66, EI_edge'  : EI_33,
+            'M_11, mu_mass'  : mu,
+            'M_55, i22_flap' : mI_22,
+            'M_66, i33_edge' : mI_33,
+            'mass center, x2' : mS_2/mu,
+            'mass center, x3' : mS_3/mu}
+
+
+def layer_table(structure, list_names):
+    """Returns a long-format table of the area and mass of each layer.
+
+    Each row is one layer, with the columns:
+        'airfoil' : 'monoplane', 'lower', or 'upper'
+        'part' : the part name (e.g. 'shear web 1')
+        'sub-part' : the layer name (e.g. 'biax, left')
+        'material' : the material name
+        'area' : the layer area
+        'mass' : the layer mass per unit length
+
+    Parameters
+    ----------
+    structure : MonoplaneStructure or BiplaneStructure object
+    list_names : list of tuples, (layer list attribute name, airfoil label)
+        for each layer list in the structure
+
+    """
+    part_names = {}
+    for (name, obj) in structure.__dict__.items():
+        if isinstance(obj, Part):
+            for prefix in ['lower_', 'upper_']:
+                if name.startswith(prefix):
+                    name = name[len(prefix):]
+            part_names[id(obj)] = name.replace('_', ' ')
+    layers = []
+    airfoils = []
+    for (list_name, airfoil) in list_names:
+        for layer in getattr(structure, list_name):
+            layers.append(layer)
+            airfoils.append(airfoil)
+    area = np.array([layer.polygon.area for layer in layers])
+    rho = np.array([layer.material.rho for layer in layers])
+    return pd.DataFrame({
+        'airfoil': airfoils,
+        'part': [part_names[id(layer.parent_part)] for layer in layers],
+        'sub-part': [layer.name for layer in layers],
+        'material': [layer.material.name for layer in layers],
+        'area': area,
+        'mass': area*rho},
+        columns=['airfoil', 'part', 'sub-part', 'material', 'area', 'mass'])
+
+def percent_breakdown(table, value, print_flag=False, station_num=None):
+    """Returns a dictionary of the area or mass fraction of each sub-part.
+
+    The keys are like 'shear web 1 (left biax)', or just the part name for
+    parts made of one layer (e.g. 'root buildup'). In biplane stations, the
+    lower and upper airfoils are added together.
+
+    Parameters
+    ----------
+    table : pandas.DataFrame, from layer_table()
+    value : str, 'area' or 'mass'
+    print_flag : bool, print each fraction
+    station_num : int, the station number to print
+
+    """
+    single_layer_parts = ['root buildup', 'LE panel']
+    sub_part_labels = {'biax, left': 'left biax', 'biax, right': 'right biax'}
+    part = table['part'].values.astype(object)
+    sub_part = table['sub-part'].replace(sub_part_labels).values.astype(object)
+    single = table['part'].isin(single_layer_parts).values
+    t = pd.DataFrame({
+        'key': np.where(single, part, part + ' (' + sub_part + ')'),
+        'label': np.where(single, part, part + ', ' + sub_part),
+        value: table[value].values})
+    # sum the layers of each sub-part (in the order they first appear)
+    g = t.groupby('key', sort=False)
+    fractions = g[value].sum()/t[value].sum()
+    if print_flag:
+        print " ----- STATION #{0} -----".format(station_num)
+        for (key, label) in g['label'].first().iteritems():
+            print "  {0:5.1%} {1}, {2}".format(fractions[key], value, label)
+    return fractions.to_dict()
+
+
 class Part:
     """Define the dimensions of a structural part."""
     def __init__(self, parent_structure, base, height):
@@ -67,6 +193,19 @@ height:  {1} (meters)""".format(self.base, self.height)
             return False
         else:
             return True
+
+    def dimensions(self):
+        """Returns a tuple of all the laminate dimensions of this part.
+
+        Dimensions that this kind of part doesn't have are returned as NaN.
+
+        """
+        dims = []
+        for name in ['base', 'height', 'height_triax', 'height_gelcoat',
+                     'height_resin', 'height_uniax', 'height_foam',
+                     'base_biax', 'base_foam', 'x2']:
+            dims.append(getattr(self, name, np.nan))
+        return tuple(dims)
     
     def bounding_box(self, x_boundary_buffer=1.2, y_boundary_buffer=1.2,
         airfoil=None):
@@ -1314,17 +1453,29 @@ height:  {1:6.4f} (meters)
         loop = Polygon(good_loops[self.num-1])
         return loop
 
-    def create_layers(self, merged_polygon, airfoil=None):
+    def create_layers(self, merged_polygon, airfoil=None, loop=None):
         """Create the triax and resin layers in the internal surface.
 
         <internal_surface>.layer['triax'] : triax layer
         <internal_surface>.layer['resin'] : resin layer
 
+        Parameters
+        ----------
+        merged_polygon : polygon, merged polygon for all parts in this station
+        airfoil : str, set to either 'lower' or 'upper', to designate which
+            airfoil this internal surface belongs to in a biplane station
+            (default=None for monoplane stations)
+        loop : polygon, the interior loop for this internal surface, if it is
+            already known (default=None, find it in merged_polygon)
+
         """
         st = self.parent_structure
         b = st.parent_station.parent_blade
         # triax region
-        op_triax = self.interior_loop(merged_polygon)
+        if loop is None:
+            op_triax = self.interior_loop(merged_polygon)
+        else:
+            op_triax = loop
         ip_triax = op_triax.buffer(-self.height_triax)
         polygon_triax = op_triax.difference(ip_triax)
         self.layer['triax'] = l.Layer(polygon_triax,
@@ -1369,6 +1520,288 @@ height:  {1:6.4f} (meters)
         assert self.alt_layer[new_name].polygon.geom_type == 'Polygon'
 
 
+class LayerDependencyGraph:
+    """Track which layers in a structure depend on which inputs.
+
+    Each part is a node in the graph. The external surface depends on the
+    airfoil; the root buildup depends on the airfoil and the external
+    surface; every other shell part (spar caps, shear webs, panels, TE
+    reinforcement) depends on the airfoil, the external surface, and the root
+    buildup, as well as its own dimensions and edges. Each internal surface
+    depends on the parts that border its interior loop, and on any rebuilt
+    part that grows into its interior loop.
+
+    After the inputs of a part change (e.g. <structure>.spar_cap.height), only
+    the parts that depend on that input, and the internal surfaces that border
+    them, have to be rebuilt.
+
+    The borders of the internal surfaces are found lazily, by the first
+    update() after the layers are created (see find_borders()). So the first
+    call to <structure>.update_all_layers() is no faster (usually a little
+    slower) than rebuilding all the layers; only later calls save time.
+
+    Parameters
+    ----------
+    parent_structure : Structure object, the structure that owns this graph
+    airfoil : str, set to either 'lower' or 'upper', to designate which airfoil
+        this graph tracks in a biplane station (default=None for monoplane
+        stations)
+
+    Usage
+    -----
+    st = station.structure
+    st.create_all_layers()
+    st.spar_cap.height = 0.05
+    st.update_all_layers()  # rebuilds the spar caps and internal_surface_2
+                            #   (the only internal surface they border)
+
+    """
+    shell_parts = ['external_surface', 'root_buildup', 'LE_panel', 'spar_cap',
+                   'aft_panel_1', 'aft_panel_2', 'shear_web_1', 'shear_web_2',
+                   'shear_web_3', 'TE_reinforcement']
+    internal_parts = ['internal_surface_1', 'internal_surface_2',
+                      'internal_surface_3', 'internal_surface_4']
+    def __init__(self, parent_structure, airfoil=None):
+        self.parent_structure = parent_structure
+        self.airfoil = airfoil
+        if airfoil is None:
+            self.prefix = ''
+            self.list_name = '_list_of_layers'
+        elif airfoil == 'lower' or airfoil == 'upper':
+            self.prefix = airfoil + '_'
+            self.list_name = '_list_of_{0}_layers'.format(airfoil)
+        else:
+            raise ValueError("Keyword `airfoil` must be None, 'lower', or 'upper'.")
+        self.inputs = None    # assigned later by record_inputs()
+        self.loops = None     # assigned later by find_borders()
+        self.borders = None   # assigned later by find_borders()
+
+    def part(self, name):
+        """Returns the part in the parent structure with this name."""
+        return getattr(self.parent_structure, self.prefix + name)
+
+    def dependencies(self, name):
+        """Returns a list of the nodes that this part depends on."""
+        if name == 'external_surface':
+            return ['airfoil']
+        elif name == 'root_buildup':
+            return ['airfoil', 'external_surface']
+        elif name in LayerDependencyGraph.shell_parts:
+            return ['airfoil', 'external_surface', 'root_buildup']
+        elif name in LayerDependencyGraph.internal_parts:
+            return self.borders[name]
+        else:
+            raise ValueError("Unrecognized part name: {0}".format(name))
+
+    def current_inputs(self):
+        """Returns a dictionary of the current inputs of each node."""
+        af = self.parent_structure.parent_station.airfoil
+        if self.airfoil is None:
+            polygon = af.polygon
+        else:
+            polygon = getattr(af, self.airfoil + '_polygon')
+        d = {'airfoil': polygon.wkb}
+        for name in (LayerDependencyGraph.shell_parts +
+                     LayerDependencyGraph.internal_parts):
+            part = self.part(name)
+            d[name] = (part.exists(),) + part.dimensions() + (part.left,
+                part.right)
+        return d
+
+    def record_inputs(self):
+        """Save the inputs that were used to build the current layers."""
+        self.inputs = self.current_inputs()
+        self.loops = None
+        self.borders = None
+
+    def merge_shell_polygons(self):
+        """Merge the layer polygons of all parts except internal surfaces."""
+        st = self.parent_structure
+        all_layers = getattr(st, self.list_name)
+        # merge_all_polygons() merges every layer in the list, so temporarily
+        # hide the internal surface layers from it
+        setattr(st, self.list_name, [layer for layer in all_layers
+            if not isinstance(layer.parent_part, InternalSurface)])
+        try:
+            if self.airfoil is None:
+                mp = st.merge_all_polygons()
+            else:
+                mp = st.merge_all_polygons(airfoil=self.airfoil)
+        finally:
+            setattr(st, self.list_name, all_layers)
+        return mp
+
+    def find_borders(self, merged_polygon=None):
+        """Find the parts that border the interior loop of each internal surface.
+
+        Must be run before any layers are rebuilt, so the interior loops match
+        the recorded inputs.
+
+        """
+        if merged_polygon is None:
+            merged_polygon = self.merge_shell_polygons()
+        self.loops = {}
+        self.borders = {}
+        for name in LayerDependencyGraph.internal_parts:
+            if self.part(name).exists():
+                self.loops[name] = self.part(name).interior_loop(
+                    merged_polygon)
+                self.borders[name] = self.bordering_parts(self.loops[name])
+            else:
+                self.borders[name] = []
+
+    def bordering_parts(self, loop, tolerance=1.0e-06, names=None):
+        """Returns a list of the shell parts that touch an interior loop.
+
+        Only the shell parts in the list `names` are checked, if it is given.
+
+        """
+        if names is None:
+            names = LayerDependencyGraph.shell_parts
+        (minx, miny, maxx, maxy) = loop.bounds
+        parts = []
+        for name in names:
+            for layer in self.part(name).layer.values():
+                # skip the distance calculation if the bounds don't overlap
+                (lminx, lminy, lmaxx, lmaxy) = layer.polygon.bounds
+                if (lminx > maxx+tolerance or lmaxx < minx-tolerance or
+                    lminy > maxy+tolerance or lmaxy < miny-tolerance):
+                    continue
+                if loop.distance(layer.polygon) < tolerance:
+                    parts.append(name)
+                    break
+        return parts
+
+    def find_loop(self, name):
+        """Find the new interior loop of an internal surface.
+
+        Only the layers of the parts that border the old interior loop are
+        merged, instead of every layer in the structure. Returns None if the
+        new loop can't be found this way.
+
+        """
+        polygons = []
+        for shell_name in self.borders[name]:
+            for layer in self.part(shell_name).layer.values():
+                polygons.append(layer.polygon)
+        try:
+            p = cascaded_union(polygons)
+        except ValueError:
+            return None
+        if p.geom_type != 'Polygon':
+            return None
+        # pick the hole that overlaps the old loop the most
+        old_loop = self.loops[name]
+        best_loop = None
+        best_area = 0.0
+        for interior in p.interiors:
+            loop = Polygon(interior)
+            a = loop.intersection(old_loop).area
+            if a > best_area:
+                best_loop = loop
+                best_area = a
+        return best_loop
+
+    def rebuild_part(self, name, merged_polygon=None, loop=None):
+        """Replace the layers of one part, keeping their place in the list."""
+        st = self.parent_structure
+        part = self.part(name)
+        layers = getattr(st, self.list_name)
+        old = [i for (i, layer) in enumerate(layers)
+            if layer.parent_part is part]
+        if len(old) > 0:
+            index = old[0]
+        else:
+            index = len(layers)
+        remaining = [layer for layer in layers if layer.parent_part is not part]
+        setattr(st, self.list_name, [])
+        part.layer = {}
+        part.alt_layer = {}
+        try:
+            if name in LayerDependencyGraph.internal_parts:
+                part.create_layers(merged_polygon, airfoil=self.airfoil,
+                    loop=loop)
+            else:
+                part.create_layers(airfoil=self.airfoil)
+        finally:
+            new = getattr(st, self.list_name)
+            setattr(st, self.list_name,
+                remaining[:index] + new + remaining[index:])
+
+    def update(self):
+        """Rebuild the layers of every part whose inputs have changed.
+
+        Returns a list of the names of the rebuilt parts, or None if a part
+        was added or removed (then, all the layers must be rebuilt).
+
+        """
+        if self.inputs is None:
+            return None
+        new_inputs = self.current_inputs()
+        for name in (LayerDependencyGraph.shell_parts +
+                     LayerDependencyGraph.internal_parts):
+            if new_inputs[name][0] != self.inputs[name][0]:
+                return None  # a part was added or removed
+        if self.borders is None:
+            self.find_borders()
+        # find the stale nodes, in dependency order
+        stale = set()
+        if new_inputs['airfoil'] != self.inputs['airfoil']:
+            stale.add('airfoil')
+        for name in (LayerDependencyGraph.shell_parts +
+                     LayerDependencyGraph.internal_parts):
+            if not self.part(name).exists():
+                continue
+            changed = (new_inputs[name] != self.inputs[name])
+            if changed or stale.intersection(self.dependencies(name)):
+                stale.add(name)
+        # rebuild the shell parts, then the internal surfaces
+        rebuilt_shell = [name for name in LayerDependencyGraph.shell_parts
+            if name in stale]
+        for name in rebuilt_shell:
+            self.rebuild_part(name)
+        # a rebuilt part may have grown into an internal surface that it
+        #   didn't border before, so check the old loops against the new
+        #   layers of the rebuilt parts, too
+        for name in LayerDependencyGraph.internal_parts:
+            if not self.part(name).exists():
+                continue
+            touching = self.bordering_parts(self.loops[name],
+                names=rebuilt_shell)
+            for shell_name in touching:
+                if shell_name not in self.borders[name]:
+                    self.borders[name].append(shell_name)
+            if touching:
+                stale.add(name)
+        stale_internal = [name for name in LayerDependencyGraph.internal_parts
+            if name in stale]
+        new_loops = {}
+        new_borders = {}
+        for name in stale_internal:
+            new_loops[name] = self.find_loop(name)
+            if new_loops[name] is None:
+                break
+            new_borders[name] = self.bordering_parts(new_loops[name])
+            # if a part that wasn't merged touches the new loop, the loop is
+            #   wrong (it's a hole in too few parts)
+            if not set(new_borders[name]).issubset(self.borders[name]):
+                new_loops[name] = None
+                break
+        if None in new_loops.values():
+            # fall back to merging every layer
+            mp = self.merge_shell_polygons()
+            for name in stale_internal:
+                new_loops[name] = self.part(name).interior_loop(mp)
+                new_borders[name] = self.bordering_parts(new_loops[name])
+        for name in stale_internal:
+            self.rebuild_part(name, loop=new_loops[name])
+            self.loops[name] = new_loops[name]
+            self.borders[name] = new_borders[name]
+        self.inputs = new_inputs
+        return [self.prefix + name for name in (LayerDependencyGraph.shell_parts
+            + LayerDependencyGraph.internal_parts) if name in stale]
+
+
 class MonoplaneStructure:
     """Define the monoplane laminate schedule (internal dimensions)."""
     def __init__(self, h_RB, b_SC, h_SC, b_SW1_biax, b_SW1_foam, x2_SW1,
@@ -1459,6 +1892,7 @@ class MonoplaneStructure:
             height_gelcoat = h_ext_surf_gelcoat)
         self.area = None
         self.mass = None
+        self._graph = LayerDependencyGraph(parent_structure=self)
 
     def __str__(self):
         """Returns a string of all the internal dimensions for this structure."""
@@ -1546,6 +1980,46 @@ class MonoplaneStructure:
             self.internal_surface_3.create_layers(mp)
         if self.internal_surface_4.exists():
             self.internal_surface_4.create_layers(mp)
+        self._graph.record_inputs()
+
+    def clear_all_layers(self):
+        """Delete the layers and alternate layers of every structural part."""
+        self._list_of_layers = []
+        for name in (LayerDependencyGraph.shell_parts +
+                     LayerDependencyGraph.internal_parts):
+            part = getattr(self, name)
+            part.layer = {}
+            part.alt_layer = {}
+        self.area = None
+        self.mass = None
+
+    def update_all_layers(self):
+        """Rebuild only the layers affected by changes to the part dimensions.
+
+        Must run <MonoplaneStructure>.create_all_layers() first.
+
+        Returns a list of the names of the parts that were rebuilt. If a part
+        was added or removed, all the layers are rebuilt.
+
+        Usage
+        -----
+        st = station.structure
+        st.create_all_layers()
+        st.spar_cap.height = 0.05
+        st.update_all_layers()
+
+        """
+        self.parent_station.find_part_edges()
+        rebuilt = self._graph.update()
+        if rebuilt is None:
+            self.clear_all_layers()
+            self.create_all_layers()
+            rebuilt = [name for name in (LayerDependencyGraph.shell_parts +
+                LayerDependencyGraph.internal_parts)
+                if getattr(self, name).exists()]
+        self.area = None
+        self.mass = None
+        return rebuilt
 
     def create_all_alternate_layers(self):
         """Create alternate layers for meshing certain structural parts."""
@@ -1676,270 +2150,57 @@ class MonoplaneStructure:
         self.mass = m
         return m
 
+    def estimate_mass_and_stiffness(self):
+        """Estimate the mass and stiffness properties of this station.
+
+        This is much faster than meshing the station and running VABS. See
+        structure.estimate_mass_and_stiffness() for details.
+
+        """
+        return estimate_mass_and_stiffness(self._list_of_layers)
+
+    def estimate_torsional_stiffness(self):
+        """Estimate the torsional stiffness and shear center of this station.
+
+        Uses multi-cell thin-walled theory (see thin_wall.py). Must run
+        <station>.airfoil.create_polygon() first.
+
+        Returns a dictionary:
+            'K_44, GJ_twist' : torsional stiffness
+            'shear center, x2' : chordwise coord of the shear center
+            'shear center, x3' : flapwise coord of the shear center
+
+        """
+        s = tw.ThinWallSection(self)
+        return {'K_44, GJ_twist' : s.GJ,
+                'shear center, x2' : s.shear_center[0],
+                'shear center, x3' : s.shear_center[1]}
+
+    def layer_table(self):
+        """Returns a long-format table of the area and mass of each layer.
+
+        See structure.layer_table() for the columns.
+
+        """
+        return layer_table(self, [('_list_of_layers', 'monoplane')])
+
     def calculate_all_percent_areas(self, print_flag=False):
         """Calculate the percent areas of all parts in this station.
 
         Returns a dictionary of area fractions for each structural part.
 
         """
-        d = {}
-        if print_flag:
-            print " ----- STATION #{0} -----".format(self.parent_station.station_num)
-        # d['blade station'] = self.parent_station.station_num
-        if self.external_surface.exists():
-            d['external surface (gelcoat)'] = self.external_surface.layer['gelcoat'].area_fraction()
-            d['external surface (triax)'] = self.external_surface.layer['triax'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, external surface, gelcoat".format(
-                    self.external_surface.layer['gelcoat'].area_fraction())
-                print "  {0:5.1%} area, external surface, triax".format(
-                    self.external_surface.layer['triax'].area_fraction())
-        if self.root_buildup.exists():
-            d['root buildup'] = self.root_buildup.layer['triax'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, root buildup".format(
-                    self.root_buildup.layer['triax'].area_fraction())
-        if self.spar_cap.exists():
-            d['spar cap (lower)'] = self.spar_cap.layer['lower'].area_fraction()
-            d['spar cap (upper)'] = self.spar_cap.layer['upper'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, spar cap, lower".format(
-                    self.spar_cap.layer['lower'].area_fraction())
-                print "  {0:5.1%} area, spar cap, upper".format(
-                    self.spar_cap.layer['upper'].area_fraction())
-        if self.aft_panel_1.exists():
-            d['aft panel 1 (lower)'] = self.aft_panel_1.layer['lower'].area_fraction()
-            d['aft panel 1 (upper)'] = self.aft_panel_1.layer['upper'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, aft panel 1, lower".format(
-                    self.aft_panel_1.layer['lower'].area_fraction())
-                print "  {0:5.1%} area, aft panel 1, upper".format(
-                    self.aft_panel_1.layer['upper'].area_fraction())
-        if self.aft_panel_2.exists():
-            d['aft panel 2 (lower)'] = self.aft_panel_2.layer['lower'].area_fraction()
-            d['aft panel 2 (upper)'] = self.aft_panel_2.layer['upper'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, aft panel 2, lower".format(
-                    self.aft_panel_2.layer['lower'].area_fraction())
-                print "  {0:5.1%} area, aft panel 2, upper".format(
-                    self.aft_panel_2.layer['upper'].area_fraction())
-        if self.LE_panel.exists():
-            d['LE panel'] = self.LE_panel.layer['foam'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, LE panel".format(
-                    self.LE_panel.layer['foam'].area_fraction())
-        if self.shear_web_1.exists():
-            d['shear web 1 (left biax)'] = self.shear_web_1.layer['biax, left'].area_fraction()
-            d['shear web 1 (foam)'] = self.shear_web_1.layer['foam'].area_fraction()
-            d['shear web 1 (right biax)'] = self.shear_web_1.layer['biax, right'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, shear web 1, left biax".format(
-                    self.shear_web_1.layer['biax, left'].area_fraction())
-                print "  {0:5.1%} area, shear web 1, foam".format(
-                    self.shear_web_1.layer['foam'].area_fraction())
-                print "  {0:5.1%} area, shear web 1, right biax".format(
-                    self.shear_web_1.layer['biax, right'].area_fraction())
-        if self.shear_web_2.exists():
-            d['shear web 2 (left biax)'] = self.shear_web_2.layer['biax, left'].area_fraction()
-            d['shear web 2 (foam)'] = self.shear_web_2.layer['foam'].area_fraction()
-            d['shear web 2 (right biax)'] = self.shear_web_2.layer['biax, right'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, shear web 2, left biax".format(
-                    self.shear_web_2.layer['biax, left'].area_fraction())
-                print "  {0:5.1%} area, shear web 2, foam".format(
-                    self.shear_web_2.layer['foam'].area_fraction())
-                print "  {0:5.1%} area, shear web 2, right biax".format(
-                    self.shear_web_2.layer['biax, right'].area_fraction())
-        if self.shear_web_3.exists():
-            d['shear web 3 (left biax)'] = self.shear_web_3.layer['biax, left'].area_fraction()
-            d['shear web 3 (foam)'] = self.shear_web_3.layer['foam'].area_fraction()
-            d['shear web 3 (right biax)'] = self.shear_web_3.layer['biax, right'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, shear web 3, left biax".format(
-                    self.shear_web_3.layer['biax, left'].area_fraction())
-                print "  {0:5.1%} area, shear web 3, foam".format(
-                    self.shear_web_3.layer['foam'].area_fraction())
-                print "  {0:5.1%} area, shear web 3, right biax".format(
-                    self.shear_web_3.layer['biax, right'].area_fraction())
-        if self.TE_reinforcement.exists():
-            d['TE reinforcement (uniax)'] = self.TE_reinforcement.layer['uniax'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, TE reinforcement, uniax".format(
-                    self.TE_reinforcement.layer['uniax'].area_fraction())
-            try:
-                d['TE reinforcement (foam)'] = self.TE_reinforcement.layer['foam'].area_fraction()
-                if print_flag:
-                    print "  {0:5.1%} area, TE reinforcement, foam".format(
-                        self.TE_reinforcement.layer['foam'].area_fraction())
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                d['TE reinforcement (foam)'] = 0.0
-        if self.internal_surface_1.exists():
-            d['internal surface 1 (triax)'] = self.internal_surface_1.layer['triax'].area_fraction()
-            d['internal surface 1 (resin)'] = self.internal_surface_1.layer['resin'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, internal surface 1, triax".format(
-                    self.internal_surface_1.layer['triax'].area_fraction())
-                print "  {0:5.1%} area, internal surface 1, resin".format(
-                    self.internal_surface_1.layer['resin'].area_fraction())
-        if self.internal_surface_2.exists():
-            d['internal surface 2 (triax)'] = self.internal_surface_2.layer['triax'].area_fraction()
-            d['internal surface 2 (resin)'] = self.internal_surface_2.layer['resin'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, internal surface 2, triax".format(
-                    self.internal_surface_2.layer['triax'].area_fraction())
-                print "  {0:5.1%} area, internal surface 2, resin".format(
-                    self.internal_surface_2.layer['resin'].area_fraction())
-        if self.internal_surface_3.exists():
-            d['internal surface 3 (triax)'] = self.internal_surface_3.layer['triax'].area_fraction()
-            d['internal surface 3 (resin)'] = self.internal_surface_3.layer['resin'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, internal surface 3, triax".format(
-                    self.internal_surface_3.layer['triax'].area_fraction())
-                print "  {0:5.1%} area, internal surface 3, resin".format(
-                    self.internal_surface_3.layer['resin'].area_fraction())
-        if self.internal_surface_4.exists():
-            d['internal surface 4 (triax)'] = self.internal_surface_4.layer['triax'].area_fraction()
-            d['internal surface 4 (resin)'] = self.internal_surface_4.layer['resin'].area_fraction()
-            if print_flag:
-                print "  {0:5.1%} area, internal surface 4, triax".format(
-                    self.internal_surface_4.layer['triax'].area_fraction())
-                print "  {0:5.1%} area, internal surface 4, resin".format(
-                    self.internal_surface_4.layer['resin'].area_fraction())
-        return d
+        return percent_breakdown(self.layer_table(), 'area', print_flag,
+            self.parent_station.station_num)
 
     def calculate_all_percent_masses(self, print_flag=False):
-        """Calculate the mass fractions of all parts in this station.
+        """Calculate the percent masses of all parts in this station.
 
-        Returns a dictionary of mass (per unit length) fractions for each
-        structural part.
+        Returns a dictionary of mass fractions for each structural part.
 
         """
-        d = {}
-        if print_flag:
-            print " ----- STATION #{0} -----".format(self.parent_station.station_num)
-        # d['blade station'] = self.parent_station.station_num
-        if self.external_surface.exists():
-            d['external surface (gelcoat)'] = self.external_surface.layer['gelcoat'].mass_fraction()
-            d['external surface (triax)'] = self.external_surface.layer['triax'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, external surface, gelcoat".format(
-                    self.external_surface.layer['gelcoat'].mass_fraction())
-                print "  {0:5.1%} mass/length, external surface, triax".format(
-                    self.external_surface.layer['triax'].mass_fraction())
-        if self.root_buildup.exists():
-            d['root buildup'] = self.root_buildup.layer['triax'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, root buildup".format(
-                    self.root_buildup.layer['triax'].mass_fraction())
-        if self.spar_cap.exists():
-            d['spar cap (lower)'] = self.spar_cap.layer['lower'].mass_fraction()
-            d['spar cap (upper)'] = self.spar_cap.layer['upper'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, spar cap, lower".format(
-                    self.spar_cap.layer['lower'].mass_fraction())
-                print "  {0:5.1%} mass/length, spar cap, upper".format(
-                    self.spar_cap.layer['upper'].mass_fraction())
-        if self.aft_panel_1.exists():
-            d['aft panel 1 (lower)'] = self.aft_panel_1.layer['lower'].mass_fraction()
-            d['aft panel 1 (upper)'] = self.aft_panel_1.layer['upper'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, aft panel 1, lower".format(
-                    self.aft_panel_1.layer['lower'].mass_fraction())
-                print "  {0:5.1%} mass/length, aft panel 1, upper".format(
-                    self.aft_panel_1.layer['upper'].mass_fraction())
-        if self.aft_panel_2.exists():
-            d['aft panel 2 (lower)'] = self.aft_panel_2.layer['lower'].mass_fraction()
-            d['aft panel 2 (upper)'] = self.aft_panel_2.layer['upper'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, aft panel 2, lower".format(
-                    self.aft_panel_2.layer['lower'].mass_fraction())
-                print "  {0:5.1%} mass/length, aft panel 2, upper".format(
-                    self.aft_panel_2.layer['upper'].mass_fraction())
-        if self.LE_panel.exists():
-            d['LE panel'] = self.LE_panel.layer['foam'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, LE panel".format(
-                    self.LE_panel.layer['foam'].mass_fraction())
-        if self.shear_web_1.exists():
-            d['shear web 1 (left biax)'] = self.shear_web_1.layer['biax, left'].mass_fraction()
-            d['shear web 1 (foam)'] = self.shear_web_1.layer['foam'].mass_fraction()
-            d['shear web 1 (right biax)'] = self.shear_web_1.layer['biax, right'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, shear web 1, left biax".format(
-                    self.shear_web_1.layer['biax, left'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 1, foam".format(
-                    self.shear_web_1.layer['foam'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 1, right biax".format(
-                    self.shear_web_1.layer['biax, right'].mass_fraction())
-        if self.shear_web_2.exists():
-            d['shear web 2 (left biax)'] = self.shear_web_2.layer['biax, left'].mass_fraction()
-            d['shear web 2 (foam)'] = self.shear_web_2.layer['foam'].mass_fraction()
-            d['shear web 2 (right biax)'] = self.shear_web_2.layer['biax, right'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, shear web 2, left biax".format(
-                    self.shear_web_2.layer['biax, left'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 2, foam".format(
-                    self.shear_web_2.layer['foam'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 2, right biax".format(
-                    self.shear_web_2.layer['biax, right'].mass_fraction())
-        if self.shear_web_3.exists():
-            d['shear web 3 (left biax)'] = self.shear_web_3.layer['biax, left'].mass_fraction()
-            d['shear web 3 (foam)'] = self.shear_web_3.layer['foam'].mass_fraction()
-            d['shear web 3 (right biax)'] = self.shear_web_3.layer['biax, right'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, shear web 3, left biax".format(
-                    self.shear_web_3.layer['biax, left'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 3, foam".format(
-                    self.shear_web_3.layer['foam'].mass_fraction())
-                print "  {0:5.1%} mass/length, shear web 3, right biax".format(
-                    self.shear_web_3.layer['biax, right'].mass_fraction())
-        if self.TE_reinforcement.exists():
-            d['TE reinforcement (uniax)'] = self.TE_reinforcement.layer['uniax'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, TE reinforcement, uniax".format(
-                    self.TE_reinforcement.layer['uniax'].mass_fraction())
-            try:
-                d['TE reinforcement (foam)'] = self.TE_reinforcement.layer['foam'].mass_fraction()
-                if print_flag:
-                    print "  {0:5.1%} mass/length, TE reinforcement, foam".format(
-                        self.TE_reinforcement.layer['foam'].mass_fraction())
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                d['TE reinforcement (foam)'] = 0.0
-        if self.internal_surface_1.exists():
-            d['internal surface 1 (triax)'] = self.internal_surface_1.layer['triax'].mass_fraction()
-            d['internal surface 1 (resin)'] = self.internal_surface_1.layer['resin'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, internal surface 1, triax".format(
-                    self.internal_surface_1.layer['triax'].mass_fraction())
-                print "  {0:5.1%} mass/length, internal surface 1, resin".format(
-                    self.internal_surface_1.layer['resin'].mass_fraction())
-        if self.internal_surface_2.exists():
-            d['internal surface 2 (triax)'] = self.internal_surface_2.layer['triax'].mass_fraction()
-            d['internal surface 2 (resin)'] = self.internal_surface_2.layer['resin'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, internal surface 2, triax".format(
-                    self.internal_surface_2.layer['triax'].mass_fraction())
-                print "  {0:5.1%} mass/length, internal surface 2, resin".format(
-                    self.internal_surface_2.layer['resin'].mass_fraction())
-        if self.internal_surface_3.exists():
-            d['internal surface 3 (triax)'] = self.internal_surface_3.layer['triax'].mass_fraction()
-            d['internal surface 3 (resin)'] = self.internal_surface_3.layer['resin'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, internal surface 3, triax".format(
-                    self.internal_surface_3.layer['triax'].mass_fraction())
-                print "  {0:5.1%} mass/length, internal surface 3, resin".format(
-                    self.internal_surface_3.layer['resin'].mass_fraction())
-        if self.internal_surface_4.exists():
-            d['internal surface 4 (triax)'] = self.internal_surface_4.layer['triax'].mass_fraction()
-            d['internal surface 4 (resin)'] = self.internal_surface_4.layer['resin'].mass_fraction()
-            if print_flag:
-                print "  {0:5.1%} mass/length, internal surface 4, triax".format(
-                    self.internal_surface_4.layer['triax'].mass_fraction())
-                print "  {0:5.1%} mass/length, internal surface 4, resin".format(
-                    self.internal_surface_4.layer['resin'].mass_fraction())
-        return d
+        return percent_breakdown(self.layer_table(), 'mass', print_flag,
+            self.parent_station.station_num)
 
     def write_all_part_polygons(self):
         """Write the coordinates of all structural parts to `station_path`s."""
@@ -2038,9 +2299,13 @@ class MonoplaneStructure:
                 pass
 
     def write_truegrid_inputfile(self, interrupt_flag=False,
-        additional_layers=[], alt_TE_reinforcement=False, soft_warning=False):
+        additional_layers=[], alt_TE_reinforcement=False, soft_warning=False,
+        dry_run=False):
         """Write the TrueGrid input file in `station_path`.
 
+        The whole input file is collected in a truegrid.TrueGridDeck, and then
+        written to disk at once.
+
         Parameters
         ----------
         interrupt_flag : bool, True if intterupt statements should be written
@@ -2055,15 +2320,17 @@ class MonoplaneStructure:
             more/less than 4 edges were found in a new cut layer. If more than
             4 edges were found, the message also says if the extra edges were 
             thrown out.
+        dry_run : bool, True if the input file should be returned as a
+            string instead of written to `station_path`, False otherwise
 
         """
-        self.write_truegrid_header()
-        start_edge_num = self.write_all_alt_layer_edges(alt_TE_reinforcement=alt_TE_reinforcement,
+        stn = self.parent_station
+        f = tg.TrueGridDeck()
+        self.write_truegrid_header(f)
+        start_edge_num = self.write_all_alt_layer_edges(f,
+            alt_TE_reinforcement=alt_TE_reinforcement,
             soft_warning=soft_warning)
         if len(additional_layers) > 0:
-            stn = self.parent_station
-            f = open(os.path.join(stn.station_path,
-                self.truegrid_input_filename), 'a')
             for layer in additional_layers:
                 part_name = layer.parent_part.__class__.__name__  # part name
                 layer_name = layer.name  # layer name
@@ -2076,14 +2343,16 @@ class MonoplaneStructure:
                 f.write(fmt.format(part_name, layer_name))
                 layer.write_layer_edges(f, start_edge_num)
                 start_edge_num += 4
-            f.close()
-        # self.write_all_block_meshes()
-        self.write_truegrid_footer(interrupt_flag=interrupt_flag)
+        # self.write_all_block_meshes(f)
+        self.write_truegrid_footer(f, interrupt_flag=interrupt_flag)
+        if dry_run:
+            return f.getvalue()
+        f.save(os.path.join(stn.station_path, self.truegrid_input_filename))
         print " Wrote TrueGrid input file for Station #{0}.".format(
-            self.parent_station.station_num)
+            stn.station_num)
 
-    def write_truegrid_header(self, outputfile_type='abaqus'):
-        """Create a TrueGrid input file and write the header.
+    def write_truegrid_header(self, f, outputfile_type='abaqus'):
+        """Write the header of the TrueGrid input file to the deck f.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
@@ -2091,8 +2360,6 @@ class MonoplaneStructure:
         stn = self.parent_station
         b = stn.parent_blade
         separator = "c " + "-"*40 + "\n"
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'w')
         f.write("c {0} ".format(b.name) + "-"*40 + "\n")
         f.write("c Station #{0:02d}\n".format(stn.station_num))
         f.write("\n")
@@ -2124,13 +2391,9 @@ class MonoplaneStructure:
         f.write("\n")
         f.write(separator)
         f.write("\n")
-        f.close()
 
-    def write_truegrid_footer(self, interrupt_flag=False):
-        """Write the footer for the TrueGrid input file."""
-        stn = self.parent_station
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
+    def write_truegrid_footer(self, f, interrupt_flag=False):
+        """Write the footer of the TrueGrid input file to the deck f."""
         f.write("c merge all the individual block meshes into a single mesh\n")
         f.write("merge\n")
         f.write("c display all 3D curves\n")
@@ -2156,10 +2419,9 @@ class MonoplaneStructure:
         f.write("write\n")
         f.write("\n")
         f.write("c exit\n")
-        f.close()
 
-    def write_all_layer_edges(self):
-        """Write the coordinates of all layer edges to `station_path`.
+    def write_all_layer_edges(self, f):
+        """Write the coordinates of all layer edges to the deck f.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
@@ -2173,10 +2435,7 @@ class MonoplaneStructure:
         _dict_of_edge_nums['SparCap; uniax; right'] = 22
 
         """
-        stn = self.parent_station
         start_edge_num = 1
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
         # Procedure for each structural part:
         # 1. write edges for a layer
         # 2. increment start_edge_num by 4 edges (left, bottom, top, right)
@@ -2254,19 +2513,15 @@ class MonoplaneStructure:
                     d = layer_obj.write_layer_edges(f, start_edge_num)
                 start_edge_num += len(d)
                 self._dict_of_edge_nums.update(d)
-        f.close()
 
-    def write_all_alt_layer_edges(self, alt_TE_reinforcement=False,
+    def write_all_alt_layer_edges(self, f, alt_TE_reinforcement=False,
         soft_warning=False):
-        """Write the coordinates of all layer edges to `station_path`.
+        """Write the coordinates of all layer edges to the deck f.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
         """
-        stn = self.parent_station
         start_edge_num = 1
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
         if self.root_buildup.exists():
             f.write("c root buildup " + "-"*40 + "\n")
             sd = sorted(self.root_buildup.alt_layer.items())
@@ -2475,25 +2730,21 @@ class MonoplaneStructure:
         #             d = layer_obj.write_layer_edges(f, start_edge_num)
         #         start_edge_num += len(d)
         #         self._dict_of_edge_nums.update(d)
-        f.close()
         return start_edge_num
 
-    def write_block_mesh(self, dict_key_prefix, i_cells, j_cells):
-        """Write the commands for creating ONE block mesh for ONE layer.
+    def write_block_mesh(self, f, dict_key_prefix, i_cells, j_cells):
+        """Write the commands for creating ONE block mesh for ONE layer to f.
 
         This file is formatted as a Truegrid input file (*.tg).
 
         Usage:
-        write_block_mesh(
+        write_block_mesh(f,
             dict_key_prefix='RootBuildup; triax, lower left',
             i_cells=60,
             j_cells=2)
 
         """
-        stn = self.parent_station
         d = self._dict_of_edge_nums
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
         f.write("c make a block mesh for: {0}\n".format(dict_key_prefix))
         # create the default block mesh
         f.write("block 1 {0}; 1 {1}; -1;\n".format(i_cells,j_cells))
@@ -2519,154 +2770,153 @@ class MonoplaneStructure:
         f.write("cure 1 2 1 2 2 1 {0}\n".format(
             d['{0}; top'.format(dict_key_prefix)]))
         f.write("\n")
-        f.close()
 
-    def write_all_block_meshes(self, interrupt_flag=False):
+    def write_all_block_meshes(self, f, interrupt_flag=False):
         """Write the commands for creating all TrueGrid block meshes.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
         """
         if self.root_buildup.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='RootBuildup; triax, lower left',
                 i_cells=60,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='RootBuildup; triax, lower right',
                 i_cells=60,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='RootBuildup; triax, upper right',
                 i_cells=60,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='RootBuildup; triax, upper left',
                 i_cells=60,
                 j_cells=2)
         if self.spar_cap.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='SparCap; upper',
                 i_cells=30,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='SparCap; lower',
                 i_cells=30,
                 j_cells=2)
         if self.aft_panel_1.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='AftPanel1; upper',
                 i_cells=18,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='AftPanel1; lower',
                 i_cells=18,
                 j_cells=2)
         if self.aft_panel_2.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='AftPanel2; upper',
                 i_cells=18,
                 j_cells=2)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='AftPanel2; lower',
                 i_cells=18,
                 j_cells=2)
         if self.LE_panel.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='LE_Panel; foam',
                 i_cells=2,
                 j_cells=60)
         if self.shear_web_1.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb1; biax, left',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb1; foam',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb1; biax, right',
                 i_cells=2,
                 j_cells=18)
         if self.shear_web_2.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb2; biax, left',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb2; foam',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb2; biax, right',
                 i_cells=2,
                 j_cells=18)
         if self.shear_web_3.exists():
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb3; biax, left',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb3; foam',
                 i_cells=2,
                 j_cells=18)
-            self.write_block_mesh(
+            self.write_block_mesh(f,
                 dict_key_prefix='ShearWeb3; biax, right',
                 i_cells=2,
                 j_cells=18)
         if self.TE_reinforcement.exists():
             if self.parent_station.airfoil.has_sharp_TE:
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, upper left',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, upper middle',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, upper right',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, lower left',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, lower middle',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax, lower right',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; foam, upper left',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; foam, upper middle',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; foam, lower left',
                     i_cells=10,
                     j_cells=2)
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; foam, lower middle',
                     i_cells=10,
                     j_cells=2)
             else:
                 # uniax layer
-                self.write_block_mesh(
+                self.write_block_mesh(f,
                     dict_key_prefix='TE_Reinforcement; uniax',
                     i_cells=2,
                     j_cells=30)
                 # check if the foam layer exists
                 d = self._dict_of_edge_nums
                 if 'TE_Reinforcement; foam; left' in d.keys():
-                    self.write_block_mesh(
+                    self.write_block_mesh(f,
                         dict_key_prefix='TE_Reinforcement; foam',
                         i_cells=2,
                         j_cells=30)
@@ -2850,6 +3100,10 @@ class BiplaneStructure:
         self.upper_mass = None
         self.area = None
         self.mass = None
+        self._lower_graph = LayerDependencyGraph(parent_structure=self,
+            airfoil='lower')
+        self._upper_graph = LayerDependencyGraph(parent_structure=self,
+            airfoil='upper')
 
     def __str__(self):
         """Returns a string of all the internal dimensions for this structure."""
@@ -2944,9 +3198,80 @@ class BiplaneStructure:
              'upper external surface': self.upper_external_surface.exists()}
         return d
 
-    def create_all_layers(self):
+    def part_pairs(self):
+        """Returns a list of (lower part, upper part) tuples for this station."""
+        return [(self.lower_external_surface, self.upper_external_surface),
+                (self.lower_root_buildup, self.upper_root_buildup),
+                (self.lower_spar_cap, self.upper_spar_cap),
+                (self.lower_aft_panel_1, self.upper_aft_panel_1),
+                (self.lower_aft_panel_2, self.upper_aft_panel_2),
+                (self.lower_LE_panel, self.upper_LE_panel),
+                (self.lower_shear_web_1, self.upper_shear_web_1),
+                (self.lower_shear_web_2, self.upper_shear_web_2),
+                (self.lower_shear_web_3, self.upper_shear_web_3),
+                (self.lower_TE_reinforcement, self.upper_TE_reinforcement),
+                (self.lower_internal_surface_1, self.upper_internal_surface_1),
+                (self.lower_internal_surface_2, self.upper_internal_surface_2),
+                (self.lower_internal_surface_3, self.upper_internal_surface_3),
+                (self.lower_internal_surface_4, self.upper_internal_surface_4)]
+
+    def upper_is_copy_of_lower(self):
+        """Check if the upper airfoil structure is a copy of the lower one.
+
+        Returns True if both airfoils use the same airfoil file, chord, and
+        shear web reference point, and every part has the same laminate
+        dimensions. Then, the upper layers are the lower layers shifted by the
+        gap (flapwise) and the stagger (chordwise).
+
+        """
+        af = self.parent_station.airfoil
+        if (af.lower_filename != af.upper_filename or
+            af.lower_chord != af.upper_chord or
+            af.lower_SW_ref_pt_fraction != af.upper_SW_ref_pt_fraction):
+            return False
+        for (lower_part, upper_part) in self.part_pairs():
+            for (lower_dim, upper_dim) in zip(lower_part.dimensions(),
+                                              upper_part.dimensions()):
+                if isnan(lower_dim) and isnan(upper_dim):
+                    continue
+                elif lower_dim != upper_dim:
+                    return False
+        return True
+
+    def copy_lower_layers_to_upper(self):
+        """Create the upper layers by translating copies of the lower layers.
+
+        Must run <BiplaneStructure>.create_all_layers() for the lower airfoil
+        first, and <BiplaneStructure>.upper_is_copy_of_lower() must be True.
+
+        """
+        af = self.parent_station.airfoil
+        # map each lower part to its upper part
+        upper_part = {}
+        for (lp, up) in self.part_pairs():
+            upper_part[id(lp)] = up
+        # preserve the order of the lower layers in the list of upper layers
+        for lower_layer in self._list_of_lower_layers:
+            part = upper_part[id(lower_layer.parent_part)]
+            p = translate(lower_layer.polygon, xoff=-af.stagger, yoff=af.gap)
+            part.layer[lower_layer.name] = l.Layer(p, lower_layer.material,
+                parent_part=part, name=lower_layer.name,
+                face_color=lower_layer.face_color,
+                edge_color=lower_layer.edge_color)
+            self._list_of_upper_layers.append(part.layer[lower_layer.name])
+
+    def create_all_layers(self, copy_flag=True):
         # fix !!!
-        """Create polygons for single material layers of each structural part."""
+        """Create polygons for single material layers of each structural part.
+
+        Parameters
+        ----------
+        copy_flag : bool, if True and the upper airfoil structure is a copy of
+            the lower one (see <BiplaneStructure>.upper_is_copy_of_lower()),
+            translate the lower layers to create the upper layers, instead of
+            building the upper layers from scratch (default: True)
+
+        """
         # lower layers --------------------------------------------------------
         if self.lower_external_surface.exists():
             self.lower_external_surface.create_layers(airfoil='lower')
@@ -2978,6 +3303,11 @@ class BiplaneStructure:
         if self.lower_internal_surface_4.exists():
             self.lower_internal_surface_4.create_layers(lmp, airfoil='lower')
         # upper layers --------------------------------------------------------
+        self._lower_graph.record_inputs()
+        if copy_flag and self.upper_is_copy_of_lower():
+            self.copy_lower_layers_to_upper()
+            self._upper_graph.record_inputs()
+            return
         if self.upper_external_surface.exists():
             self.upper_external_surface.create_layers(airfoil='upper')
         if self.upper_root_buildup.exists():
@@ -3007,6 +3337,65 @@ class BiplaneStructure:
             self.upper_internal_surface_3.create_layers(ump, airfoil='upper')
         if self.upper_internal_surface_4.exists():
             self.upper_internal_surface_4.create_layers(ump, airfoil='upper')
+        self._upper_graph.record_inputs()
+
+    def clear_all_layers(self):
+        """Delete the layers and alternate layers of every structural part."""
+        self._list_of_lower_layers = []
+        self._list_of_upper_layers = []
+        for (lower_part, upper_part) in self.part_pairs():
+            for part in [lower_part, upper_part]:
+                part.layer = {}
+                part.alt_layer = {}
+        self.area = None
+        self.mass = None
+
+    def update_all_layers(self, copy_flag=True):
+        """Rebuild only the layers affected by changes to the part dimensions.
+
+        Must run <BiplaneStructure>.create_all_layers() first.
+
+        Returns a list of the names of the parts that were rebuilt. If a part
+        was added or removed, all the layers are rebuilt.
+
+        Parameters
+        ----------
+        copy_flag : bool, if True and the upper airfoil structure is a copy of
+            the lower one, translate the lower layers to create the upper
+            layers (see <BiplaneStructure>.create_all_layers())
+
+        """
+        self.parent_station.find_part_edges()
+        rebuilt = self._lower_graph.update()
+        if rebuilt is not None:
+            if copy_flag and self.upper_is_copy_of_lower():
+                if len(rebuilt) > 0:
+                    for (lower_part, upper_part) in self.part_pairs():
+                        upper_part.layer = {}
+                        upper_part.alt_layer = {}
+                    self._list_of_upper_layers = []
+                    self.copy_lower_layers_to_upper()
+                    rebuilt += ['upper_' + name[len('lower_'):]
+                        for name in rebuilt]
+                self._upper_graph.record_inputs()
+            else:
+                rebuilt_upper = self._upper_graph.update()
+                if rebuilt_upper is None:
+                    rebuilt = None
+                else:
+                    rebuilt += rebuilt_upper
+        if rebuilt is None:
+            self.clear_all_layers()
+            self.create_all_layers(copy_flag)
+            rebuilt = []
+            for side in ['lower_', 'upper_']:
+                for name in (LayerDependencyGraph.shell_parts +
+                             LayerDependencyGraph.internal_parts):
+                    if getattr(self, side + name).exists():
+                        rebuilt.append(side + name)
+        self.area = None
+        self.mass = None
+        return rebuilt
 
     def merge_all_polygons(self, airfoil, plot_flag=False):
         """Merges all the layer polygons in this structure into one polygon.
@@ -3459,321 +3848,94 @@ class BiplaneStructure:
         m = m_l + m_u
         self.mass = m
         return m
+
+    def estimate_mass_and_stiffness(self, airfoil=None):
+        """Estimate the mass and stiffness properties of this station.
+
+        This is much faster than meshing the station and running VABS. See
+        structure.estimate_mass_and_stiffness() for details.
+
+        Parameters
+        ----------
+        airfoil : str, 'lower' or 'upper' to include only one airfoil
+            (default=None, include both airfoils)
+
+        """
+        if airfoil is None:
+            list_of_layers = (self._list_of_lower_layers +
+                self._list_of_upper_layers)
+        elif airfoil == 'lower':
+            list_of_layers = self._list_of_lower_layers
+        elif airfoil == 'upper':
+            list_of_layers = self._list_of_upper_layers
+        else:
+            raise ValueError("Keyword `airfoil` must be 'lower', 'upper', or None.")
+        return estimate_mass_and_stiffness(list_of_layers)
+
+    def estimate_torsional_stiffness(self):
+        """Estimate the torsional stiffness and shear centers of this station.
+
+        Uses multi-cell thin-walled theory (see thin_wall.py) for each
+        airfoil. The airfoils are not connected in the cross-section, so their
+        torsional stiffnesses are added, and each airfoil has its own shear
+        center. Must run <station>.airfoil.create_polygon() first.
+
+        Returns a dictionary:
+            'K_44, GJ_twist' : torsional stiffness
+            'shear center, x2 (lower)' : chordwise coord of the shear center
+                of the lower airfoil
+            'shear center, x3 (lower)' : flapwise coord of the shear center
+                of the lower airfoil
+            'shear center, x2 (upper)' : ... of the upper airfoil
+            'shear center, x3 (upper)' : ... of the upper airfoil
+
+        """
+        sl = tw.ThinWallSection(self, airfoil='lower')
+        su = tw.ThinWallSection(self, airfoil='upper')
+        return {'K_44, GJ_twist' : sl.GJ + su.GJ,
+                'shear center, x2 (lower)' : sl.shear_center[0],
+                'shear center, x3 (lower)' : sl.shear_center[1],
+                'shear center, x2 (upper)' : su.shear_center[0],
+                'shear center, x3 (upper)' : su.shear_center[1]}
         
-    def calculate_all_percent_areas(self):
+    def layer_table(self):
+        """Returns a long-format table of the area and mass of each layer.
+
+        The 'airfoil' column is 'lower' or 'upper'. See structure.layer_table()
+        for the other columns.
+
+        """
+        return layer_table(self, [('_list_of_lower_layers', 'lower'),
+                                  ('_list_of_upper_layers', 'upper')])
+
+    def calculate_all_percent_areas(self, print_flag=False):
         """Calculate the percent areas of all parts in this station.
 
-        Returns a dictionary of area fractions for each structural part.
+        Returns a dictionary of area fractions for each structural part, with
+        the lower and upper airfoils added together.
 
         """
-        # lower airfoil -------------------------------------------------------
-        dl = {}  # dictionary for lower airfoils
-        if self.lower_external_surface.exists():
-            dl['external surface (gelcoat)'] = self.lower_external_surface.layer['gelcoat'].area_fraction()
-            dl['external surface (triax)'] = self.lower_external_surface.layer['triax'].area_fraction()
-        if self.lower_root_buildup.exists():
-            dl['root buildup'] = self.lower_root_buildup.layer['triax'].area_fraction()
-        if self.lower_spar_cap.exists():
-            dl['spar cap (lower)'] = self.lower_spar_cap.layer['lower'].area_fraction()
-            dl['spar cap (upper)'] = self.lower_spar_cap.layer['upper'].area_fraction()
-        if self.lower_aft_panel_1.exists():
-            dl['aft panel 1 (lower)'] = self.lower_aft_panel_1.layer['lower'].area_fraction()
-            dl['aft panel 1 (upper)'] = self.lower_aft_panel_1.layer['upper'].area_fraction()
-        if self.lower_aft_panel_2.exists():
-            dl['aft panel 2 (lower)'] = self.lower_aft_panel_2.layer['lower'].area_fraction()
-            dl['aft panel 2 (upper)'] = self.lower_aft_panel_2.layer['upper'].area_fraction()
-        if self.lower_LE_panel.exists():
-            dl['LE panel'] = self.lower_LE_panel.layer['foam'].area_fraction()
-        if self.lower_shear_web_1.exists():
-            dl['shear web 1 (left biax)'] = self.lower_shear_web_1.layer['biax, left'].area_fraction()
-            dl['shear web 1 (foam)'] = self.lower_shear_web_1.layer['foam'].area_fraction()
-            dl['shear web 1 (right biax)'] = self.lower_shear_web_1.layer['biax, right'].area_fraction()
-        if self.lower_shear_web_2.exists():
-            dl['shear web 2 (left biax)'] = self.lower_shear_web_2.layer['biax, left'].area_fraction()
-            dl['shear web 2 (foam)'] = self.lower_shear_web_2.layer['foam'].area_fraction()
-            dl['shear web 2 (right biax)'] = self.lower_shear_web_2.layer['biax, right'].area_fraction()
-        if self.lower_shear_web_3.exists():
-            dl['shear web 3 (left biax)'] = self.lower_shear_web_3.layer['biax, left'].area_fraction()
-            dl['shear web 3 (foam)'] = self.lower_shear_web_3.layer['foam'].area_fraction()
-            dl['shear web 3 (right biax)'] = self.lower_shear_web_3.layer['biax, right'].area_fraction()
-        if self.lower_TE_reinforcement.exists():
-            dl['TE reinforcement (uniax)'] = self.lower_TE_reinforcement.layer['uniax'].area_fraction()
-            try:
-                dl['TE reinforcement (foam)'] = self.lower_TE_reinforcement.layer['foam'].area_fraction()
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                dl['TE reinforcement (foam)'] = 0.0
-        if self.lower_internal_surface_1.exists():
-            dl['internal surface 1 (triax)'] = self.lower_internal_surface_1.layer['triax'].area_fraction()
-            dl['internal surface 1 (resin)'] = self.lower_internal_surface_1.layer['resin'].area_fraction()
-        if self.lower_internal_surface_2.exists():
-            dl['internal surface 2 (triax)'] = self.lower_internal_surface_2.layer['triax'].area_fraction()
-            dl['internal surface 2 (resin)'] = self.lower_internal_surface_2.layer['resin'].area_fraction()
-        if self.lower_internal_surface_3.exists():
-            dl['internal surface 3 (triax)'] = self.lower_internal_surface_3.layer['triax'].area_fraction()
-            dl['internal surface 3 (resin)'] = self.lower_internal_surface_3.layer['resin'].area_fraction()
-        if self.lower_internal_surface_4.exists():
-            dl['internal surface 4 (triax)'] = self.lower_internal_surface_4.layer['triax'].area_fraction()
-            dl['internal surface 4 (resin)'] = self.lower_internal_surface_4.layer['resin'].area_fraction()
-        # upper airfoil -------------------------------------------------------
-        du = {}  # dictionary for upper airfoils
-        if self.lower_external_surface.exists():
-            du['external surface (gelcoat)'] = self.lower_external_surface.layer['gelcoat'].area_fraction()
-            du['external surface (triax)'] = self.lower_external_surface.layer['triax'].area_fraction()
-        if self.lower_root_buildup.exists():
-            du['root buildup'] = self.lower_root_buildup.layer['triax'].area_fraction()
-        if self.lower_spar_cap.exists():
-            du['spar cap (lower)'] = self.lower_spar_cap.layer['lower'].area_fraction()
-            du['spar cap (upper)'] = self.lower_spar_cap.layer['upper'].area_fraction()
-        if self.lower_aft_panel_1.exists():
-            du['aft panel 1 (lower)'] = self.lower_aft_panel_1.layer['lower'].area_fraction()
-            du['aft panel 1 (upper)'] = self.lower_aft_panel_1.layer['upper'].area_fraction()
-        if self.lower_aft_panel_2.exists():
-            du['aft panel 2 (lower)'] = self.lower_aft_panel_2.layer['lower'].area_fraction()
-            du['aft panel 2 (upper)'] = self.lower_aft_panel_2.layer['upper'].area_fraction()
-        if self.lower_LE_panel.exists():
-            du['LE panel'] = self.lower_LE_panel.layer['foam'].area_fraction()
-        if self.lower_shear_web_1.exists():
-            du['shear web 1 (left biax)'] = self.lower_shear_web_1.layer['biax, left'].area_fraction()
-            du['shear web 1 (foam)'] = self.lower_shear_web_1.layer['foam'].area_fraction()
-            du['shear web 1 (right biax)'] = self.lower_shear_web_1.layer['biax, right'].area_fraction()
-        if self.lower_shear_web_2.exists():
-            du['shear web 2 (left biax)'] = self.lower_shear_web_2.layer['biax, left'].area_fraction()
-            du['shear web 2 (foam)'] = self.lower_shear_web_2.layer['foam'].area_fraction()
-            du['shear web 2 (right biax)'] = self.lower_shear_web_2.layer['biax, right'].area_fraction()
-        if self.lower_shear_web_3.exists():
-            du['shear web 3 (left biax)'] = self.lower_shear_web_3.layer['biax, left'].area_fraction()
-            du['shear web 3 (foam)'] = self.lower_shear_web_3.layer['foam'].area_fraction()
-            du['shear web 3 (right biax)'] = self.lower_shear_web_3.layer['biax, right'].area_fraction()
-        if self.lower_TE_reinforcement.exists():
-            du['TE reinforcement (uniax)'] = self.lower_TE_reinforcement.layer['uniax'].area_fraction()
-            try:
-                du['TE reinforcement (foam)'] = self.lower_TE_reinforcement.layer['foam'].area_fraction()
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                du['TE reinforcement (foam)'] = 0.0
-        if self.lower_internal_surface_1.exists():
-            du['internal surface 1 (triax)'] = self.lower_internal_surface_1.layer['triax'].area_fraction()
-            du['internal surface 1 (resin)'] = self.lower_internal_surface_1.layer['resin'].area_fraction()
-        if self.lower_internal_surface_2.exists():
-            du['internal surface 2 (triax)'] = self.lower_internal_surface_2.layer['triax'].area_fraction()
-            du['internal surface 2 (resin)'] = self.lower_internal_surface_2.layer['resin'].area_fraction()
-        if self.lower_internal_surface_3.exists():
-            du['internal surface 3 (triax)'] = self.lower_internal_surface_3.layer['triax'].area_fraction()
-            du['internal surface 3 (resin)'] = self.lower_internal_surface_3.layer['resin'].area_fraction()
-        if self.lower_internal_surface_4.exists():
-            du['internal surface 4 (triax)'] = self.lower_internal_surface_4.layer['triax'].area_fraction()
-            du['internal surface 4 (resin)'] = self.lower_internal_surface_4.layer['resin'].area_fraction()
-        # add up the contributions from the upper and lower airfoils for the entire station
-        d = {}
-        if self.lower_external_surface.exists() and self.upper_external_surface.exists():
-            d['external surface (gelcoat)'] = dl['external surface (gelcoat)'] + du['external surface (gelcoat)']
-            d['external surface (triax)'] = dl['external surface (triax)'] + du['external surface (triax)']
-        if self.lower_root_buildup.exists() and self.upper_root_buildup.exists():
-            d['root buildup'] = dl['root buildup'] + du['root buildup']
-        if self.lower_spar_cap.exists() and self.upper_spar_cap.exists():
-            d['spar cap (lower)'] = dl['spar cap (lower)'] + du['spar cap (lower)']
-            d['spar cap (upper)'] = dl['spar cap (upper)'] + du['spar cap (upper)']
-        if self.lower_aft_panel_1.exists() and self.upper_aft_panel_1.exists():
-            d['aft panel 1 (lower)'] = dl['aft panel 1 (lower)'] + du['aft panel 1 (lower)']
-            d['aft panel 1 (upper)'] = dl['aft panel 1 (upper)'] + du['aft panel 1 (upper)']
-        if self.lower_aft_panel_2.exists() and self.upper_aft_panel_2.exists():
-            d['aft panel 2 (lower)'] = dl['aft panel 2 (lower)'] + du['aft panel 2 (lower)']
-            d['aft panel 2 (upper)'] = dl['aft panel 2 (upper)'] + du['aft panel 2 (upper)']
-        if self.lower_LE_panel.exists() and self.upper_LE_panel.exists():
-            d['LE panel'] = dl['LE panel'] + du['LE panel']
-        if self.lower_shear_web_1.exists() and self.upper_shear_web_1.exists():
-            d['shear web 1 (left biax)'] = dl['shear web 1 (left biax)'] + du['shear web 1 (left biax)']
-            d['shear web 1 (foam)'] = dl['shear web 1 (foam)'] + du['shear web 1 (foam)']
-            d['shear web 1 (right biax)'] = dl['shear web 1 (right biax)'] + du['shear web 1 (right biax)']
-        if self.lower_shear_web_2.exists() and self.upper_shear_web_2.exists():
-            d['shear web 2 (left biax)'] = dl['shear web 2 (left biax)'] + du['shear web 2 (left biax)']
-            d['shear web 2 (foam)'] = dl['shear web 2 (foam)'] + du['shear web 2 (foam)']
-            d['shear web 2 (right biax)'] = dl['shear web 2 (right biax)'] + du['shear web 2 (right biax)']
-        if self.lower_shear_web_3.exists() and self.upper_shear_web_3.exists():
-            d['shear web 3 (left biax)'] = dl['shear web 3 (left biax)'] + du['shear web 3 (left biax)']
-            d['shear web 3 (foam)'] = dl['shear web 3 (foam)'] + du['shear web 3 (foam)']
-            d['shear web 3 (right biax)'] = dl['shear web 3 (right biax)'] + du['shear web 3 (right biax)']
-        if self.lower_TE_reinforcement.exists() and self.upper_TE_reinforcement.exists():
-            d['TE reinforcement (uniax)'] = dl['TE reinforcement (uniax)'] + du['TE reinforcement (uniax)']
-            try:
-                d['TE reinforcement (foam)'] = dl['TE reinforcement (foam)'] + du['TE reinforcement (foam)']
-            except KeyError:
-                # foam layer doesn't exist
-                pass
-        if self.lower_internal_surface_1.exists() and self.upper_internal_surface_1.exists():
-            d['internal surface 1 (triax)'] = dl['internal surface 1 (triax)'] + du['internal surface 1 (triax)']
-            d['internal surface 1 (resin)'] = dl['internal surface 1 (resin)'] + du['internal surface 1 (resin)']
-        if self.lower_internal_surface_2.exists() and self.upper_internal_surface_2.exists():
-            d['internal surface 2 (triax)'] = dl['internal surface 2 (triax)'] + du['internal surface 2 (triax)']
-            d['internal surface 2 (resin)'] = dl['internal surface 2 (resin)'] + du['internal surface 2 (resin)']
-        if self.lower_internal_surface_3.exists() and self.upper_internal_surface_3.exists():
-            d['internal surface 3 (triax)'] = dl['internal surface 3 (triax)'] + du['internal surface 3 (triax)']
-            d['internal surface 3 (resin)'] = dl['internal surface 3 (resin)'] + du['internal surface 3 (resin)']
-        if self.lower_internal_surface_4.exists() and self.upper_internal_surface_4.exists():
-            d['internal surface 4 (triax)'] = dl['internal surface 4 (triax)'] + du['internal surface 4 (triax)']
-            d['internal surface 4 (resin)'] = dl['internal surface 4 (resin)'] + du['internal surface 4 (resin)']
-        return d
+        return percent_breakdown(self.layer_table(), 'area', print_flag,
+            self.parent_station.station_num)
 
-    def calculate_all_percent_masses(self):
+    def calculate_all_percent_masses(self, print_flag=False):
         """Calculate the percent masses of all parts in this station.
 
-        Returns a dictionary of mass fractions for each structural part.
+        Returns a dictionary of mass fractions for each structural part, with
+        the lower and upper airfoils added together.
 
         """
-        # lower airfoil -------------------------------------------------------
-        dl = {}  # dictionary for lower airfoils
-        if self.lower_external_surface.exists():
-            dl['external surface (gelcoat)'] = self.lower_external_surface.layer['gelcoat'].mass_fraction()
-            dl['external surface (triax)'] = self.lower_external_surface.layer['triax'].mass_fraction()
-        if self.lower_root_buildup.exists():
-            dl['root buildup'] = self.lower_root_buildup.layer['triax'].mass_fraction()
-        if self.lower_spar_cap.exists():
-            dl['spar cap (lower)'] = self.lower_spar_cap.layer['lower'].mass_fraction()
-            dl['spar cap (upper)'] = self.lower_spar_cap.layer['upper'].mass_fraction()
-        if self.lower_aft_panel_1.exists():
-            dl['aft panel 1 (lower)'] = self.lower_aft_panel_1.layer['lower'].mass_fraction()
-            dl['aft panel 1 (upper)'] = self.lower_aft_panel_1.layer['upper'].mass_fraction()
-        if self.lower_aft_panel_2.exists():
-            dl['aft panel 2 (lower)'] = self.lower_aft_panel_2.layer['lower'].mass_fraction()
-            dl['aft panel 2 (upper)'] = self.lower_aft_panel_2.layer['upper'].mass_fraction()
-        if self.lower_LE_panel.exists():
-            dl['LE panel'] = self.lower_LE_panel.layer['foam'].mass_fraction()
-        if self.lower_shear_web_1.exists():
-            dl['shear web 1 (left biax)'] = self.lower_shear_web_1.layer['biax, left'].mass_fraction()
-            dl['shear web 1 (foam)'] = self.lower_shear_web_1.layer['foam'].mass_fraction()
-            dl['shear web 1 (right biax)'] = self.lower_shear_web_1.layer['biax, right'].mass_fraction()
-        if self.lower_shear_web_2.exists():
-            dl['shear web 2 (left biax)'] = self.lower_shear_web_2.layer['biax, left'].mass_fraction()
-            dl['shear web 2 (foam)'] = self.lower_shear_web_2.layer['foam'].mass_fraction()
-            dl['shear web 2 (right biax)'] = self.lower_shear_web_2.layer['biax, right'].mass_fraction()
-        if self.lower_shear_web_3.exists():
-            dl['shear web 3 (left biax)'] = self.lower_shear_web_3.layer['biax, left'].mass_fraction()
-            dl['shear web 3 (foam)'] = self.lower_shear_web_3.layer['foam'].mass_fraction()
-            dl['shear web 3 (right biax)'] = self.lower_shear_web_3.layer['biax, right'].mass_fraction()
-        if self.lower_TE_reinforcement.exists():
-            dl['TE reinforcement (uniax)'] = self.lower_TE_reinforcement.layer['uniax'].mass_fraction()
-            try:
-                dl['TE reinforcement (foam)'] = self.lower_TE_reinforcement.layer['foam'].mass_fraction()
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                dl['TE reinforcement (foam)'] = 0.0
-        if self.lower_internal_surface_1.exists():
-            dl['internal surface 1 (triax)'] = self.lower_internal_surface_1.layer['triax'].mass_fraction()
-            dl['internal surface 1 (resin)'] = self.lower_internal_surface_1.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_2.exists():
-            dl['internal surface 2 (triax)'] = self.lower_internal_surface_2.layer['triax'].mass_fraction()
-            dl['internal surface 2 (resin)'] = self.lower_internal_surface_2.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_3.exists():
-            dl['internal surface 3 (triax)'] = self.lower_internal_surface_3.layer['triax'].mass_fraction()
-            dl['internal surface 3 (resin)'] = self.lower_internal_surface_3.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_4.exists():
-            dl['internal surface 4 (triax)'] = self.lower_internal_surface_4.layer['triax'].mass_fraction()
-            dl['internal surface 4 (resin)'] = self.lower_internal_surface_4.layer['resin'].mass_fraction()
-        # upper airfoil -------------------------------------------------------
-        du = {}  # dictionary for upper airfoils
-        if self.lower_external_surface.exists():
-            du['external surface (gelcoat)'] = self.lower_external_surface.layer['gelcoat'].mass_fraction()
-            du['external surface (triax)'] = self.lower_external_surface.layer['triax'].mass_fraction()
-        if self.lower_root_buildup.exists():
-            du['root buildup'] = self.lower_root_buildup.layer['triax'].mass_fraction()
-        if self.lower_spar_cap.exists():
-            du['spar cap (lower)'] = self.lower_spar_cap.layer['lower'].mass_fraction()
-            du['spar cap (upper)'] = self.lower_spar_cap.layer['upper'].mass_fraction()
-        if self.lower_aft_panel_1.exists():
-            du['aft panel 1 (lower)'] = self.lower_aft_panel_1.layer['lower'].mass_fraction()
-            du['aft panel 1 (upper)'] = self.lower_aft_panel_1.layer['upper'].mass_fraction()
-        if self.lower_aft_panel_2.exists():
-            du['aft panel 2 (lower)'] = self.lower_aft_panel_2.layer['lower'].mass_fraction()
-            du['aft panel 2 (upper)'] = self.lower_aft_panel_2.layer['upper'].mass_fraction()
-        if self.lower_LE_panel.exists():
-            du['LE panel'] = self.lower_LE_panel.layer['foam'].mass_fraction()
-        if self.lower_shear_web_1.exists():
-            du['shear web 1 (left biax)'] = self.lower_shear_web_1.layer['biax, left'].mass_fraction()
-            du['shear web 1 (foam)'] = self.lower_shear_web_1.layer['foam'].mass_fraction()
-            du['shear web 1 (right biax)'] = self.lower_shear_web_1.layer['biax, right'].mass_fraction()
-        if self.lower_shear_web_2.exists():
-            du['shear web 2 (left biax)'] = self.lower_shear_web_2.layer['biax, left'].mass_fraction()
-            du['shear web 2 (foam)'] = self.lower_shear_web_2.layer['foam'].mass_fraction()
-            du['shear web 2 (right biax)'] = self.lower_shear_web_2.layer['biax, right'].mass_fraction()
-        if self.lower_shear_web_3.exists():
-            du['shear web 3 (left biax)'] = self.lower_shear_web_3.layer['biax, left'].mass_fraction()
-            du['shear web 3 (foam)'] = self.lower_shear_web_3.layer['foam'].mass_fraction()
-            du['shear web 3 (right biax)'] = self.lower_shear_web_3.layer['biax, right'].mass_fraction()
-        if self.lower_TE_reinforcement.exists():
-            du['TE reinforcement (uniax)'] = self.lower_TE_reinforcement.layer['uniax'].mass_fraction()
-            try:
-                du['TE reinforcement (foam)'] = self.lower_TE_reinforcement.layer['foam'].mass_fraction()
-            except KeyError:
-                # the foam layer doesn't exist in TE reinf at this station
-                du['TE reinforcement (foam)'] = 0.0
-        if self.lower_internal_surface_1.exists():
-            du['internal surface 1 (triax)'] = self.lower_internal_surface_1.layer['triax'].mass_fraction()
-            du['internal surface 1 (resin)'] = self.lower_internal_surface_1.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_2.exists():
-            du['internal surface 2 (triax)'] = self.lower_internal_surface_2.layer['triax'].mass_fraction()
-            du['internal surface 2 (resin)'] = self.lower_internal_surface_2.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_3.exists():
-            du['internal surface 3 (triax)'] = self.lower_internal_surface_3.layer['triax'].mass_fraction()
-            du['internal surface 3 (resin)'] = self.lower_internal_surface_3.layer['resin'].mass_fraction()
-        if self.lower_internal_surface_4.exists():
-            du['internal surface 4 (triax)'] = self.lower_internal_surface_4.layer['triax'].mass_fraction()
-            du['internal surface 4 (resin)'] = self.lower_internal_surface_4.layer['resin'].mass_fraction()
-        # add up the contributions from the upper and lower airfoils for the entire station
-        d = {}
-        if self.lower_external_surface.exists() and self.upper_external_surface.exists():
-            d['external surface (gelcoat)'] = dl['external surface (gelcoat)'] + du['external surface (gelcoat)']
-            d['external surface (triax)'] = dl['external surface (triax)'] + du['external surface (triax)']
-        if self.lower_root_buildup.exists() and self.upper_root_buildup.exists():
-            d['root buildup'] = dl['root buildup'] + du['root buildup']
-        if self.lower_spar_cap.exists() and self.upper_spar_cap.exists():
-            d['spar cap (lower)'] = dl['spar cap (lower)'] + du['spar cap (lower)']
-            d['spar cap (upper)'] = dl['spar cap (upper)'] + du['spar cap (upper)']
-        if self.lower_aft_panel_1.exists() and self.upper_aft_panel_1.exists():
-            d['aft panel 1 (lower)'] = dl['aft panel 1 (lower)'] + du['aft panel 1 (lower)']
-            d['aft panel 1 (upper)'] = dl['aft panel 1 (upper)'] + du['aft panel 1 (upper)']
-        if self.lower_aft_panel_2.exists() and self.upper_aft_panel_2.exists():
-            d['aft panel 2 (lower)'] = dl['aft panel 2 (lower)'] + du['aft panel 2 (lower)']
-            d['aft panel 2 (upper)'] = dl['aft panel 2 (upper)'] + du['aft panel 2 (upper)']
-        if self.lower_LE_panel.exists() and self.upper_LE_panel.exists():
-            d['LE panel'] = dl['LE panel'] + du['LE panel']
-        if self.lower_shear_web_1.exists() and self.upper_shear_web_1.exists():
-            d['shear web 1 (left biax)'] = dl['shear web 1 (left biax)'] + du['shear web 1 (left biax)']
-            d['shear web 1 (foam)'] = dl['shear web 1 (foam)'] + du['shear web 1 (foam)']
-            d['shear web 1 (right biax)'] = dl['shear web 1 (right biax)'] + du['shear web 1 (right biax)']
-        if self.lower_shear_web_2.exists() and self.upper_shear_web_2.exists():
-            d['shear web 2 (left biax)'] = dl['shear web 2 (left biax)'] + du['shear web 2 (left biax)']
-            d['shear web 2 (foam)'] = dl['shear web 2 (foam)'] + du['shear web 2 (foam)']
-            d['shear web 2 (right biax)'] = dl['shear web 2 (right biax)'] + du['shear web 2 (right biax)']
-        if self.lower_shear_web_3.exists() and self.upper_shear_web_3.exists():
-            d['shear web 3 (left biax)'] = dl['shear web 3 (left biax)'] + du['shear web 3 (left biax)']
-            d['shear web 3 (foam)'] = dl['shear web 3 (foam)'] + du['shear web 3 (foam)']
-            d['shear web 3 (right biax)'] = dl['shear web 3 (right biax)'] + du['shear web 3 (right biax)']
-        if self.lower_TE_reinforcement.exists() and self.upper_TE_reinforcement.exists():
-            d['TE reinforcement (uniax)'] = dl['TE reinforcement (uniax)'] + du['TE reinforcement (uniax)']
-            try:
-                d['TE reinforcement (foam)'] = dl['TE reinforcement (foam)'] + du['TE reinforcement (foam)']
-            except KeyError:
-                # foam layer doesn't exist
-                pass
-        if self.lower_internal_surface_1.exists() and self.upper_internal_surface_1.exists():
-            d['internal surface 1 (triax)'] = dl['internal surface 1 (triax)'] + du['internal surface 1 (triax)']
-            d['internal surface 1 (resin)'] = dl['internal surface 1 (resin)'] + du['internal surface 1 (resin)']
-        if self.lower_internal_surface_2.exists() and self.upper_internal_surface_2.exists():
-            d['internal surface 2 (triax)'] = dl['internal surface 2 (triax)'] + du['internal surface 2 (triax)']
-            d['internal surface 2 (resin)'] = dl['internal surface 2 (resin)'] + du['internal surface 2 (resin)']
-        if self.lower_internal_surface_3.exists() and self.upper_internal_surface_3.exists():
-            d['internal surface 3 (triax)'] = dl['internal surface 3 (triax)'] + du['internal surface 3 (triax)']
-            d['internal surface 3 (resin)'] = dl['internal surface 3 (resin)'] + du['internal surface 3 (resin)']
-        if self.lower_internal_surface_4.exists() and self.upper_internal_surface_4.exists():
-            d['internal surface 4 (triax)'] = dl['internal surface 4 (triax)'] + du['internal surface 4 (triax)']
-            d['internal surface 4 (resin)'] = dl['internal surface 4 (resin)'] + du['internal surface 4 (resin)']
-        return d
+        return percent_breakdown(self.layer_table(), 'mass', print_flag,
+            self.parent_station.station_num)
 
     def write_truegrid_inputfile(self, interrupt_flag=False,
-        additional_layers=[], alt_TE_reinforcement=False, soft_warning=False):
+        additional_layers=[], alt_TE_reinforcement=False, soft_warning=False,
+        dry_run=False):
         """Write the TrueGrid input file in `station_path`.
 
+        The whole input file is collected in a truegrid.TrueGridDeck, and then
+        written to disk at once.
+
         Parameters
         ----------
         interrupt_flag : bool, True if intterupt statements should be written
@@ -3785,15 +3947,17 @@ class BiplaneStructure:
         soft_warning : bool, True if you want to bypass small errors with an
             explanatory printout, False if you want the code to halt if it
             finds a small error
+        dry_run : bool, True if the input file should be returned as a
+            string instead of written to `station_path`, False otherwise
 
         """
-        self.write_truegrid_header()
-        start_edge_num = self.write_all_alt_layer_edges(alt_TE_reinforcement=alt_TE_reinforcement,
+        stn = self.parent_station
+        f = tg.TrueGridDeck()
+        self.write_truegrid_header(f)
+        start_edge_num = self.write_all_alt_layer_edges(f,
+            alt_TE_reinforcement=alt_TE_reinforcement,
             soft_warning=soft_warning)
         if len(additional_layers) > 0:
-            stn = self.parent_station
-            f = open(os.path.join(stn.station_path,
-                self.truegrid_input_filename), 'a')
             for layer in additional_layers:
                 part_name = layer.parent_part.__class__.__name__  # part name
                 layer_name = layer.name  # layer name
@@ -3806,14 +3970,16 @@ class BiplaneStructure:
                 f.write(fmt.format(part_name, layer_name))
                 layer.write_layer_edges(f, start_edge_num)
                 start_edge_num += 4
-            f.close()
-        # self.write_all_block_meshes()
-        self.write_truegrid_footer(interrupt_flag=interrupt_flag)
+        # self.write_all_block_meshes(f)
+        self.write_truegrid_footer(f, interrupt_flag=interrupt_flag)
+        if dry_run:
+            return f.getvalue()
+        f.save(os.path.join(stn.station_path, self.truegrid_input_filename))
         print " Wrote TrueGrid input file for Station #{0}.".format(
-            self.parent_station.station_num)
+            stn.station_num)
 
-    def write_truegrid_header(self, outputfile_type='abaqus'):
-        """Create a TrueGrid input file and write the header.
+    def write_truegrid_header(self, f, outputfile_type='abaqus'):
+        """Write the header of the TrueGrid input file to the deck f.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
@@ -3821,8 +3987,6 @@ class BiplaneStructure:
         stn = self.parent_station
         b = stn.parent_blade
         separator = "c " + "-"*40 + "\n"
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'w')
         f.write("c {0} ".format(b.name) + "-"*40 + "\n")
         f.write("c Station #{0:02d}\n".format(stn.station_num))
         f.write("\n")
@@ -3854,13 +4018,9 @@ class BiplaneStructure:
         f.write("\n")
         f.write(separator)
         f.write("\n")
-        f.close()
 
-    def write_truegrid_footer(self, interrupt_flag=False):
-        """Write the footer for the TrueGrid input file."""
-        stn = self.parent_station
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
+    def write_truegrid_footer(self, f, interrupt_flag=False):
+        """Write the footer of the TrueGrid input file to the deck f."""
         f.write("c merge all the individual block meshes into a single mesh\n")
         f.write("merge\n")
         f.write("c display all 3D curves\n")
@@ -3886,19 +4046,15 @@ class BiplaneStructure:
         f.write("write\n")
         f.write("\n")
         f.write("c exit\n")
-        f.close()
 
-    def write_all_alt_layer_edges(self, alt_TE_reinforcement=False,
+    def write_all_alt_layer_edges(self, f, alt_TE_reinforcement=False,
         soft_warning=False):
-        """Write the coordinates of all layer edges to `station_path`.
+        """Write the coordinates of all layer edges to the deck f.
 
         This file is formatted as a TrueGrid input file (*.tg).
 
         """
-        stn = self.parent_station
         start_edge_num = 1
-        f = open(os.path.join(stn.station_path, self.truegrid_input_filename),
-            'a')
         if self.lower_root_buildup.exists():
             f.write("c root buildup " + "-"*40 + "\n")
             sd = sorted(self.lower_root_buildup.alt_layer.items())
@@ -4046,5 +4202,4 @@ class BiplaneStructure:
                     fmt3 = "Layer 'TE_Reinforcement; {0}' does not have 3 or 4 edges!"
                     raise Warning(fmt3.format(layer_name))
                 start_edge_num += 4
-        f.close()
         return start_edge_num
@@ -0,0 +1,257 @@
+"""Run a design-of-experiments sweep over variants of a blade definition.
+
+Each variant is a copy of a base blade, with some columns of the blade
+definition changed (e.g. spar cap height, shear web positions, or gap-to-chord
+ratio). The layers of every variant are built in parallel worker processes,
+and the area, mass, and area/mass fractions of each station are collected into
+one results table.
+
+All the variants share one cache path, so a station that is identical in two
+variants (same row in the blade definition, same airfoil, same materials) is
+only built once (see <blade>.create_all_layers()). Each station of each
+variant writes a file 'stnXX_<hash>.pkl' to the shared cache path, and these
+files are kept after the sweep, so a later sweep can reuse them. The cache
+path grows with every new variant; run the sweep with purge_cache=True (or
+delete <base_path>/sweep/cache) to remove them.
+
+Usage
+-----
+import lib.sweep as sw
+import pandas as pd
+# one row per variant; columns are blade definition columns
+# (a column name ending in ' scale factor' multiplies the base values)
+variations = pd.DataFrame(
+    {'spar cap height scale factor': [0.8, 1.0, 1.2],
+     'gap-to-chord ratio': [1.0, 1.25, 1.5]},
+    index=['thin', 'base', 'thick'])
+if __name__ == '__main__':  # required for multiprocessing on Windows
+    results = sw.run_sweep('biplane_blade', variations, blade_type='biplane')
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import shutil
+import datetime
+import multiprocessing
+import pandas as pd
+import blade as bl
+reload(bl)
+
+
+logfile_name = 'sweep.log'
+scale_suffix = ' scale factor'
+
+
+def read_variations(variations):
+    """Returns a pandas.DataFrame of variations, with one row per variant.
+
+    The variant names (the index) are converted to strings, since they are
+    used as the names of the variant paths and in the results table (e.g. a
+    table with the default index 0, 1, 2, ... has the variants '0', '1',
+    '2', ...).
+
+    Parameters
+    ----------
+    variations : pandas.DataFrame or str (for CSV file), the table of
+        variations, indexed by variant name
+
+    """
+    if isinstance(variations, pd.DataFrame):
+        variations = variations.copy()
+    else:
+        fileext = os.path.splitext(variations)[-1]
+        if fileext != '.csv' and fileext != '.CSV':
+            raise ValueError("variations file '{0}' must be of type *.csv".format(
+                os.path.split(variations)[-1]))
+        variations = pd.read_csv(variations, index_col=0)
+    variations.index = variations.index.astype(str)
+    if variations.index.has_duplicates:
+        raise ValueError("The variant names must be unique.")
+    return variations
+
+def apply_variation(df, variation, stations=None):
+    """Returns a copy of a blade definition with one variation applied.
+
+    Cells that are empty (NaN) in the base blade definition are left empty, so
+    parts that don't exist at a station are not created by a variation.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame, the base blade definition
+    variation : pandas.Series, one row of the variations table
+    stations : list of ints, the station numbers to vary (default=None, vary
+        all stations)
+
+    """
+    df = df.copy()
+    if stations is None:
+        stations = list(df.index)
+    for (name, value) in variation.iteritems():
+        if pd.isnull(value):
+            continue
+        if name.endswith(scale_suffix):
+            column = name[:-len(scale_suffix)]
+        else:
+            column = name
+        if column not in df.columns:
+            raise ValueError("'{0}' is not a column in the blade definition.".format(column))
+        for station_num in stations:
+            if pd.isnull(df.ix[station_num, column]):
+                continue
+            if name.endswith(scale_suffix):
+                df.ix[station_num, column] = df.ix[station_num, column]*value
+            else:
+                df.ix[station_num, column] = value
+    return df
+
+def create_variant_path(base_path, variant_path, df,
+    defn_filename='blade_definition.csv'):
+    """Create a blade path for one variant, with its own blade definition.
+
+    The airfoils and material properties are copied from the base blade path.
+    Any station paths left over from a previous sweep are deleted.
+
+    """
+    if os.path.exists(variant_path):
+        shutil.rmtree(variant_path)
+    shutil.copytree(base_path, variant_path,
+        ignore=shutil.ignore_patterns('stn*', 'cache', 'sweep'))
+    df.to_csv(os.path.join(variant_path, defn_filename),
+        index_label=df.index.name)
+
+def build_variant(args):
+    """Build the layers of one variant, and return its results.
+
+    This function runs in a worker process. Returns a list of dicts, one dict
+    per station.
+
+    Parameters
+    ----------
+    args : tuple, (variant_name, variant_path, blade_type, cache_path,
+        num_airfoil_points)
+
+    """
+    (variant_name, variant_path, blade_type, cache_path,
+        num_airfoil_points) = args
+    if blade_type == 'monoplane':
+        b = bl.MonoplaneBlade(variant_name, variant_path,
+            num_airfoil_points=num_airfoil_points)
+    elif blade_type == 'biplane':
+        b = bl.BiplaneBlade(variant_name, variant_path,
+            num_airfoil_points=num_airfoil_points)
+    else:
+        raise ValueError("Keyword `blade_type` must be 'monoplane' or 'biplane'.")
+    b.create_all_layers(cache_flag=True, cache_path=cache_path)
+    blade_mass = b.calculate_blade_mass(print_flag=False)
+    rows = []
+    for station in b.list_of_stations:
+        st = station.structure
+        st.calculate_area()
+        st.calculate_mass()
+        row = {'variant': variant_name,
+               'blade station': station.station_num,
+               'x1': station.coords.x1,
+               'area': st.area,
+               'mass': st.mass,
+               'blade mass': blade_mass}
+        for (part, fraction) in st.calculate_all_percent_areas().items():
+            row['area fraction, ' + part] = fraction
+        for (part, fraction) in st.calculate_all_percent_masses().items():
+            row['mass fraction, ' + part] = fraction
+        rows.append(row)
+    return rows
+
+def run_sweep(base_path, variations, blade_type='monoplane', stations=None,
+    sweep_path='sweep', cache_path='cache', num_processes=None,
+    num_airfoil_points=None, results_filename='sweep_results.csv',
+    purge_cache=False):
+    """Build every variant of a blade, and save a table of the results.
+
+    Returns a pandas.DataFrame with one row per variant and station. The
+    columns are the variant name, the varied parameters, the station number,
+    x1, the area and mass of the station, the total blade mass, and the area
+    and mass fractions of each structural part. The table is also saved as a
+    CSV file in the sweep path.
+
+    Parameters
+    ----------
+    base_path : str, the blade path of the base blade
+    variations : pandas.DataFrame or str (for CSV file), the table of
+        variations, indexed by variant name (see apply_variation())
+    blade_type : str, 'monoplane' or 'biplane'
+    stations : list of ints, the station numbers to vary (default=None, vary
+        all stations)
+    sweep_path : str, local directory inside the base path for storing the
+        blade path of each variant
+    cache_path : str, local directory inside the sweep path for storing the
+        cached layers shared by all variants
+    num_processes : int, the number of worker processes (default=None, use
+        one process per CPU; set to 1 to build all variants in this process)
+    num_airfoil_points : int, if not None, resample each airfoil to this many
+        points (see blade._Blade)
+    results_filename : str, the CSV file of results, saved in the sweep path
+    purge_cache : bool, delete the shared cache path (and all the cached
+        layers in it) after the sweep (default=False, keep the cached layers
+        for the next sweep)
+
+    """
+    variations = read_variations(variations)
+    base_path = os.path.abspath(base_path)
+    sweep_dir = os.path.join(base_path, sweep_path)
+    if not os.path.exists(sweep_dir):
+        os.mkdir(sweep_dir)
+    # the cache path is absolute, so all variants share it
+    cache_dir = os.path.join(sweep_dir, cache_path)
+    if not os.path.exists(cache_dir):
+        os.mkdir(cache_dir)
+    df = pd.read_csv(os.path.join(base_path, 'blade_definition.csv'),
+        index_col=0)
+    list_of_args = []
+    for (variant_name, variation) in variations.iterrows():
+        variant_path = os.path.join(sweep_dir, variant_name)
+        create_variant_path(base_path, variant_path,
+            apply_variation(df, variation, stations))
+        list_of_args.append((variant_name, variant_path, blade_type,
+            cache_dir, num_airfoil_points))
+    logf = open(logfile_name, "a")
+    logf.write("[{0}] Started sweep of {1} variants of {2}\n".format(
+        datetime.datetime.now(), len(list_of_args), base_path))
+    logf.flush()
+    logf.close()
+    if num_processes == 1:
+        list_of_results = map(build_variant, list_of_args)
+    else:
+        pool = multiprocessing.Pool(processes=num_processes)
+        try:
+            list_of_results = pool.map(build_variant, list_of_args)
+        finally:
+            pool.close()
+            pool.join()
+    rows = []
+    for results in list_of_results:
+        rows.extend(results)
+    r = pd.DataFrame(rows)
+    r = r.fillna(0)  # parts that don't exist have zero area and mass
+    # add the varied parameters as columns
+    for name in variations.columns:
+        r[name] = variations[name].reindex(r['variant']).values
+    first_cols = (['variant'] + list(variations.columns) +
+        ['blade station', 'x1', 'area', 'mass', 'blade mass'])
+    other_cols = sorted([c for c in r.columns if c not in first_cols])
+    r = r[first_cols + other_cols]
+    r.to_csv(os.path.join(sweep_dir, results_filename), index=False)
+    print " Finished sweep of {0} variants; results saved in '{1}'".format(
+        len(list_of_args), os.path.join(sweep_dir, results_filename))
+    if purge_cache:
+        shutil.rmtree(cache_dir)
+        print " Deleted the cached layers in '{0}'".format(cache_dir)
+    logf = open(logfile_name, "a")
+    logf.write("[{0}] Finished sweep of {1} variants of {2}\n".format(
+        datetime.datetime.now(), len(list_of_args), base_path))
+    logf.flush()
+    logf.close()
+    return r
@@ -0,0 +1,63 @@
+"""Format blocks of numbers as fixed-format text, for the text exporters.
+
+The TrueGrid, polygon, airfoil, and VABS writers all write tables of numbers,
+one row per line. Instead of formatting each line with its own call to
+str.format(), these functions repeat the format of one line for the whole
+block, and fill it in with one call. The output is byte-identical to
+formatting each line separately.
+
+Usage
+-----
+import text_utils as tu
+s = tu.format_block(polygon.exterior.coords, tu.coords_fmt)
+s = tu.format_table([(1, 0.5, 0.2), (2, 0.6, 0.1)], '{:>5d}  {: .8f}  {: .8f}')
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+from itertools import chain
+
+
+# (x2, x3) coords in TrueGrid curves and layer polygon files
+coords_fmt = '% .8f  % .8f  0.0'
+# (x1, x2, x3) airfoil coords, for importing into SolidWorks as an XYZ curve
+xyz_fmt = '%12.9f\t%12.9f\t%12.9f'
+
+
+def format_block(rows, fmt):
+    """Returns a block of text, with one line for each row of an array.
+
+    Parameters
+    ----------
+    rows : array-like, shape (n,k), the floats to format
+    fmt : str, the printf-style format for one line, with k conversions
+        (e.g. '% .8f  % .8f  0.0'); the newline is added automatically
+
+    """
+    a = np.asarray(rows, dtype=float)
+    if a.size == 0:
+        return ''
+    return ((fmt + '\n') * a.shape[0]) % tuple(a.ravel().tolist())
+
+def format_table(rows, fmt):
+    """Returns a block of text, with one line for each row of a table.
+
+    Use this instead of format_block() when the columns have different types,
+    e.g. integer node numbers and float coordinates. (In Python 2.7,
+    str.format() is faster than % for integers.)
+
+    Parameters
+    ----------
+    rows : list of tuples, each with k entries
+    fmt : str, the str.format() template for one line, with k automatically
+        numbered fields (e.g. '{:>5d}     {:> 10.8f}  {:> 10.8f}'); the newline
+        is added automatically
+
+    """
+    if len(rows) == 0:
+        return ''
+    return ((fmt + '\n') * len(rows)).format(*chain.from_iterable(rows))
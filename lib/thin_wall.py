@@ -0,0 +1,324 @@
+"""Estimate torsional properties of a blade station with thin-walled theory.
+
+The cross-section of one airfoil is idealized as a network of thin walls:
+  * the skin, along the midline of the shell laminate (external surface, root
+    buildup, LE panel, spar caps, aft panels, TE reinforcement, and the
+    internal surface of each cell)
+  * the shear webs, along the midplane of each web
+
+The shear webs split the skin into closed cells, in the same order as the
+interior loops found by <internal_surface>.interior_loop() (from the leading
+edge to the trailing edge). The shell laminate thicknesses are the same part
+heights that create those interior loops, so no layer polygons or meshes are
+needed.
+
+The torsional stiffness GJ is found with the Bredt-Batho multi-cell equations.
+The shear center is found by applying unit shear forces to the same wall
+network (with the direct stresses lumped into booms at each node), and solving
+for the shear flows that cause no twist.
+
+Accuracy
+--------
+On the Sandia blade (SNL100-00), the ratio of GJ to K_44 from the VABS output
+files (mesh_stnXX.vabs.K) is:
+  * 0.97-1.04 at stations 1-26
+  * 0.92-0.95 at stations 27-30
+  * 0.74-0.81 at stations 31-33
+  * 0.21 at station 34 (the tip), where the walls are too thick and the cells
+    too small for thin-walled theory
+The ratio of GJ to GJ_twist in 'sandia_blade/blade_props_from_Sandia.csv' is
+0.97-1.03 at stations 1-10, and 1.06 at station 11. It rises to as much as
+1.78 (station 23) at stations 12-30, where the Sandia values are also well
+below VABS. It is 0.88-0.96 at stations 31-33, and 0.043 at station 34. Use
+these estimates for trends and quick checks, not instead of VABS.
+
+Usage
+-----
+import thin_wall as tw
+s = tw.ThinWallSection(station.structure)
+(GJ, x2_sc, x3_sc) = (s.GJ, s.shear_center[0], s.shear_center[1])
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+from math import isnan
+
+
+def moduli(material):
+    """Returns the axial and shear moduli (E, G) of a material.
+
+    Orthotropic materials use E1 and G12.
+
+    """
+    if material.type == 'isotropic':
+        return (material.E, material.G)
+    else:
+        return (material.E1, material.G12)
+
+
+class ThinWallSection:
+    """Define a thin-walled idealization of one airfoil in a station.
+
+    Parameters
+    ----------
+    structure : MonoplaneStructure or BiplaneStructure object
+    airfoil : str, set to either 'lower' or 'upper', to designate which
+        airfoil to idealize in a biplane station (default=None for monoplane
+        stations)
+
+    Attributes
+    ----------
+    .nodes : np.array, (x2,x3) coords of each node in the wall network
+    .edges : np.array, (start node, end node) indices of each wall
+    .length : np.array, the length of each wall
+    .Et : np.array, the axial stiffness per unit length of each wall
+    .Gt : np.array, the shear stiffness per unit length of each wall
+    .cell_signs : np.array, (num_cells x num_edges) matrix, +1/-1 if the
+        cell boundary runs counterclockwise along/against each wall, else 0
+    .cell_areas : np.array, the area enclosed by the midline of each cell
+    .GJ : float, the torsional stiffness
+    .shear_center : tuple, (x2,x3) coords of the shear center
+
+    """
+    def __init__(self, structure, airfoil=None):
+        self.structure = structure
+        self.airfoil = airfoil
+        af = structure.parent_station.airfoil
+        if airfoil is None:
+            self.prefix = ''
+            polygon = af.polygon
+        elif airfoil in ['lower', 'upper']:
+            self.prefix = airfoil + '_'
+            polygon = getattr(af, airfoil + '_polygon')
+        else:
+            raise ValueError("Keyword `airfoil` must be None, 'lower', or 'upper'.")
+        if polygon is None:
+            raise ValueError("The airfoil polygon doesn't exist.\n  Try running <station>.airfoil.create_polygon() first.")
+        self.materials = structure.parent_station.parent_blade.dict_of_materials
+        self.create_wall_network(polygon)
+        self.GJ = self.torsional_stiffness()
+        self.shear_center = self.find_shear_center()
+
+    def part(self, name):
+        """Returns the part in the parent structure with this name."""
+        return getattr(self.structure, self.prefix + name)
+
+    def web_positions(self):
+        """Returns a sorted array of the midplane x2-coords of the shear webs.
+
+        Also returns a list of the shear webs, in the same order.
+
+        """
+        webs = []
+        for name in ['shear_web_1', 'shear_web_2', 'shear_web_3']:
+            sw = self.part(name)
+            if sw.exists():
+                webs.append(sw)
+        webs.sort(key=lambda sw: sw.left)
+        x = np.array([(sw.left+sw.right)/2.0 for sw in webs])
+        return (x, webs)
+
+    def skin_laminate(self, x, cell):
+        """Returns the thickness and stiffnesses of the skin laminate.
+
+        Parameters
+        ----------
+        x : np.array, chordwise coords (x2) along the skin
+        cell : np.array, the cell number (from 0) at each coord
+
+        Returns (t, Et, Gt), arrays of the thickness, axial stiffness per unit
+        length, and shear stiffness per unit length.
+
+        """
+        t = np.zeros(len(x))
+        Et = np.zeros(len(x))
+        Gt = np.zeros(len(x))
+        def add(mask, h, material_name):
+            if isnan(h):
+                return
+            (E, G) = moduli(self.materials[material_name])
+            t[mask] += h
+            Et[mask] += E*h
+            Gt[mask] += G*h
+        everywhere = np.ones(len(x), dtype=bool)
+        es = self.part('external_surface')
+        if es.exists():
+            add(everywhere, es.height_triax, 'triaxial GFRP')
+            add(everywhere, es.height_gelcoat, 'gelcoat')
+        rb = self.part('root_buildup')
+        if rb.exists():
+            add(everywhere, rb.height, 'triaxial GFRP')
+        for (name, material_name) in [('LE_panel', 'foam'),
+                                      ('spar_cap', 'uniaxial GFRP'),
+                                      ('aft_panel_1', 'foam'),
+                                      ('aft_panel_2', 'foam')]:
+            p = self.part(name)
+            if p.exists():
+                add((x >= p.left) & (x < p.right), p.height, material_name)
+        te = self.part('TE_reinforcement')
+        if te.exists():
+            add(x >= te.left, te.height_uniax, 'uniaxial GFRP')
+            add(x >= te.left, te.height_foam, 'foam')
+        for n in range(1,5):
+            internal_surface = self.part('internal_surface_{0}'.format(n))
+            if internal_surface.exists():
+                add(cell == n-1, internal_surface.height_triax,
+                    'triaxial GFRP')
+                add(cell == n-1, internal_surface.height_resin, 'resin')
+        return (t, Et, Gt)
+
+    def web_laminate(self, sw, cells):
+        """Returns (t, Et, Gt) of a shear web laminate.
+
+        The internal surfaces of the cells on both sides of the web are
+        included.
+
+        """
+        (E_biax, G_biax) = moduli(self.materials['biaxial GFRP'])
+        (E_foam, G_foam) = moduli(self.materials['foam'])
+        t = 2.0*sw.base_biax + sw.base_foam
+        Et = 2.0*E_biax*sw.base_biax + E_foam*sw.base_foam
+        Gt = 2.0*G_biax*sw.base_biax + G_foam*sw.base_foam
+        (E_triax, G_triax) = moduli(self.materials['triaxial GFRP'])
+        (E_resin, G_resin) = moduli(self.materials['resin'])
+        for c in cells:
+            internal_surface = self.part('internal_surface_{0}'.format(c+1))
+            if internal_surface.exists():
+                h_triax = internal_surface.height_triax
+                h_resin = internal_surface.height_resin
+                t += h_triax + h_resin
+                Et += E_triax*h_triax + E_resin*h_resin
+                Gt += G_triax*h_triax + G_resin*h_resin
+        return (t, Et, Gt)
+
+    def create_wall_network(self, polygon):
+        """Create the nodes and walls of the skin and shear webs."""
+        ring = np.array(polygon.exterior.coords)[:-1]
+        # orient the ring counterclockwise
+        x = ring[:,0]
+        y = ring[:,1]
+        if np.sum(x*np.roll(y,-1) - np.roll(x,-1)*y) < 0.0:
+            ring = ring[::-1]
+        (web_x, webs) = self.web_positions()
+        # offset the ring inward to the midline of the skin laminate
+        d = np.roll(ring,-1,axis=0) - ring
+        n_edge = np.column_stack((-d[:,1], d[:,0]))
+        n_edge /= np.sqrt(np.sum(n_edge**2, axis=1))[:,np.newaxis]
+        n_node = n_edge + np.roll(n_edge,1,axis=0)
+        n_node /= np.sqrt(np.sum(n_node**2, axis=1))[:,np.newaxis]
+        cell = np.searchsorted(web_x, ring[:,0])
+        (t, Et, Gt) = self.skin_laminate(ring[:,0], cell)
+        mid = ring + n_node*(t/2.0)[:,np.newaxis]
+        # insert a junction node wherever a shear web meets the skin midline
+        insert_index = []
+        insert_points = []
+        for xw in web_x:
+            s = mid[:,0] - xw
+            s_next = np.roll(s,-1)
+            crossings = np.nonzero(s*s_next < 0.0)[0]
+            if len(crossings) + np.sum(s == 0.0) != 2:
+                raise ValueError("The shear web at x2={0} doesn't meet the skin twice.".format(xw))
+            for i in crossings:
+                f = s[i]/(s[i] - s_next[i])
+                j = (i+1) % len(mid)
+                insert_index.append(i+1)
+                insert_points.append((xw, mid[i,1] + f*(mid[j,1] - mid[i,1])))
+        if len(insert_index) > 0:
+            order = np.argsort(insert_index, kind='mergesort')
+            nodes = np.insert(mid, np.array(insert_index)[order],
+                np.array(insert_points)[order], axis=0)
+        else:
+            nodes = mid
+        num_skin = len(nodes)
+        # skin walls connect consecutive nodes around the ring
+        skin_edges = np.column_stack((np.arange(num_skin),
+            (np.arange(num_skin)+1) % num_skin))
+        # shear web walls connect the lower junction to the upper junction
+        web_edges = []
+        for xw in web_x:
+            j = np.nonzero(nodes[:,0] == xw)[0]
+            j = j[np.argsort(nodes[j,1])]
+            web_edges.append((j[0], j[-1]))
+        self.nodes = nodes
+        self.edges = np.array(list(skin_edges) + web_edges, dtype=int)
+        p0 = nodes[self.edges[:,0]]
+        p1 = nodes[self.edges[:,1]]
+        self.length = np.sqrt(np.sum((p1 - p0)**2, axis=1))
+        # stiffnesses of each wall
+        x_mid = (p0[:num_skin,0] + p1[:num_skin,0])/2.0
+        skin_cell = np.searchsorted(web_x, x_mid)
+        (t, Et, Gt) = self.skin_laminate(x_mid, skin_cell)
+        self.Et = np.zeros(len(self.edges))
+        self.Gt = np.zeros(len(self.edges))
+        self.Et[:num_skin] = Et
+        self.Gt[:num_skin] = Gt
+        num_cells = len(webs) + 1
+        self.cell_signs = np.zeros((num_cells, len(self.edges)))
+        self.cell_signs[skin_cell, np.arange(num_skin)] = 1.0
+        for (k, sw) in enumerate(webs):
+            (t, Et, Gt) = self.web_laminate(sw, [k, k+1])
+            self.Et[num_skin+k] = Et
+            self.Gt[num_skin+k] = Gt
+            # the cell on the left runs up the web, the cell on the right
+            # runs down the web
+            self.cell_signs[k, num_skin+k] = 1.0
+            self.cell_signs[k+1, num_skin+k] = -1.0
+        # twice the area swept by each wall about the origin
+        self.swept = p0[:,0]*p1[:,1] - p1[:,0]*p0[:,1]
+        self.cell_areas = np.dot(self.cell_signs, self.swept)/2.0
+
+    def torsional_stiffness(self):
+        """Returns the torsional stiffness GJ with the Bredt-Batho equations.
+
+        The shear flow q_c in each cell satisfies, for a unit twist rate,
+            sum_c' q_c' * int_(walls of c and c') ds/(G t) = 2 A_c
+
+        """
+        flexibility = self.length/self.Gt
+        D = np.dot(self.cell_signs*flexibility, self.cell_signs.T)
+        q = np.linalg.solve(D, 2.0*self.cell_areas)
+        return np.dot(2.0*self.cell_areas, q)
+
+    def find_shear_center(self):
+        """Returns the (x2,x3) coords of the shear center.
+
+        Unit shear forces are applied in the x2 and x3 directions. The axial
+        stiffness of each wall is lumped into booms at its nodes, so the shear
+        flow is constant along each wall and jumps at each node. The shear
+        flows satisfy equilibrium at each node and cause no twist in any cell.
+
+        """
+        num_nodes = len(self.nodes)
+        num_edges = len(self.edges)
+        # boom stiffnesses
+        B = np.zeros(num_nodes)
+        np.add.at(B, self.edges[:,0], self.Et*self.length/2.0)
+        np.add.at(B, self.edges[:,1], self.Et*self.length/2.0)
+        xc = np.dot(B, self.nodes[:,0])/np.sum(B)
+        yc = np.dot(B, self.nodes[:,1])/np.sum(B)
+        x = self.nodes[:,0] - xc
+        y = self.nodes[:,1] - yc
+        Ixx = np.dot(B, y*y)
+        Iyy = np.dot(B, x*x)
+        Ixy = np.dot(B, x*y)
+        det = Ixx*Iyy - Ixy**2
+        # node equilibrium: (flow out) - (flow in) = change in boom load
+        A = np.zeros((num_nodes, num_edges))
+        A[self.edges[:,0], np.arange(num_edges)] += 1.0
+        A[self.edges[:,1], np.arange(num_edges)] -= 1.0
+        # no twist in each cell
+        C = self.cell_signs*(self.length/self.Gt)
+        M = np.vstack((A, C))
+        moments = []
+        for (Sx, Sy) in [(1.0, 0.0), (0.0, 1.0)]:
+            b = -B*((Sx*Ixx - Sy*Ixy)*x + (Sy*Iyy - Sx*Ixy)*y)/det
+            rhs = np.concatenate((b, np.zeros(len(C))))
+            q = np.linalg.lstsq(M, rhs, rcond=-1)[0]
+            moments.append(np.dot(q, self.swept))
+        # a shear force Sx at x3 = y_sc has a moment -Sx*y_sc about the
+        # origin; a shear force Sy at x2 = x_sc has a moment Sy*x_sc
+        return (moments[1], -moments[0])
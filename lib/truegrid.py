@@ -0,0 +1,71 @@
+"""Collect the commands of a TrueGrid input file (*.tg) in memory.
+
+A TrueGridDeck is a file-like buffer: the structure and layer methods that
+write TrueGrid commands call <deck>.write() and <deck>.curve(), and the whole
+input file is written to disk once at the end, instead of reopening the file
+in append mode for every part.
+
+The deck can also be returned as a string instead of saved (a dry run), which
+is useful for comparing input files without touching the station path.
+
+Usage
+-----
+import truegrid as tg
+deck = tg.TrueGridDeck()
+deck.write('c spar cap\\n')
+deck.curve(1, [(0.0, 0.0), (1.0, 0.1)])
+print deck.getvalue()   # dry run
+deck.save('stn01/mesh_stn01_start.tg')
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import text_utils as tu
+reload(tu)
+
+
+class TrueGridDeck:
+    """Buffer the contents of a TrueGrid input file.
+
+    Usage
+    -----
+    deck = TrueGridDeck()
+    deck.write("c exit\\n")
+    s = deck.getvalue()
+
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, s):
+        """Append a string to the deck, just like <file>.write()."""
+        self._chunks.append(s)
+
+    def curve(self, curve_num, coords):
+        """Append a 3D curve, defined by a list of (x2, x3) coordinate pairs.
+
+        Parameters
+        ----------
+        curve_num : int or str, the curve ID number (or a placeholder, like
+            '#', to be numbered by hand in TrueGrid)
+        coords : array-like, shape (n,2), the coordinate pairs
+
+        """
+        self._chunks.append('curd {0} lp3\n'.format(curve_num))
+        self._chunks.append(tu.format_block(coords, tu.coords_fmt))
+        self._chunks.append(';;\n\n')
+
+    def getvalue(self):
+        """Returns the contents of the deck as a string."""
+        s = ''.join(self._chunks)
+        self._chunks = [s]
+        return s
+
+    def save(self, filename):
+        """Write the deck to a file, all at once."""
+        f = open(filename, 'w')
+        f.write(self.getvalue())
+        f.close()
@@ -6,6 +6,9 @@ TrueGrid) into a VABS input file.
 Use the class VabsOutputFile to read mass and stiffness matrices from a VABS
 output file.
 
+Use the class VabsRecoveryFile to read the element strains and stresses that
+VABS recovers (with the recover flag), and to summarize them by layer.
+
 Author: Perry Roth-Johnson
 Last updated: April 1, 2014
 
@@ -16,6 +19,10 @@ import numpy as np
 import pandas as pd
 import abaqus_utils2 as au
 reload(au)
+import grid as gr
+reload(gr)
+import text_utils as tu
+reload(tu)
 
 
 class VabsInputFile:
@@ -31,6 +38,13 @@ class VabsInputFile:
     layer_filename='sandia_blade/layers.csv',
     debug_flag=True)
 
+    If renumber=True, the nodes and elements of the grid are renumbered to
+    reduce the bandwidth before the file is written (see
+    grid.renumber_grid()). The grid's original numbers are saved in
+    grid.original_node_nums and grid.original_elem_nums, for post-processing,
+    and the bandwidth and profile before and after are saved in
+    f.renumbering.
+
     """
     def __init__(self, vabs_filename, grid, material_filename, layer_filename,
         debug_flag=False,
@@ -46,7 +60,8 @@ class VabsInputFile:
             'oblique'          : 0,
             'trapeze'          : 0,
             'Vlasov'           : 0
-        }):
+        },
+        renumber=False):
         self.vabs_filename = vabs_filename
         self.grid = grid
         # read material file to determine the number of materials
@@ -58,6 +73,10 @@ class VabsInputFile:
         self._lf = pd.read_csv(self.layer_filename)
         self.number_of_layers = len(self._lf)
         self.flags = flags
+        self.renumbering = None
+        if renumber:
+            self.renumbering = gr.renumber_grid(self.grid,
+                print_flag=debug_flag)
         self._write_input_file(debug_flag=debug_flag)
 
     def _write_input_file(self, debug_flag=False):
@@ -116,11 +135,10 @@ class VabsInputFile:
 
     def _write_nodes(self):
         n = str(len(str(self.grid.number_of_nodes)))
-        fmt = '{0:>'+n+'d}' + 5*' ' + '{1:> 10.8f}' + 2*' ' + '{2:> 10.8f}\n'
-        for node in self.grid.list_of_nodes:
-            self.vabs_file.write(fmt.format(node.node_num,
-                                            node.x2,
-                                            node.x3))
+        fmt = '{:>'+n+'d}' + 5*' ' + '{:> 10.8f}' + 2*' ' + '{:> 10.8f}'
+        rows = [(node.node_num, node.x2, node.x3)
+            for node in self.grid.list_of_nodes]
+        self.vabs_file.write(tu.format_table(rows, fmt))
         self.vabs_file.write('\n')
 
     def _write_element_connectivity(self):
@@ -128,29 +146,27 @@ class VabsInputFile:
         nfmt = '>' + nn + 'd'
         ne = str(len(str(self.grid.number_of_elements)))
         efmt = '>' + ne + 'd'
-        fmt = '{0:'+efmt+'}     {1:'+nfmt+'} {2:'+nfmt+'} {3:'+nfmt+'} {4:'+nfmt+'} {5:'+nfmt+'} {6:'+nfmt+'} {7:'+nfmt+'} {8:'+nfmt+'} {9:'+nfmt+'}\n'
-        for element in self.grid.list_of_elements:
-            self.vabs_file.write(fmt.format(element.elem_num,
-                                            element.node1.node_num,
-                                            element.node2.node_num,
-                                            element.node3.node_num,
-                                            element.node4.node_num,
-                                            element.node5.node_num,
-                                            element.node6.node_num,
-                                            element.node7.node_num,
-                                            element.node8.node_num,
-                                            element.node9.node_num))
+        fmt = '{:'+efmt+'}     ' + ' '.join(9*['{:'+nfmt+'}'])
+        rows = [(element.elem_num,
+                 element.node1.node_num,
+                 element.node2.node_num,
+                 element.node3.node_num,
+                 element.node4.node_num,
+                 element.node5.node_num,
+                 element.node6.node_num,
+                 element.node7.node_num,
+                 element.node8.node_num,
+                 element.node9.node_num)
+            for element in self.grid.list_of_elements]
+        self.vabs_file.write(tu.format_table(rows, fmt))
         self.vabs_file.write('\n')
 
     def _write_element_layers(self):
         n = str(len(str(self.grid.number_of_elements)))
-        fmt = '{0:>'+n+'d}' + 5*' ' + '{1:d} {2:>7.2f}\n'
-        for element in self.grid.list_of_elements:
-            self.vabs_file.write(fmt.format(
-                element.elem_num,
-                element.layer_num,
-                element.theta1)
-            )
+        fmt = '{:>'+n+'d}' + 5*' ' + '{:d} {:>7.2f}'
+        rows = [(element.elem_num, element.layer_num, element.theta1)
+            for element in self.grid.list_of_elements]
+        self.vabs_file.write(tu.format_table(rows, fmt))
         self.vabs_file.write('\n')
 
     def _write_layers(self):
@@ -201,8 +217,9 @@ class VabsInputFile:
 class VabsOutputFile:
     def __init__(self, vabs_filename):
         self.vabs_filename = vabs_filename
-        # open the output file
-        vof = open(self.vabs_filename, 'r')
+        # open the output file (with universal newlines, for files written on
+        #   Windows)
+        vof = open(self.vabs_filename, 'rU')
         # read the VABS output file into memory
         self.vabs_file = vof.readlines()
         # close the output file
@@ -210,8 +227,11 @@ class VabsOutputFile:
         # initialize empty stiffness (K) and mass (M) matrices
         self.K = np.zeros((6,6))
         self.M = np.zeros((6,6))
+        # initialize an empty classical stiffness matrix (K_classical)
+        self.K_classical = np.zeros((4,4))
         # extract the stiffness and mass matrices
         self.extract_stiffness_matrix()
+        self.extract_classical_stiffness_matrix()
         self.extract_mass_matrix()
 
     def __str__(self):
@@ -234,6 +254,18 @@ class VabsOutputFile:
             for j, coeff in enumerate(line.strip().split()):
                 self.K[i,j] = coeff
 
+    def extract_classical_stiffness_matrix(self):
+        """Save the classical stiffness matrix from the VABS output file."""
+        # find the index of the header line for the classical stiffness matrix
+        for i, line in enumerate(self.vabs_file):
+            if line == ' Classical Stiffness Matrix (1-extension; 2-twist; 3,4-bending)\n':
+                vabs_index = i
+        # extract the classical stiffness matrix
+        stiffness_matrix_lines = self.vabs_file[vabs_index+3:vabs_index+3+4]
+        for i, line in enumerate(stiffness_matrix_lines):
+            for j, coeff in enumerate(line.strip().split()):
+                self.K_classical[i,j] = coeff
+
     def extract_mass_matrix(self):
         """Save the mass matrix from the VABS output file."""
         # find the index of the header line for the VABS mass matrix
@@ -265,3 +297,284 @@ K_55      K_66       K_44      K_11        M_11      M_55      M_66
         M_66 = self.M[5,5]
         return (K_55, K_66, K_44, K_11, M_11, M_55, M_66)
 
+
+class VabsRecoveryFile:
+    """The element strains and stresses recovered by VABS (the .ELE file).
+
+    When VABS is run with the recover flag (flags={'recover': 1, ...} in
+    VabsInputFile), it writes the average 3D strains and stresses of each
+    element to <vabs_filename>.ELE, one line per element:
+      elem_num, then the strains (11, 2*12, 2*13, 22, 2*23, 33) and stresses
+      (11, 12, 13, 22, 23, 33) in the beam coordinate system, then the
+      strains and stresses in the material coordinate system
+    Files without the material coordinate system columns are also read.
+
+    The recovery file is much larger than the .K file, so it is read in
+    blocks, and each block is parsed straight into an array of floats. The
+    file is never held in memory as a list of lines, and the rows of elements
+    that were not asked for (see element_sets) are dropped block by block.
+
+    Usage:
+    import lib.vabs_utils as vu
+    r = vu.VabsRecoveryFile(
+    recovery_filename='sandia_blade/stn01/mesh_stn01.vabs.ELE',
+    grid=g,
+    layer_filename='sandia_blade/layers.csv',
+    element_sets=['sparcapupper', 'sparcaplower'])
+    r.strain_material[:,3]        # e22 of each element, in grid order
+    r.max_strains_by_layer()
+    r.failure_indices('sandia_blade/strain_allowables.csv')
+    r.summarize_by_layer('sandia_blade/strain_allowables.csv')
+
+    Initialization:
+    VabsRecoveryFile(recovery_filename, grid, layer_filename=None,
+        element_sets=None, block_size=4194304)
+      recovery_filename - A string for the VABS recovery file (.ELE).
+      grid - The grid that was written to the VABS input file (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object). If the
+        grid was renumbered (VabsInputFile(..., renumber=True)), its element
+        numbers match the VABS file.
+      layer_filename - Optional string for the layers CSV file (e.g.
+        'sandia_blade/layers.csv'), to look up the material of each layer.
+        It is needed for the failure indices.
+      element_sets - Optional list of strings, to keep only the elements in
+        these element sets.
+      block_size - Optional integer for the number of bytes read at a time.
+
+    Public attributes:
+    element_index - An array of ints, the index in grid.list_of_elements of
+        each row, in the same order as grid.list_of_elements.
+    elem_num - An array of ints, the element number of each row.
+    layer_num - An array of ints, the layer number of each row.
+    material_num - An array of ints, the material number of each row (None
+        if there is no layer file).
+    element_set - An array of strs, the element set of each row.
+    strain_beam, stress_beam - Arrays, shape (E,6), the strains (11, 2*12,
+        2*13, 22, 2*23, 33) and stresses (11, 12, 13, 22, 23, 33) of each row,
+        in the beam coordinate system.
+    strain_material, stress_material - Arrays, shape (E,6), the strains and
+        stresses of each row, in the material coordinate system (None if they
+        are not in the file).
+
+    """
+    # names of the strain and stress components, in the order of the file
+    strain_names = ['e11', 'g12', 'g13', 'e22', 'g23', 'e33']
+    stress_names = ['s11', 's12', 's13', 's22', 's23', 's33']
+
+    def __init__(self, recovery_filename, grid, layer_filename=None,
+        element_sets=None, block_size=4194304):
+        self.recovery_filename = recovery_filename
+        self.grid = grid
+        el_list = grid.list_of_elements
+        index = dict([(el.elem_num, i) for (i, el) in enumerate(el_list)])
+        if element_sets is None:
+            keep = np.ones(len(el_list), dtype=bool)
+        else:
+            keep = np.array([el.element_set in element_sets
+                for el in el_list], dtype=bool)
+        # read the file in blocks, and keep the rows of the chosen elements
+        rows = []
+        elem_index = []
+        for block in self._read_blocks(block_size):
+            try:
+                i = np.array([index[n] for n in block[:,0].astype(int)],
+                    dtype=int)
+            except KeyError as e:
+                raise ValueError("Element #{0} in {1} is not in the grid".format(
+                    e.args[0], self.recovery_filename))
+            mask = keep[i]
+            rows.append(block[mask,1:])
+            elem_index.append(i[mask])
+        if len(rows) == 0:
+            raise IOError("No elements were found in " + self.recovery_filename)
+        rows = np.concatenate(rows)
+        elem_index = np.concatenate(elem_index)
+        # sort the rows into the order of grid.list_of_elements
+        order = np.argsort(elem_index, kind='mergesort')
+        rows = rows[order]
+        self.element_index = elem_index[order]
+        self.elem_num = np.array([el_list[i].elem_num
+            for i in self.element_index], dtype=int)
+        self.layer_num = np.array([el_list[i].layer_num
+            for i in self.element_index], dtype=int)
+        self.element_set = np.array([el_list[i].element_set
+            for i in self.element_index], dtype=object)
+        self.strain_beam = rows[:,0:6]
+        self.stress_beam = rows[:,6:12]
+        if rows.shape[1] == 24:
+            self.strain_material = rows[:,12:18]
+            self.stress_material = rows[:,18:24]
+        else:
+            self.strain_material = None
+            self.stress_material = None
+        self.material_num = None
+        if layer_filename is not None:
+            lf = pd.read_csv(layer_filename)
+            materials = dict(zip(lf['layer number'], lf['material number']))
+            self.material_num = np.array([materials[n]
+                for n in self.layer_num], dtype=int)
+
+    def _read_blocks(self, block_size):
+        """Yields the lines of the recovery file as arrays, a block at a time.
+
+        Each block is an array of floats, with one row per line (elem_num,
+        then 12 or 24 strains and stresses).
+
+        """
+        f = open(self.recovery_filename, 'r')
+        try:
+            # the number of columns, from the first line
+            first = f.readline()
+            while first != '' and first.strip() == '':
+                first = f.readline()
+            num_columns = len(first.split())
+            if num_columns not in [13, 25]:
+                raise ValueError("{0} has {1} columns; expected 13 or 25 (elem_num, then 12 or 24 strains and stresses)".format(
+                    self.recovery_filename, num_columns))
+            leftover = first
+            while True:
+                text = f.read(block_size)
+                at_end = (text == '')
+                text = leftover + text
+                if at_end:
+                    leftover = ''
+                else:
+                    # keep the last (partial) line for the next block
+                    end = text.rfind('\n') + 1
+                    (text, leftover) = (text[:end], text[end:])
+                values = np.fromstring(text.replace('D', 'E'), sep=' ')
+                if values.size % num_columns != 0:
+                    raise ValueError("{0} has a line without {1} columns".format(
+                        self.recovery_filename, num_columns))
+                if values.size > 0:
+                    yield values.reshape(-1, num_columns)
+                if at_end:
+                    break
+        finally:
+            f.close()
+
+    def _strains(self, frame):
+        if frame == 'material':
+            if self.strain_material is None:
+                raise ValueError("{0} has no strains in the material coordinate system".format(
+                    self.recovery_filename))
+            return self.strain_material
+        elif frame == 'beam':
+            return self.strain_beam
+        else:
+            raise ValueError("Keyword `frame` must be 'material' or 'beam'.")
+
+    def max_strains_by_layer(self, frame='material'):
+        """Returns the largest strains in each layer.
+
+        Parameters
+        ----------
+        frame : str, 'material' (default) or 'beam', the coordinate system of
+            the strains
+
+        Returns
+        -------
+        pandas.DataFrame, indexed by layer number, with the max and min of the
+        normal strains (e.g. 'max e11', 'min e11'), and the max absolute
+        value of the shear strains (e.g. 'max |g12|')
+
+        """
+        strains = self._strains(frame)
+        df = pd.DataFrame(strains, columns=self.strain_names)
+        shear = ['g12', 'g13', 'g23']
+        df[shear] = df[shear].abs()
+        grouped = df.groupby(self.layer_num)
+        (hi, lo) = (grouped.max(), grouped.min())
+        summary = pd.DataFrame(index=hi.index)
+        for name in self.strain_names:
+            if name in shear:
+                summary['max |{0}|'.format(name)] = hi[name]
+            else:
+                summary['max ' + name] = hi[name]
+                summary['min ' + name] = lo[name]
+        summary.index.name = 'layer number'
+        return summary
+
+    def failure_indices(self, allowables, frame='material'):
+        """Returns the max strain failure index of each element.
+
+        The failure index is the largest ratio of a strain to its allowable
+        (>= 1 means the element has failed). Tensile and compressive normal
+        strains are checked against their own allowables.
+
+        Parameters
+        ----------
+        allowables : pandas.DataFrame or str (the name of a CSV file), indexed
+            by material number, with any of the columns 'e11t', 'e11c',
+            'e22t', 'e22c', 'e33t', 'e33c' (tensile and compressive strain
+            allowables, as positive numbers), and 'g12', 'g13', 'g23' (shear
+            strain allowables)
+        frame : str, 'material' (default) or 'beam', the coordinate system of
+            the strains
+
+        Returns
+        -------
+        np.array, shape (E,), the failure index of each row (NaN for rows
+        whose material has no allowables)
+
+        """
+        if self.material_num is None:
+            raise ValueError("The failure indices need the materials; use VabsRecoveryFile(..., layer_filename=...)")
+        if isinstance(allowables, str):
+            allowables = pd.read_csv(allowables, index_col=0)
+        strains = self._strains(frame)
+        m = self.material_num
+        ratios = []
+        for (k, name) in enumerate(self.strain_names):
+            s = strains[:,k]
+            if name in allowables.columns:
+                # shear strain
+                limit = allowables[name].reindex(m).values
+            elif (name + 't' in allowables.columns and
+                name + 'c' in allowables.columns):
+                # normal strain, in tension or compression
+                limit = np.where(s >= 0.0,
+                    allowables[name + 't'].reindex(m).values,
+                    allowables[name + 'c'].reindex(m).values)
+            else:
+                continue
+            ratios.append(np.abs(s)/limit)
+        if len(ratios) == 0:
+            raise ValueError("No strain allowables were found; expected columns like 'e11t', 'e11c', and 'g12'")
+        ratios = np.column_stack(ratios)
+        checked = ~np.isnan(ratios).all(axis=1)
+        fi = np.empty(len(strains))
+        fi[:] = np.nan
+        fi[checked] = np.nanmax(ratios[checked], axis=1)
+        return fi
+
+    def summarize_by_layer(self, allowables=None, frame='material'):
+        """Returns the largest strains and failure index of each layer.
+
+        Parameters
+        ----------
+        allowables : pandas.DataFrame or str (default: None), the strain
+            allowables of each material (see failure_indices()); if None, only
+            the strains are summarized
+        frame : str, 'material' (default) or 'beam', the coordinate system of
+            the strains
+
+        Returns
+        -------
+        pandas.DataFrame, indexed by layer number, with 'number of elements',
+        the columns of max_strains_by_layer(), and (with allowables) 'max
+        failure index' and 'critical element' (the element number with the
+        max failure index)
+
+        """
+        summary = self.max_strains_by_layer(frame=frame)
+        counts = pd.Series(self.layer_num).value_counts()
+        summary.insert(0, 'number of elements', counts.reindex(summary.index))
+        if allowables is not None:
+            fi = pd.Series(self.failure_indices(allowables, frame=frame))
+            grouped = fi.groupby(self.layer_num)
+            summary['max failure index'] = grouped.max()
+            critical = grouped.idxmax().dropna().astype(int)
+            summary['critical element'] = pd.Series(self.elem_num[critical],
+                index=critical.index)
+        return summary
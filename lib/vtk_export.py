@@ -0,0 +1,235 @@
+"""Write cross-section grids and spanwise properties to binary VTK files.
+
+The files can be opened in ParaView (or any other VTK viewer), so big grids
+and whole blades can be inspected without plotting them in matplotlib.
+
+Use write_grid_vtu() to write a grid (e.g. an AbaqusGrid from TrueGrid, or a
+TransfiniteGrid from the builtin mesher) to a VTK unstructured grid file
+(.vtu). Quadratic elements are written as quadratic VTK cells, so curved
+sides are drawn correctly. The layer number, material number, element set,
+and layer plane angle (theta1) of each element are written as cell data.
+
+Use write_properties_vtp() to write a table of sectional properties (e.g.
+<blade>.mk, from <blade>.writecsv_mass_and_stiffness_props()) to a VTK
+polydata file (.vtp), as a polyline along the span with one point per
+station. Each numeric column of the table is written as point data.
+
+Both writers use the VTK XML format, with the data arrays appended as raw
+binary (little-endian) after the XML header, so no VTK libraries are needed.
+
+Usage
+-----
+import lib.abaqus_utils2 as au
+import lib.vtk_export as ve
+g = au.AbaqusGrid('sandia_blade/stn01/mesh_stn01.abq')
+# ... assign the layer plane angles of g ...
+ve.write_grid_vtu(g, 'sandia_blade/stn01/mesh_stn01.vtu',
+    layer_filename='sandia_blade/layers.csv', x1=0.0)
+# after the VABS runs
+b.writecsv_mass_and_stiffness_props()
+ve.write_properties_vtp(b.mk, 'sandia_blade/blade_props_from_VABS.vtp')
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import numpy as np
+import pandas as pd
+from xml.sax.saxutils import quoteattr
+import grid as gr
+reload(gr)
+import mesh_quality as mq
+reload(mq)
+
+
+# VTK cell type of each element shape
+cell_types = {
+    'tri3': 5,      # VTK_TRIANGLE
+    'quad4': 9,     # VTK_QUAD
+    'tri6': 22,     # VTK_QUADRATIC_TRIANGLE
+    'quad8': 23     # VTK_QUADRATIC_QUAD
+    }
+# VTK type names of the numpy types that are written
+_vtk_types = {
+    np.dtype('<f8'): 'Float64',
+    np.dtype('<i4'): 'Int32',
+    np.dtype('<i8'): 'Int64',
+    np.dtype('u1'): 'UInt8'
+    }
+
+
+def _write_vtk_xml(filename, data_type, piece_attributes, sections,
+    field_data=None):
+    """Writes a VTK XML file, with raw binary appended data.
+
+    Parameters
+    ----------
+    filename : str, the file to write
+    data_type : str, 'UnstructuredGrid' or 'PolyData'
+    piece_attributes : list of (name, value) pairs for the Piece element,
+        e.g. [('NumberOfPoints', 10), ('NumberOfCells', 4)]
+    sections : list of (tag, arrays) pairs, where arrays is a list of
+        (name, np.array) pairs; each array has one row per point or cell (and
+        one column per component, if it has more than one)
+    field_data : dict of {name: list of strs} (default: None), string arrays
+        written as field data (e.g. the names of the element sets)
+
+    """
+    header = []
+    blocks = []
+    offset = 0
+    header.append('<?xml version="1.0"?>')
+    header.append('<VTKFile type="{0}" version="1.0" byte_order="LittleEndian" header_type="UInt64">'.format(data_type))
+    header.append('  <{0}>'.format(data_type))
+    if field_data:
+        header.append('    <FieldData>')
+        for (name, strings) in sorted(field_data.items()):
+            # VTK writes strings as null-terminated lists of char codes
+            codes = ' '.join(['{0} 0'.format(' '.join([str(ord(c))
+                for c in s])) for s in strings])
+            header.append('      <Array type="String" Name={0} NumberOfTuples="{1}" format="ascii">'.format(quoteattr(name), len(strings)))
+            header.append('        ' + codes)
+            header.append('      </Array>')
+        header.append('    </FieldData>')
+    header.append('    <Piece {0}>'.format(' '.join(['{0}="{1}"'.format(k, v)
+        for (k, v) in piece_attributes])))
+    for (tag, arrays) in sections:
+        header.append('      <{0}>'.format(tag))
+        for (name, a) in arrays:
+            a = np.ascontiguousarray(a)
+            components = 1 if a.ndim == 1 else a.shape[1]
+            header.append('        <DataArray type="{0}" Name={1} NumberOfComponents="{2}" format="appended" offset="{3}"/>'.format(
+                _vtk_types[a.dtype], quoteattr(name), components, offset))
+            data = a.tostring()
+            blocks.append(np.array([len(data)], dtype='<u8').tostring())
+            blocks.append(data)
+            offset += 8 + len(data)
+        header.append('      </{0}>'.format(tag))
+    header.append('    </Piece>')
+    header.append('  </{0}>'.format(data_type))
+    header.append('  <AppendedData encoding="raw">')
+    f = open(filename, 'wb')
+    f.write('\n'.join(header) + '\n   _')
+    f.write(''.join(blocks))
+    f.write('\n  </AppendedData>\n</VTKFile>\n')
+    f.close()
+
+def write_grid_vtu(grid, vtu_filename, layer_filename=None, x1=0.0):
+    """Writes a grid to a VTK unstructured grid file (.vtu).
+
+    The points are (x1, x2, x3), so the grids of several stations can be
+    viewed together, each at its spanwise coord x1.
+
+    Cell data: 'elem_num', 'layer_num', 'material_num' (only if
+    layer_filename is given), 'element_set', and 'theta1' (NaN for elements
+    without a layer plane angle). 'element_set' is the index of each
+    element's set in the field data array 'element_set_names'.
+
+    Point data: 'node_num'
+
+    Parameters
+    ----------
+    grid : object with list_of_nodes and list_of_elements attributes (e.g. an
+        abaqus_utils2.AbaqusGrid or mesher.TransfiniteGrid object)
+    vtu_filename : str, the file to write (e.g. 'mesh_stn01.vtu')
+    layer_filename : str (default: None), the layers CSV file (e.g.
+        'sandia_blade/layers.csv'), to look up the material of each layer
+    x1 : float (default: 0.0), the spanwise coord of the grid
+
+    """
+    (x, conn) = gr.connectivity_arrays(grid)
+    shapes = mq.element_shapes(conn)
+    el_list = grid.list_of_elements
+    # points
+    points = np.column_stack((np.ones(len(x))*x1, x)).astype('<f8')
+    # cells, with the nodes of each shape in VTK order (corners, then the
+    #   mid-side nodes of sides 1-2, 2-3, ...), which is the same as the
+    #   order of the nodes of each element
+    used = np.zeros(conn.shape, dtype=bool)
+    types = np.zeros(len(conn), dtype='u1')
+    for shape in mq.node_slots:
+        mask = shapes == shape
+        used[np.ix_(mask, mq.node_slots[shape])] = True
+        types[mask] = cell_types[shape]
+    connectivity = conn[used]
+    offsets = np.cumsum(used.sum(axis=1))
+    # cell data
+    layer_num = np.array([el.layer_num for el in el_list], dtype='<i4')
+    theta1 = np.array([np.nan if el.theta1 is None else el.theta1
+        for el in el_list], dtype='<f8')
+    set_names = sorted(set([str(el.element_set) for el in el_list]))
+    set_index = dict([(s, i) for (i, s) in enumerate(set_names)])
+    element_set = np.array([set_index[str(el.element_set)] for el in el_list],
+        dtype='<i4')
+    cell_data = [
+        ('elem_num', np.array([el.elem_num for el in el_list], dtype='<i4')),
+        ('layer_num', layer_num)]
+    if layer_filename is not None:
+        lf = pd.read_csv(layer_filename)
+        materials = dict(zip(lf['layer number'], lf['material number']))
+        try:
+            material_num = np.array([materials[n] for n in layer_num],
+                dtype='<i4')
+        except KeyError as e:
+            raise ValueError("Layer #{0} is not in the layer file {1}".format(
+                e.args[0], layer_filename))
+        cell_data.append(('material_num', material_num))
+    cell_data += [('element_set', element_set), ('theta1', theta1)]
+    _write_vtk_xml(vtu_filename, 'UnstructuredGrid',
+        [('NumberOfPoints', len(points)), ('NumberOfCells', len(conn))],
+        [('PointData', [('node_num', np.array([node.node_num
+            for node in grid.list_of_nodes], dtype='<i4'))]),
+         ('CellData', cell_data),
+         ('Points', [('Points', points)]),
+         ('Cells', [('connectivity', connectivity.astype('<i8')),
+                    ('offsets', offsets.astype('<i8')),
+                    ('types', types)])],
+        field_data={'element_set_names': set_names})
+
+def write_properties_vtp(props, vtp_filename,
+    x1_column='Blade Spanwise Coordinate', x2_column=None, x3_column=None):
+    """Writes a table of spanwise properties to a VTK polydata file (.vtp).
+
+    The stations are written as the points of one polyline, and each numeric
+    column of the table is written as point data. Missing values (e.g. for a
+    station without a VABS output file) are written as NaN.
+
+    Parameters
+    ----------
+    props : pandas.DataFrame, with one row per station (e.g. <blade>.mk,
+        <blade>.mk_est, or <blade>.mass_distribution)
+    vtp_filename : str, the file to write (e.g. 'blade_props_from_VABS.vtp')
+    x1_column : str (default: 'Blade Spanwise Coordinate'), the column of
+        spanwise coords ('x1' for <blade>.mass_distribution)
+    x2_column, x3_column : str (default: None), optional columns of chordwise
+        and flapwise coords for the points (e.g. 'shear center, x2'); by
+        default, the points are on the x1-axis
+
+    """
+    if x1_column not in props.columns:
+        raise ValueError("The column '{0}' is not in the table".format(
+            x1_column))
+    n = len(props)
+    points = np.zeros((n,3))
+    for (i, column) in enumerate([x1_column, x2_column, x3_column]):
+        if column is not None:
+            points[:,i] = props[column].values
+    if n > 1:
+        lines = [('connectivity', np.arange(n, dtype='<i8')),
+                 ('offsets', np.array([n], dtype='<i8'))]
+    else:
+        lines = []
+    point_data = [('station', np.asarray(props.index, dtype='<i4'))]
+    for column in props.columns:
+        if np.issubdtype(props[column].dtype, np.number):
+            point_data.append((column,
+                props[column].values.astype('<f8')))
+    _write_vtk_xml(vtp_filename, 'PolyData',
+        [('NumberOfPoints', n), ('NumberOfVerts', 0),
+         ('NumberOfLines', 1 if n > 1 else 0), ('NumberOfStrips', 0),
+         ('NumberOfPolys', 0)],
+        [('PointData', point_data),
+         ('Points', [('Points', points.astype('<f8'))]),
+         ('Lines', lines)])
@@ -0,0 +1,132 @@
+"""Write initial TrueGrid files (or VABS input files) for every station of a
+blade, in one batch.
+
+This script replaces the bounding polygons that were typed by hand in each
+<blade>_lib/prep_stnXX_mesh.py script. The ring-shaped layers (root buildup,
+external surface, and internal surfaces) are cut into four-sided alternate
+layers automatically, at the edges of the spar cap, shear webs, and TE
+reinforcement (see lib/poly_utils.partition_alt_layers()).
+
+A plot of the cut layers is saved in each station path, so the partitions can
+be checked before meshing.
+
+If builtin_mesher = True, TrueGrid is skipped: each station is meshed with
+lib/mesher.TransfiniteGrid, and written straight to a VABS input file
+(<station_path>/mesh_stnXX_builtin.vabs), so the VABS input files made from
+the TrueGrid meshes (mesh_stnXX.vabs) are not overwritten. Stations with
+inverted elements are skipped (no VABS input file is written), and listed at
+the end.
+
+Usage
+-----
+start an IPython (qt)console with the pylab flag:
+$ ipython qtconsole --pylab
+or
+$ ipython --pylab
+Then, from the prompt, run this script:
+|> %run prep_all_meshes
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import matplotlib.pyplot as plt
+import lib.blade as bl
+import lib.poly_utils as pu
+import lib.mesher as mh
+import lib.vabs_utils as vu
+reload(bl)
+reload(pu)
+reload(mh)
+reload(vu)
+
+
+# SET THESE PARAMETERS -----------------
+biplane_flag = False
+stn_nums = None  # list of station numbers, or None for all stations
+builtin_mesher = False  # True: skip TrueGrid, and write VABS input files
+element_size = 0.02  # target element size (meters) for the builtin mesher
+renumber = True  # builtin mesher: renumber nodes to reduce the bandwidth
+# --------------------------------------
+plt.close('all')
+
+# load the blade
+if biplane_flag:
+    b = bl.BiplaneBlade(
+        'biplane blade, flapwise symmetric, no stagger, rj/R=0.452, g/c=1.25',
+        'biplane_blade')
+else:
+    b = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+if stn_nums is None:
+    stn_nums = range(1, len(b.list_of_stations)+1)
+skipped_stations = []
+
+for station_num in stn_nums:
+    # pre-process the station dimensions
+    station = b.list_of_stations[station_num-1]
+    station.airfoil.create_polygon()
+    station.structure.create_all_layers()
+    station.structure.save_all_layer_edges()
+    station.structure.write_all_part_polygons()
+
+    # plot the parts
+    station.plot_parts()
+
+    # access the structure for this station
+    st = station.structure
+
+    # cut the ring-shaped layers into four-sided alternate layers
+    if station.type == 'monoplane':
+        airfoils = [None]
+    else:
+        airfoils = ['lower', 'upper']
+    new_layers = []
+    additional_layers = []
+    for airfoil in airfoils:
+        new_layers.extend(pu.partition_alt_layers(st, airfoil=airfoil))
+        additional_layers.extend(pu.uncut_layers(st, airfoil=airfoil))
+
+    # save the plot
+    plt.savefig(os.path.join(station.station_path,
+        'partitions_stn{0:02d}.png'.format(station_num)))
+    plt.close('all')
+
+    if builtin_mesher:
+        # mesh the station, and write the VABS input file -----------------
+        g = mh.TransfiniteGrid(new_layers + additional_layers,
+            element_size=element_size)
+        if len(g.inverted_elements) > 0:
+            # VABS can't solve a grid with inverted elements
+            print " Skipped station #{0}: the grid has {1} inverted elements".format(station_num, sum(g.inverted_elements.values()))
+            skipped_stations.append(station_num)
+            continue
+        stn_str = 'stn{0:02d}'.format(station_num)
+        vu.VabsInputFile(
+            vabs_filename=os.path.join(station.station_path,
+                'mesh_' + stn_str + '_builtin.vabs'),
+            grid=g,
+            material_filename=b.matl_filename,
+            layer_filename=os.path.join(b.blade_path, 'layers.csv'),
+            flags={
+                'format'           : 1,
+                'Timoshenko'       : 1,
+                'recover'          : 0,
+                'thermal'          : 0,
+                'curve'            : 0,
+                'oblique'          : 0,
+                'trapeze'          : 0,
+                'Vlasov'           : 0
+            },
+            renumber=renumber)
+    else:
+        # write the TrueGrid input file for mesh generation ---------------
+        st.write_truegrid_inputfile(
+            interrupt_flag=True,
+            additional_layers=additional_layers)
+
+if len(skipped_stations) > 0:
+    print ''
+    print '*** No VABS input files were written for stations {0} (inverted elements)'.format(skipped_stations)
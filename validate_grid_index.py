@@ -0,0 +1,86 @@
+"""Check that lib/grid_index.py finds a point inside every element of a grid.
+
+For each mesh_stnXX.abq file of the Sandia and biplane blades, a point is
+placed inside every element, at the same local coords (xi, eta) in each
+element, for a few local coords near the corners, sides, and middle. All the
+points of a grid are located in one batch with GridIndex.locate(), and this
+script prints, for each grid:
+  * the number of points that were not found, or were found in another
+    element
+  * the largest error of the local coords of the points that were found
+  * the time to locate all the points
+A Warning is raised at the end if any point was not found in its own element.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run validate_grid_index.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import glob
+import time
+import numpy as np
+import lib.abaqus_utils2 as au
+reload(au)
+import lib.mesh_quality as mq
+reload(mq)
+import lib.grid_index as gi
+reload(gi)
+
+
+# the local coords (xi, eta) of the points in each element shape
+local_points = {
+    'quad': np.array([(0.0, 0.0), (0.9, 0.9), (-0.9, 0.5), (0.5, -0.99)]),
+    'tri': np.array([(1.0/3.0, 1.0/3.0), (0.1, 0.1), (0.8, 0.1), (0.05, 0.9)])
+    }
+
+abq_files = sorted(
+    glob.glob(os.path.join('sandia_blade', 'stn*', 'mesh_stn*.abq')) +
+    glob.glob(os.path.join('biplane_blade', 'stn*', 'mesh_stn*.abq')))
+
+print ''
+print 'ABAQUS file                          points   missed  xi error  time (s)'
+print '-----------------------------------  -------  ------  --------  --------'
+total_missed = 0
+for abq_filename in abq_files:
+    g = au.AbaqusGrid(abq_filename)
+    index = gi.GridIndex(g)
+    (x, conn) = (index.x, index.conn)
+    points = []
+    expected = []
+    expected_xi = []
+    for shape in mq.node_slots:
+        elements = np.nonzero(index.shapes == shape)[0]
+        if len(elements) == 0:
+            continue
+        xi = local_points[shape[:-1]]
+        N = mq.shape_functions(shape, xi)                   # (G,n)
+        X = x[conn[elements][:,mq.node_slots[shape]]]       # (E,n,2)
+        points.append(np.einsum('gn,ena->ega', N, X).reshape(-1, 2))
+        expected.append(np.repeat(elements, len(xi)))
+        expected_xi.append(np.tile(xi, (len(elements), 1)))
+    points = np.concatenate(points)
+    expected = np.concatenate(expected)
+    expected_xi = np.concatenate(expected_xi)
+    t = time.time()
+    (found, local_coords) = index.locate(points)
+    t = time.time() - t
+    ok = found == expected
+    missed = len(points) - ok.sum()
+    total_missed += missed
+    xi_error = np.abs(local_coords[ok] - expected_xi[ok]).max()
+    print '{0:35s}  {1:7d}  {2:6d}  {3:8.1e}  {4:8.2f}'.format(abq_filename,
+        len(points), missed, xi_error, t)
+print ''
+if total_missed > 0:
+    raise Warning("{0} points were not found in their own elements!".format(
+        total_missed))
+print 'OK: every point was found in its own element'
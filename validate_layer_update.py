@@ -0,0 +1,70 @@
+"""Check that <structure>.update_all_layers() matches create_all_layers().
+
+For a few stations of the Sandia blade, the layers are created, the spar caps
+are widened by 20% (so they grow into internal surfaces that they didn't
+border before), and only the stale layers are rebuilt with
+update_all_layers(). Then, all the layers are rebuilt from scratch with
+create_all_layers(), and each updated layer is compared with the new one.
+This script prints, for each station:
+  * the parts that were rebuilt by update_all_layers()
+  * the largest area of the symmetric difference between an updated layer
+    and its new layer, relative to the area of the new layer
+A Warning is raised at the end if any layer differs by more than 1e-6.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run validate_layer_update.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import lib.blade as bl
+reload(bl)
+
+
+# SET THESE PARAMETERS -----------------
+station_nums = [20, 28]
+spar_cap_scale = 1.2
+max_error = 1.0e-6
+# --------------------------------------
+
+def layer_label(layer):
+    """Returns a label for a layer, e.g. 'SparCap; uniax, lower'."""
+    return '{0}; {1}'.format(layer.parent_part.__class__.__name__, layer.name)
+
+
+m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+worst_error = 0.0
+for station_num in station_nums:
+    station = m.list_of_stations[station_num-1]
+    station.airfoil.create_polygon()
+    st = station.structure
+    st.create_all_layers()
+    st.spar_cap.base *= spar_cap_scale
+    rebuilt = st.update_all_layers()
+    updated_layers = list(st._list_of_layers)
+    st.clear_all_layers()
+    st.create_all_layers()
+    new_layers = st._list_of_layers
+    print ''
+    print 'Station #{0}: rebuilt {1}'.format(station_num, ', '.join(rebuilt))
+    if ([layer_label(l) for l in updated_layers] !=
+        [layer_label(l) for l in new_layers]):
+        raise Warning("Station #{0}: the updated layers are not the same as the new layers!".format(station_num))
+    errors = []
+    for (updated, new) in zip(updated_layers, new_layers):
+        diff = updated.polygon.symmetric_difference(new.polygon)
+        errors.append((diff.area/new.polygon.area, layer_label(new)))
+    (error, label) = max(errors)
+    worst_error = max(worst_error, error)
+    print '  largest relative area error: {0:.2e} ({1})'.format(error, label)
+print ''
+if worst_error > max_error:
+    raise Warning("An updated layer differs from its new layer by {0:.2e}!".format(worst_error))
+print 'OK: update_all_layers() matches create_all_layers()'
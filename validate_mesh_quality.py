@@ -0,0 +1,86 @@
+"""Check that lib/mesh_quality.py flags elements that are turned inside out.
+
+A small grid is built with one good (CCW) and one inverted (CW) element of
+each quadratic shape (quad8 and tri6). The elements are created with
+autocorrect=False, so their CW nodes are kept. The quality metrics of each
+element are printed, and a Warning is raised if the CW elements are not
+reported by mesh_quality.bad_elements() and mesh_quality.summarize() (with
+their default limits), or if the CCW elements are.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run validate_mesh_quality.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import lib.grid as gr
+reload(gr)
+import lib.mesh_quality as mq
+reload(mq)
+
+
+class SmallGrid:
+    """A grid of a few elements, for checking the quality metrics."""
+    def __init__(self):
+        self.list_of_nodes = []
+        self.list_of_elements = []
+
+    def add_nodes(self, coords):
+        """Adds a node at each (x2, x3) in coords, and returns the nodes."""
+        nodes = []
+        for (x2, x3) in coords:
+            nodes.append(gr.Node(len(self.list_of_nodes)+1, x2, x3))
+            self.list_of_nodes.append(nodes[-1])
+        return nodes
+
+
+g = SmallGrid()
+# a unit square, with its corner nodes and then its mid-side nodes
+square = [(0.0,0.0), (1.0,0.0), (1.0,1.0), (0.0,1.0),
+          (0.5,0.0), (1.0,0.5), (0.5,1.0), (0.0,0.5)]
+# a right triangle, with its corner nodes and then its mid-side nodes
+triangle = [(0.0,0.0), (1.0,0.0), (0.0,1.0), (0.5,0.0), (0.5,0.5), (0.0,0.5)]
+# the same elements, mirrored about the x2-axis (so their nodes are in CW
+#   order), and shifted along x2, so no elements overlap
+square_cw = [(x2+2.0, -x3) for (x2, x3) in square]
+triangle = [(x2+4.0, x3) for (x2, x3) in triangle]
+triangle_cw = [(x2+2.0, -x3) for (x2, x3) in triangle]
+for (elem_num, coords, element_set) in [(1, square, 'quad8, CCW'),
+    (2, square_cw, 'quad8, CW'), (3, triangle, 'tri6, CCW'),
+    (4, triangle_cw, 'tri6, CW')]:
+    nodes = g.add_nodes(coords)
+    if len(nodes) == 8:
+        el = gr.QuadrilateralQuadraticElement(elem_num, *nodes, layer_num=1,
+            autocorrect=False)
+    else:
+        el = gr.TriangularQuadraticElement(elem_num, *nodes, layer_num=1,
+            autocorrect=False)
+    el.element_set = element_set
+    g.list_of_elements.append(el)
+
+q = mq.element_quality(g)
+print ''
+print q[['element_set', 'shape', 'min_jacobian', 'scaled_jacobian',
+    'min_angle']].to_string()
+bad = mq.bad_elements(q)
+s = mq.summarize(q)
+print ''
+print s[['number_of_elements', 'number_of_bad_elements',
+    'min_scaled_jacobian']].to_string()
+expected_bad = ['quad8, CW', 'tri6, CW']
+if sorted(bad['element_set']) != expected_bad:
+    raise Warning("bad_elements() reported {0}, not {1}!".format(
+        list(bad['element_set']), expected_bad))
+bad_sets = s.index[s['number_of_bad_elements'] > 0]
+if sorted(bad_sets) != expected_bad:
+    raise Warning("summarize() counted bad elements in {0}, not {1}!".format(
+        list(bad_sets), expected_bad))
+print ''
+print 'OK: only the CW elements are reported as bad'
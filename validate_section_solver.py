@@ -0,0 +1,60 @@
+"""Validate the builtin cross-section solver against the VABS output files.
+
+For each station of the Sandia and biplane blades that has a VABS input file
+(mesh_stnXX.vabs) and a VABS output file (mesh_stnXX.vabs.K), the classical
+stiffness matrix and the mass matrix are calculated with
+lib/section_solver.py (from the same VABS input file), and compared with the
+VABS output file. This script prints:
+  * the largest relative error of the diagonal of the classical stiffness
+    matrix (K) and of the mass matrix (M)
+  * the largest error of all the entries of K and M, relative to the largest
+    entry of each matrix
+  * the time to solve each station
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run validate_section_solver.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import os
+import glob
+import time
+import numpy as np
+import lib.section_solver as ss
+reload(ss)
+import lib.vabs_utils as vu
+reload(vu)
+
+
+vabs_files = sorted(
+    glob.glob(os.path.join('sandia_blade', 'stn*', 'mesh_stn*.vabs')) +
+    glob.glob(os.path.join('biplane_blade', 'stn*', 'mesh_stn*.vabs')))
+
+print ''
+print 'VABS input file                       K diag    K all     M diag    M all     time (s)'
+print '------------------------------------  --------  --------  --------  --------  --------'
+max_error = 0.0
+for vabs_filename in vabs_files:
+    if not os.path.exists(vabs_filename + '.K'):
+        continue
+    t = time.time()
+    (K, M) = ss.solve(**ss.read_vabs_input(vabs_filename))
+    t = time.time() - t
+    v = vu.VabsOutputFile(vabs_filename + '.K')
+    errors = []
+    for (A, A_vabs) in [(K, v.K_classical), (M, v.M)]:
+        errors.append(np.abs(np.diag(A)/np.diag(A_vabs) - 1.0).max())
+        errors.append(np.abs(A - A_vabs).max()/np.abs(A_vabs).max())
+    max_error = max(max_error, max(errors))
+    print '{0:36s}  {1:8.2e}  {2:8.2e}  {3:8.2e}  {4:8.2e}  {5:8.2f}'.format(
+        vabs_filename, errors[0], errors[1], errors[2], errors[3], t)
+print ''
+print 'largest relative error: {0:.2e}'.format(max_error)
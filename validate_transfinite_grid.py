@@ -0,0 +1,64 @@
+"""Check that lib/mesher.py meshes every station without inverted elements.
+
+For each station of the Sandia blade, the layers are created and cut into
+alternate layers (see lib/poly_utils.partition_alt_layers()), and all the
+layer regions are meshed with lib/mesher.TransfiniteGrid. This script prints,
+for each station:
+  * the number of elements
+  * the number of elements that are turned inside out
+  * the number of hanging element edges
+  * the time to mesh the station
+A Warning is raised at the end if any station has inverted elements.
+
+Usage
+-----
+start an IPython console from the root of this repository:
+$ ipython
+Then, from the prompt, run this script:
+|> %run validate_transfinite_grid.py
+
+Author: Perry Roth-Johnson
+Last updated: October 18, 2026
+
+"""
+
+
+import time
+import lib.blade as bl
+reload(bl)
+import lib.poly_utils as pu
+reload(pu)
+import lib.mesher as mh
+reload(mh)
+
+
+# SET THESE PARAMETERS -----------------
+element_size = 0.02
+# --------------------------------------
+
+m = bl.MonoplaneBlade('Sandia blade SNL100-00', 'sandia_blade')
+results = []
+for station in m.list_of_stations:
+    station.airfoil.create_polygon()
+    st = station.structure
+    st.create_all_layers()
+    st.save_all_layer_edges()
+    layers = pu.partition_alt_layers(st) + pu.uncut_layers(st)
+    t = time.time()
+    g = mh.TransfiniteGrid(layers, element_size=element_size)
+    t = time.time() - t
+    results.append((station.station_num, g.number_of_elements,
+        sum(g.inverted_elements.values()), sum(g.hanging_edges.values()), t))
+
+print ''
+print 'station  elements  inverted  hanging  time (s)'
+print '-------  --------  --------  -------  --------'
+for (station_num, elements, inverted, hanging, t) in results:
+    print '{0:7d}  {1:8d}  {2:8d}  {3:7d}  {4:8.2f}'.format(station_num,
+        elements, inverted, hanging, t)
+print ''
+bad_stations = [r[0] for r in results if r[2] > 0]
+if len(bad_stations) > 0:
+    raise Warning("The grids of stations {0} have inverted elements!".format(
+        bad_stations))
+print 'OK: no station has inverted elements'